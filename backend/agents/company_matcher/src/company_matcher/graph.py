@@ -2,12 +2,13 @@
 
 from __future__ import annotations
 
-import json
 import os
 import sys
+from functools import lru_cache
 from pathlib import Path
 from urllib.parse import urlparse
 
+import orjson
 from jinja2 import Environment, FileSystemLoader
 from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
 from langchain_core.runnables import RunnableConfig
@@ -15,8 +16,9 @@ from langchain_core.tools import tool
 from langchain_openai import ChatOpenAI
 from langgraph.graph import END, START, StateGraph
 from langgraph.prebuilt import ToolNode, tools_condition
+from pydantic import TypeAdapter
 
-from company_matcher.models import CompanyMatch, CompanyMatchResult
+from company_matcher.models import CompanyMatchResult
 from company_matcher.state import CompanyMatcherInputState, CompanyMatcherState
 
 # Import shared Tavily tools from backend/agents/tools.
@@ -33,17 +35,19 @@ from tools import tavily_search_tool
 
 PROMPTS_DIR = Path(__file__).resolve().parent / "prompts"
 
+# Prompts ship with the package: no mtime checks, and never evict compiled templates.
 _jinja_env = Environment(
     loader=FileSystemLoader(str(PROMPTS_DIR)),
     trim_blocks=True,
     lstrip_blocks=True,
+    auto_reload=False,
+    cache_size=-1,
 )
 
 
 def load_prompt(template_name: str, **kwargs) -> str:
     """Load and render a Jinja2 prompt template."""
-    template = _jinja_env.get_template(template_name)
-    return template.render(**kwargs)
+    return _jinja_env.get_template(template_name).render(**kwargs)
 
 
 # =============================================================================
@@ -54,6 +58,9 @@ def load_prompt(template_name: str, **kwargs) -> str:
 async def web_search(queries: list[str], config: RunnableConfig | None = None) -> str:
     """Search the web for company information using multiple queries.
     
+    All queries in one call are searched concurrently, so batch independent
+    queries into a single call.
+    
     Args:
         queries: List of search queries to execute (max 5)
         config: Runtime configuration
@@ -109,10 +116,23 @@ MAX_ITERATIONS = 1
 MAX_SUGGESTIONS = 3
 MAX_QUERIES_PER_CALL = 5  # Maximum queries per web_search call
 
+# The model's JSON is always validated once against CompanyMatchResult. A match
+# missing its name, domain or confidence is dropped so one bad suggestion doesn't
+# fail the whole result; set STRICT_OUTPUT=true to raise on it instead.
+STRICT_OUTPUT = os.getenv("STRICT_OUTPUT", "false").lower() == "true"
+_RESULT_ADAPTER = TypeAdapter(CompanyMatchResult)
+_REQUIRED_MATCH_FIELDS = ("name", "top_domain", "confidence")
+
+
+def _is_complete_match(d: dict) -> bool:
+    """Whether the model filled in every CompanyMatch field we can't default."""
+    return all(d.get(k) for k in _REQUIRED_MATCH_FIELDS)
+
 
 def _extract_company_name(messages: list) -> str:
     """Extract company name from the last human message."""
-    for message in reversed(messages):
+    for i in range(len(messages) - 1, -1, -1):
+        message = messages[i]
         if isinstance(message, HumanMessage):
             if isinstance(message.content, str) and message.content.strip():
                 return message.content.strip()
@@ -122,6 +142,27 @@ def _extract_company_name(messages: list) -> str:
 TOOLS = [web_search, finish_matching]
 tool_node = ToolNode(TOOLS)
 
+# The prompt only varies by company name and country, so render it once with
+# placeholders and substitute the per-request values with str.replace.
+_NAME_PLACEHOLDER = "\x00COMPANY_NAME\x00"
+_COUNTRY_PLACEHOLDER = "\x00COUNTRY\x00"
+_PRERENDERED_PROMPT = load_prompt(
+    "prompt.jinja",
+    company_name=_NAME_PLACEHOLDER,
+    country_of_establishment=_COUNTRY_PLACEHOLDER,
+    max_iterations=MAX_ITERATIONS,
+    max_suggestions=MAX_SUGGESTIONS,
+    max_queries_per_call=MAX_QUERIES_PER_CALL,
+)
+
+
+def _render_prompt(company_name: str, country_of_establishment: str) -> str:
+    """Fill the pre-rendered prompt; NUL bytes are dropped so inputs can't forge a placeholder."""
+    return _PRERENDERED_PROMPT.replace(
+        _NAME_PLACEHOLDER, company_name.replace("\x00", "")
+    ).replace(_COUNTRY_PLACEHOLDER, country_of_establishment.replace("\x00", ""))
+
+
 def _to_top_domain(value: str) -> str:
     """Normalize a URL/domain-ish string into a top-domain hostname."""
     v = (value or "").strip()
@@ -141,17 +182,14 @@ def _to_top_domain(value: str) -> str:
 async def prepare_prompt(
     state: CompanyMatcherState, config: RunnableConfig | None = None
 ) -> dict:
-    """Build the formatted prompt so the agent always starts from the same context."""
+    """Build the formatted prompt so the agent always starts from the same context.
+
+    The company name is extracted here once and kept in state; later nodes read
+    `state["company_name"]` instead of re-scanning the growing message list.
+    """
     company_name = _extract_company_name(state.get("messages", []))
     country_of_establishment = (state.get("country_of_establishment") or "").strip()
-    prompt = load_prompt(
-        "prompt.jinja",
-        company_name=company_name,
-        country_of_establishment=country_of_establishment,
-        max_iterations=MAX_ITERATIONS,
-        max_suggestions=MAX_SUGGESTIONS,
-        max_queries_per_call=MAX_QUERIES_PER_CALL,
-    )
+    prompt = _render_prompt(company_name, country_of_establishment)
     return {
         "company_name": company_name,
         "country_of_establishment": country_of_establishment,
@@ -159,33 +197,83 @@ async def prepare_prompt(
     }
 
 
+# Read once at import; keys passed in the run config still take precedence.
+_ENV_API_KEY = os.getenv("OPENAI_API_KEY")
+_ENV_BASE_URL = os.getenv("OPENAI_BASE_URL")
+
+
+@lru_cache(maxsize=8)
+def _get_bound_model(
+    api_key: str | None, base_url: str | None, model: str, max_tokens: int
+):
+    """Return a tool-bound chat model, reused across runs with the same credentials.
+
+    Reusing the instance keeps its HTTP connection pool warm and binds the tool
+    schemas once instead of on every agent step.
+    """
+    return ChatOpenAI(
+        model=model,
+        api_key=api_key,
+        base_url=base_url,
+        max_tokens=max_tokens,
+    ).bind_tools(TOOLS, parallel_tool_calls=True)
+
+
 async def run_agent(
     state: CompanyMatcherState, config: RunnableConfig | None = None
 ) -> dict:
     """LLM step that decides whether to call tools or produce a final answer."""
     api_keys = (config or {}).get("configurable", {}).get("apiKeys", {})
-    api_key = api_keys.get("OPENAI_API_KEY") or os.getenv("OPENAI_API_KEY")
-    base_url = api_keys.get("OPENAI_BASE_URL") or os.getenv("OPENAI_BASE_URL")
+    api_key = api_keys.get("OPENAI_API_KEY") or _ENV_API_KEY
+    base_url = api_keys.get("OPENAI_BASE_URL") or _ENV_BASE_URL
 
-    model = ChatOpenAI(
-        model="deepseek-chat",
-        api_key=api_key,
-        base_url=base_url,
-        max_tokens=2000,
-    ).bind_tools(TOOLS)
+    model = _get_bound_model(api_key, base_url, "deepseek-chat", 2000)
 
     response = await model.ainvoke(state["messages"], config=config)
     return {"messages": [response]}
 
 
+def _iter_json_objects(text: str):
+    """Yield each balanced top-level `{...}` substring of `text`, in order.
+
+    Single pass that tracks string literals and escapes, so braces inside
+    JSON string values (e.g. a summary quoting code) don't end the object early.
+    """
+    depth = 0
+    start = -1
+    in_string = False
+    escape = False
+    for i, ch in enumerate(text):
+        if in_string:
+            if escape:
+                escape = False
+            elif ch == "\\":
+                escape = True
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            if depth:
+                in_string = True
+        elif ch == "{":
+            if depth == 0:
+                start = i
+            depth += 1
+        elif ch == "}" and depth:
+            depth -= 1
+            if depth == 0:
+                yield text[start : i + 1]
+
+
 def _parse_result_from_messages(messages: list[BaseMessage | str]) -> str:
     """Extract the most recent result JSON payload from the conversation.
 
     Important: the initial prompt includes JSON examples, so we ignore HumanMessages
     and only accept payloads that look like the real output schema.
     """
-    for message in reversed(messages):
-        if isinstance(message, HumanMessage):
+    for i in range(len(messages) - 1, -1, -1):
+        message = messages[i]
+        # Messages carry a "human" | "ai" | "tool" type tag; plain strings have none.
+        if getattr(message, "type", None) == "human":
             continue
         content = getattr(message, "content", message)
         if not isinstance(content, str):
@@ -195,14 +283,14 @@ def _parse_result_from_messages(messages: list[BaseMessage | str]) -> str:
         # Heuristic: require the expected keys to avoid parsing the prompt examples.
         if '"exact_match"' not in content or '"suggestions"' not in content:
             continue
-        json_start = content.find("{")
-        json_end = content.rfind("}") + 1
-        candidate = content[json_start:json_end]
-        try:
-            json.loads(candidate)
-        except json.JSONDecodeError:
-            continue
-        return candidate
+        for candidate in _iter_json_objects(content):
+            if '"exact_match"' not in candidate:
+                continue
+            try:
+                orjson.loads(candidate)
+            except orjson.JSONDecodeError:
+                continue
+            return candidate
     return "{}"
 
 
@@ -214,8 +302,8 @@ async def finalize_result(
     raw_json = _parse_result_from_messages(state.get("messages", []))
 
     try:
-        parsed = json.loads(raw_json)
-    except json.JSONDecodeError:
+        parsed = orjson.loads(raw_json)
+    except orjson.JSONDecodeError:
         parsed = {"exact_match": None, "suggestions": []}
 
     def _normalize_match_dict(d: dict) -> dict:
@@ -249,21 +337,28 @@ async def finalize_result(
             d["summary_long"] = d.get("summary_short") or d.get("description") or ""
         return d
 
-    exact_match = None
-    if parsed.get("exact_match"):
-        exact_match = CompanyMatch(**_normalize_match_dict(parsed["exact_match"]))
+    exact_match = parsed.get("exact_match")
+    if exact_match:
+        exact_match = _normalize_match_dict(exact_match)
+    else:
+        exact_match = None
+    suggestions = [_normalize_match_dict(s) for s in parsed.get("suggestions", [])]
 
-    suggestions = [
-        CompanyMatch(**_normalize_match_dict(s)) for s in parsed.get("suggestions", [])
-    ]
+    if not STRICT_OUTPUT:
+        if exact_match and not _is_complete_match(exact_match):
+            exact_match = None
+        suggestions = [s for s in suggestions if _is_complete_match(s)]
 
-    result = CompanyMatchResult(
-        input_name=company_name or "Unknown",
-        exact_match=exact_match,
-        suggestions=suggestions,
+    # One validation pass over the whole payload instead of one per model.
+    result = _RESULT_ADAPTER.validate_python(
+        {
+            "input_name": company_name or "Unknown",
+            "exact_match": exact_match,
+            "suggestions": suggestions,
+        }
     )
-
     json_output = result.to_json()
+
     return {
         "company_name": company_name,
         "match_result": json_output,
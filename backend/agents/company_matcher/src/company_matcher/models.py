@@ -1,13 +1,18 @@
 """Data models for Company Matcher output."""
 
+import orjson
 from pydantic import ConfigDict
 from pydantic import BaseModel, Field
 
+# Results are built once in finalize_result and only read afterwards. Freezing
+# them skips the assignment-validation hook and makes accidental mutation an error.
+_RESULT_CONFIG = ConfigDict(frozen=True, extra="ignore")
+
 
 class CompanyMatch(BaseModel):
     """A single company match result."""
 
-    model_config = ConfigDict(extra="ignore")
+    model_config = _RESULT_CONFIG
 
     name: str = Field(description="Company name")
     top_domain: str = Field(
@@ -23,11 +28,19 @@ class CompanyMatch(BaseModel):
         description="Extended company summary (can be extensive) based on sources",
     )
 
+    def _fast_dict(self) -> dict:
+        """Same as model_dump(exclude_none=True); only summary_short can be None."""
+        d = {"name": self.name, "top_domain": self.top_domain, "confidence": self.confidence}
+        if self.summary_short is not None:
+            d["summary_short"] = self.summary_short
+        d["summary_long"] = self.summary_long
+        return d
+
 
 class CompanyMatchResult(BaseModel):
     """Final output from company matcher."""
 
-    model_config = ConfigDict(extra="ignore")
+    model_config = _RESULT_CONFIG
 
     input_name: str = Field(description="The input company name")
     exact_match: CompanyMatch | None = Field(
@@ -39,7 +52,19 @@ class CompanyMatchResult(BaseModel):
         description="List of closest matches if no exact match"
     )
     
-    def to_json(self, *, indent: int = 2) -> str:
+    def _fast_dict(self) -> dict:
+        """Same as model_dump(exclude_none=True), built without walking the fields."""
+        d: dict = {"input_name": self.input_name}
+        if self.exact_match is not None:
+            d["exact_match"] = self.exact_match._fast_dict()
+        d["suggestions"] = [s._fast_dict() for s in self.suggestions]
+        return d
+
+    def to_json(self, *, indent: int | None = 2) -> str:
         """Convert to JSON string."""
-        return self.model_dump_json(indent=indent, exclude_none=True)
+        # orjson can only do compact or 2-space output; pydantic handles any other indent.
+        if indent not in (None, 2):
+            return self.model_dump_json(indent=indent, exclude_none=True)
+        option = orjson.OPT_INDENT_2 if indent == 2 else 0
+        return orjson.dumps(self._fast_dict(), option=option).decode()
 
@@ -1,12 +1,12 @@
 """Configuration for the Company Researcher agent."""
 
 import os
+from functools import lru_cache
 from typing import Any, Optional
 
 from langchain_core.runnables import RunnableConfig
 from pydantic import BaseModel, Field
 
-
 class Configuration(BaseModel):
     """Configuration for Company Researcher."""
 
@@ -52,17 +52,35 @@ class Configuration(BaseModel):
         default=17,
         metadata={"description": "Max sub-questions to research in parallel"}
     )
+    max_parallel_llm_calls: int = Field(
+        default=10,
+        metadata={"description": "Max LLM requests in flight at once, across all runs in the process"}
+    )
 
     @classmethod
     def from_runnable_config(cls, config: Optional[RunnableConfig] = None) -> "Configuration":
-        """Create Configuration from RunnableConfig, with env var fallbacks."""
+        """Create Configuration from RunnableConfig, with env var fallbacks.
+
+        Instances are memoized on the resolved field values, so the nodes and
+        tools of a run share one instead of each validating a new one.
+        """
         configurable = config.get("configurable", {}) if config else {}
-        field_names = list(cls.model_fields.keys())
-        values: dict[str, Any] = {
-            field_name: os.environ.get(field_name.upper(), configurable.get(field_name))
-            for field_name in field_names
-        }
-        return cls(**{k: v for k, v in values.items() if v is not None})
+        values = tuple(
+            (field_name, os.environ.get(field_name.upper(), configurable.get(field_name)))
+            for field_name in cls.model_fields
+        )
+        try:
+            return _configuration_from_values(values)
+        except TypeError:
+            # An unhashable configurable value; build it without the cache.
+            return cls(**{k: v for k, v in values if v is not None})
 
     class Config:
         arbitrary_types_allowed = True
+        # Shared between runs by the memoization above.
+        frozen = True
+
+
+@lru_cache(maxsize=64)
+def _configuration_from_values(values: tuple[tuple[str, Any], ...]) -> Configuration:
+    return Configuration(**{k: v for k, v in values if v is not None})
@@ -3,26 +3,26 @@
 from __future__ import annotations
 
 import asyncio
+import io
+import logging
 import os
+from functools import lru_cache
 from pathlib import Path
-from typing import List, Literal
+from typing import Literal
 from urllib.parse import urlparse
 import re
+import weakref
 
+import orjson
 from jinja2 import Environment, FileSystemLoader
-from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage, ToolMessage
 from langchain_core.runnables import RunnableConfig
 from langchain_openai import ChatOpenAI
 from langgraph.graph import END, START, StateGraph
-from langgraph.prebuilt import ToolNode
-from langgraph.types import Send
+from pydantic import TypeAdapter
 
 from company_researcher.configuration import Configuration
-from company_researcher.models import (
-    CompanyResearchResult,
-    SubQuestion,
-    SubQuestionAnswer,
-)
+from company_researcher.models import CompanyResearchResult
 from company_researcher.question_loader import load_subquestions_from_templates
 from company_researcher.researcher import get_research_tools
 from company_researcher.state import (
@@ -32,6 +32,10 @@ from company_researcher.state import (
 )
 from company_researcher.utils import get_api_key_for_model
 
+logger = logging.getLogger(__name__)
+
+# The report is validated in one pass over the whole payload, not one model per answer.
+_RESULT_ADAPTER = TypeAdapter(CompanyResearchResult)
 
 # =============================================================================
 # Prompt Loading
@@ -39,17 +43,139 @@ from company_researcher.utils import get_api_key_for_model
 
 PROMPTS_DIR = Path(__file__).resolve().parent / "prompts"
 
+# Prompts ship with the package: no mtime checks, and never evict compiled templates.
 _jinja_env = Environment(
     loader=FileSystemLoader(str(PROMPTS_DIR)),
     trim_blocks=True,
     lstrip_blocks=True,
+    auto_reload=False,
+    cache_size=-1,
 )
 
 
+_BARE_VAR_RE = re.compile(r"{{\s*(\w+)\s*}}")
+
+
+@lru_cache(maxsize=64)
+def _get_flat_template(template_name: str) -> tuple[str, re.Pattern | None] | None:
+    """Pre-render a flat template (only bare `{{ var }}` substitutions) with placeholders.
+
+    Returns the rendered text and a pattern matching its placeholders, or None when
+    the template uses tags, filters or expressions and needs a real Jinja render.
+    """
+    source, _, _ = _jinja_env.loader.get_source(_jinja_env, template_name)
+    names = _BARE_VAR_RE.findall(source)
+    if "{%" in source or source.count("{{") != len(names):
+        return None
+    placeholders = {name: f"\x00{name}\x00" for name in names}
+    text = _jinja_env.get_template(template_name).render(**placeholders)
+    if not placeholders:
+        return text, None
+    return text, re.compile("|".join(re.escape(p) for p in placeholders.values()))
+
+
 def load_prompt(template_name: str, **kwargs) -> str:
-    """Load and render a Jinja2 prompt template."""
-    template = _jinja_env.get_template(template_name)
-    return template.render(**kwargs)
+    """Load and render a Jinja2 prompt template.
+
+    The researcher's templates are flat, so they are rendered once with placeholders
+    and filled in a single regex pass per call; other templates go through Jinja.
+    """
+    flat = _get_flat_template(template_name)
+    if flat is None:
+        return _jinja_env.get_template(template_name).render(**kwargs)
+    text, pattern = flat
+    if pattern is None:
+        return text
+    # Undefined variables render as "" in Jinja; everything else as str(value).
+    return pattern.sub(lambda m: str(kwargs.get(m.group()[1:-1], "")), text)
+
+
+# Read once at import; a base URL passed in the run config still takes precedence.
+_ENV_BASE_URL = os.getenv("OPENAI_BASE_URL")
+
+
+def _get_base_url(config: RunnableConfig | None) -> str | None:
+    """Return the OpenAI base URL from the run config, falling back to the environment."""
+    api_keys = (config or {}).get("configurable", {}).get("apiKeys", {})
+    return api_keys.get("OPENAI_BASE_URL") or _ENV_BASE_URL
+
+
+def _resolve_credentials(cfg: Configuration, config: RunnableConfig | None) -> dict:
+    """Resolve API keys and base URL once per run for every sub-question loop."""
+    return {
+        "research_api_key": get_api_key_for_model(cfg.research_model, config),
+        "summarization_api_key": get_api_key_for_model(cfg.summarization_model, config),
+        "base_url": _get_base_url(config),
+    }
+
+
+# One LLM gate per event loop and limit, shared by every run in the process, so
+# concurrent research runs don't jointly exceed the provider's rate limits.
+_LLM_SEMAPHORES: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+
+def _get_llm_semaphore(limit: int) -> asyncio.Semaphore:
+    """Return the process-wide semaphore bounding in-flight LLM calls on this loop."""
+    per_loop = _LLM_SEMAPHORES.setdefault(asyncio.get_running_loop(), {})
+    limit = max(1, limit)
+    if limit not in per_loop:
+        per_loop[limit] = asyncio.Semaphore(limit)
+    return per_loop[limit]
+
+
+@lru_cache(maxsize=8)
+def _get_chat_model(
+    model: str, api_key: str | None, base_url: str | None, max_tokens: int
+) -> ChatOpenAI:
+    """Return a chat model shared by every run with the same settings.
+
+    Sub-questions fan out in parallel, so reusing the instance (and its HTTP
+    connection pool) avoids building one client per branch and per step.
+    """
+    model_params = {
+        "model": model,
+        "max_tokens": max_tokens,
+    }
+    if api_key:
+        model_params["api_key"] = api_key
+    if base_url:
+        model_params["base_url"] = base_url
+    return ChatOpenAI(**model_params)
+
+
+@lru_cache(maxsize=8)
+def _get_research_model(
+    model: str, api_key: str | None, base_url: str | None, max_tokens: int
+):
+    """Return the research model with the research tools already bound."""
+    return _get_chat_model(model, api_key, base_url, max_tokens).bind_tools(
+        get_research_tools()
+    )
+
+
+# Research trace budget for the summarizer prompt. Each answer's raw_research
+# carries the same trace unless RAW_RESEARCH_MAX_CHARS (opt-in, 0 = off) caps it.
+MAX_TRACE_CHARS = 400_000
+RAW_RESEARCH_MAX_CHARS = int(os.getenv("RAW_RESEARCH_MAX_CHARS", "0") or 0)
+_TRACE_MESSAGE_TYPES = frozenset({"ai", "tool", "human"})
+
+# Summarize all sub-questions in one LLM call once research finishes, instead of one
+# call per sub-question as each finishes. Fewer requests, but the summaries no longer
+# overlap with the remaining research and the traces share one prompt budget.
+BATCH_SUMMARIES = os.getenv("BATCH_SUMMARIES", "false").lower() == "true"
+
+# Matches the "FIELD: value" lines requested by summarize_system.jinja. The value keeps
+# any further colons (e.g. "ANSWER: Belgium: Brussels").
+_SUMMARY_FIELD_RE = re.compile(
+    r"^[ \t]*(INFORMATION_FOUND|ANSWER|SOURCE|CONFIDENCE)[ \t]*:[ \t]*(.*?)[ \t\r]*$",
+    re.IGNORECASE | re.MULTILINE,
+)
+_SUMMARY_FIELDS = ("INFORMATION_FOUND", "ANSWER", "SOURCE", "CONFIDENCE")
+
+
+def _parse_summary_fields(text: str) -> dict[str, str]:
+    """Parse the "FIELD: value" lines in one regex pass (last occurrence wins)."""
+    return {m.group(1).upper(): m.group(2) for m in _SUMMARY_FIELD_RE.finditer(text)}
 
 
 def _infer_source_domain(raw_output: str, top_domain: str | None = None) -> str:
@@ -104,7 +230,7 @@ def _infer_source_domain(raw_output: str, top_domain: str | None = None) -> str:
 
 
 # =============================================================================
-# Subgraph Nodes (Single Question Research)
+# Single Question Research Nodes
 # =============================================================================
 
 async def research_agent(
@@ -115,26 +241,15 @@ async def research_agent(
     
     # Get model params
     model_name = cfg.research_model.replace("openai:", "") if cfg.research_model.startswith("openai:") else cfg.research_model
-    api_key = get_api_key_for_model(cfg.research_model, config)
-    base_url = None
-    if config:
-        api_keys = config.get("configurable", {}).get("apiKeys", {})
-        base_url = api_keys.get("OPENAI_BASE_URL") or os.getenv("OPENAI_BASE_URL")
+    if "research_api_key" in state:
+        api_key, base_url = state["research_api_key"], state["base_url"]
     else:
-        base_url = os.getenv("OPENAI_BASE_URL")
+        api_key = get_api_key_for_model(cfg.research_model, config)
+        base_url = _get_base_url(config)
     
-    model_params = {
-        "model": model_name,
-        "max_tokens": cfg.research_model_max_tokens,
-    }
-    if api_key:
-        model_params["api_key"] = api_key
-    if base_url:
-        model_params["base_url"] = base_url
-    
-    model = ChatOpenAI(**model_params)
-    tools = get_research_tools()
-    model_with_tools = model.bind_tools(tools)
+    model_with_tools = _get_research_model(
+        model_name, api_key, base_url, cfg.research_model_max_tokens
+    )
     
     # Prepare messages
     messages = state.get("messages", [])
@@ -162,146 +277,31 @@ async def research_agent(
 
         messages = [HumanMessage(content=context_block + prompt)]
     
-    response = await model_with_tools.ainvoke(messages)
+    async with _get_llm_semaphore(cfg.max_parallel_llm_calls):
+        response = await model_with_tools.ainvoke(messages)
     return {"messages": [response]}
 
 
-async def summarize_research(
-    state: QuestionResearchState, config: RunnableConfig | None = None
-) -> dict:
-    """Summarize the research trace into a final answer."""
-    # Extract trace from message history
-    messages = state.get("messages", [])
-    trace_parts = []
-    
-    final_summary_tool_arg = ""
-    
-    for msg in messages:
-        if isinstance(msg, (AIMessage, ToolMessage)):
-            trace_parts.append(str(msg.content))
-            # Look for finish_research tool call to get the proposed summary
-            if isinstance(msg, AIMessage) and msg.tool_calls:
-                 for tc in msg.tool_calls:
-                     if tc["name"] == "finish_research":
-                         final_summary_tool_arg = tc["args"].get("summary", "")
-        elif isinstance(msg, HumanMessage):
-             # Skip the big system prompt in trace to save tokens, or include if needed.
-             # Including just the content.
-             trace_parts.append(str(msg.content))
+# =============================================================================
+# Main Graph Nodes
+# =============================================================================
 
-    raw_output = "\n\n".join(trace_parts)
-    if final_summary_tool_arg:
-        raw_output += f"\n\nFINAL AGENT SUMMARY: {final_summary_tool_arg}"
+# The question templates ship with the package, so parse them once at import.
+# Set DEV_RELOAD=true to re-read them on every run while editing templates.
+DEV_RELOAD = os.getenv("DEV_RELOAD", "false").lower() == "true"
+# The state carries them as plain dicts, so they are dumped once here as well.
+_SUBQUESTIONS = [sq.model_dump() for sq in load_subquestions_from_templates()]
 
-    try:
-        cfg = Configuration.from_runnable_config(config) if config else Configuration()
-        
-        model_name = cfg.summarization_model.replace("openai:", "") if cfg.summarization_model.startswith("openai:") else cfg.summarization_model
-        api_key = get_api_key_for_model(cfg.summarization_model, config)
-        base_url = None
-        if config:
-            api_keys = config.get("configurable", {}).get("apiKeys", {})
-            base_url = api_keys.get("OPENAI_BASE_URL") or os.getenv("OPENAI_BASE_URL")
-        else:
-            base_url = os.getenv("OPENAI_BASE_URL")
-        
-        model_params = {
-            "model": model_name,
-            "max_tokens": 500,
-        }
-        if api_key:
-            model_params["api_key"] = api_key
-        if base_url:
-            model_params["base_url"] = base_url
-        
-        model = ChatOpenAI(**model_params)
-        
-        prompt = load_prompt(
-            "summarize.jinja",
-            company_name=state["company_name"],
-            top_domain=state.get("top_domain"),
-            summary_long=state.get("summary_long"),
-            question=state["question"],
-            raw_output=raw_output[:400000],
-        )
-        
-        response = await model.ainvoke([HumanMessage(content=prompt)])
-        response_text = str(response.content)
-        
-        # Parse response
-        answer = "Unable to determine"
-        source = "Unknown"
-        confidence = "Low"
-        information_found: bool | None = None
-        
-        for line in response_text.split('\n'):
-            line_clean = line.strip()
-            upper = line_clean.upper()
-            if upper.startswith("INFORMATION_FOUND:"):
-                raw_val = line_clean.split(":", 1)[1].strip() if ":" in line_clean else ""
-                norm = re.sub(r"[\s_\-]+", "", raw_val.lower())
-                if norm in {"yes", "y", "true", "1", "found"}:
-                    information_found = True
-                elif norm in {"no", "n", "false", "0", "notfound"}:
-                    information_found = False
-            elif upper.startswith("ANSWER:"):
-                answer = line_clean.split(":", 1)[1].strip() if ":" in line_clean else answer
-            elif upper.startswith("SOURCE:"):
-                source = line_clean.split(":", 1)[1].strip() if ":" in line_clean else source
-            elif upper.startswith("CONFIDENCE:"):
-                confidence = line_clean.split(":", 1)[1].strip() if ":" in line_clean else confidence
-
-        # Backward compatible fallback if the new field isn't present.
-        if information_found is None:
-            information_found = answer.strip().lower() != "information not publicly available"
-
-        # Normalize the explicit "no information found" case.
-        if information_found is False:
-            answer = "Information not publicly available"
-            source = "N/A"
-            confidence = "Low"
-        
-        result_obj = SubQuestionAnswer(
-            section=state["section"],
-            question=state["question"],
-            answer=answer,
-            information_found=information_found,
-            source=source,
-            confidence=confidence,
-            raw_research=raw_output,
-        )
-        
-        # We need to return the answer to the PARENT graph
-        # LangGraph subgraphs don't write directly to parent state unless we return it
-        # BUT, when called via Send/node, the return value of the compiled graph is what matters?
-        # Actually, we need to return a dict that matches the parent state schema for reduction?
-        # No, Send("node_name", input) -> node execution.
-        # If node is a compiled graph, its output is its final state.
-        # We need a way to bubble up the 'completed_answers' to the main state.
-        
-        # Since this node is the last in the subgraph, its output is part of the subgraph's final state.
-        # However, to merge into the main state's `completed_answers`, we need the main graph to handle it.
-        # The main graph's `Send` mechanism will collect results?
-        # No, `Send` just spawns tasks. They write to the shared state? 
-        # Standard pattern: The subgraph returns a state update that is compatible with the parent?
-        # OR: We just define `completed_answers` in `QuestionResearchState`?
-        # No, `QuestionResearchState` is local.
-        
-        # Correct approach: The `research_subgraph` output should contain `completed_answers`.
-        # So we add `completed_answers` to `QuestionResearchState` just for transport?
-        # Or we rely on the node wrapper in the main graph to format it.
-        
-        return {
-            "research_summary": response_text
-        }
-        
-    except Exception as e:
-        return {"research_summary": f"Error: {str(e)}"}
 
+def _get_subquestions() -> list[dict]:
+    """Return the sub-question dicts, re-parsing the templates only in DEV_RELOAD mode.
+
+    The list is a fresh copy but the dicts are shared; nodes only read them.
+    """
+    if DEV_RELOAD:
+        return [sq.model_dump() for sq in load_subquestions_from_templates()]
+    return list(_SUBQUESTIONS)
 
-# =============================================================================
-# Main Graph Nodes
-# =============================================================================
 
 def _extract_company_name(messages: list) -> str:
     """Extract company name from the last human message."""
@@ -323,53 +323,80 @@ async def prepare_research(
     top_domain = (state.get("top_domain") or "").strip()
     summary_long = (state.get("summary_long") or "").strip()
     
-    subquestions = load_subquestions_from_templates()
+    subquestions = _get_subquestions()
 
     return {
         "company_name": company_name,
         "top_domain": top_domain,
         "summary_long": summary_long,
-        "subquestions": {"type": "override", "value": [sq.model_dump() for sq in subquestions]},
+        "subquestions": {"type": "override", "value": subquestions},
         "completed_answers": {"type": "override", "value": []},
         "messages": [AIMessage(content=f"Starting DSA research for: {company_name}\n\nResearching {len(subquestions)} questions with parallel agents...")]
     }
 
 
-def dispatch_research(state: CompanyResearchState) -> List[Send]:
-    """Map step: dispatch a research subgraph for each question."""
+async def research_all(
+    state: CompanyResearchState, config: RunnableConfig | None = None
+) -> dict:
+    """Node 2: research every sub-question concurrently and collect the answers.
+
+    Runs `research_question` once per sub-question concurrently, bounded by
+    `max_concurrent_research`; the first failure cancels the rest. Answers keep
+    the sub-question order. With
+    BATCH_SUMMARIES the loops run first and `summarize_batch` answers them together.
+    """
+    cfg = Configuration.from_runnable_config(config) if config else Configuration()
     subquestions = state.get("subquestions", [])
     company_name = state.get("company_name", "Unknown")
     top_domain = (state.get("top_domain") or "").strip() or None
     summary_long = (state.get("summary_long") or "").strip() or None
-    
-    return [
-        Send(
-            "research_question",
-            {
-                "question": sq["question"],
-                "section": sq["section"],
-                "prompt_template": sq.get("template_name") or f"questions/q{i:02d}.jinja",
-                "company_name": company_name,
-                "top_domain": top_domain,
-                "summary_long": summary_long,
-                "messages": [],
-                "iterations": 0  # Initialize iteration counter
-            }
-        )
-        for i, sq in enumerate(subquestions)
-    ]
+    semaphore = asyncio.Semaphore(max(1, cfg.max_concurrent_research))
+    credentials = _resolve_credentials(cfg, config)
+
+    # In batch mode each sub-question only runs its research loop here.
+    run = _run_research_loop if BATCH_SUMMARIES else research_question
+
+    async def research_one(i: int, sq: dict) -> dict:
+        async with semaphore:
+            return await run(
+                {
+                    "question": sq["question"],
+                    "section": sq["section"],
+                    "prompt_template": sq.get("template_name") or f"questions/q{i:02d}.jinja",
+                    "company_name": company_name,
+                    "top_domain": top_domain,
+                    "summary_long": summary_long,
+                    "messages": [],
+                    "iterations": 0,  # Initialize iteration counter
+                    **credentials,
+                },
+                config,
+            )
+
+    tasks = [asyncio.ensure_future(research_one(i, sq)) for i, sq in enumerate(subquestions)]
+    try:
+        answers = await asyncio.gather(*tasks)
+    except BaseException:
+        # One failed sub-question fails the node; stop the others instead of letting
+        # them keep spending LLM and search calls, and wait for them to unwind.
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+    if BATCH_SUMMARIES:
+        answers = await summarize_batch(list(answers), config)
+    return {"completed_answers": {"type": "override", "value": list(answers)}}
 
 
 async def finalize_report(
     state: CompanyResearchState, config: RunnableConfig | None = None
 ) -> dict:
     """Node 3: Compile all answers into final JSON report."""
-    answers = [SubQuestionAnswer(**a) for a in state.get("completed_answers", [])]
+    completed_answers = state.get("completed_answers", [])
     company_name = state.get("company_name", "Unknown")
 
-    result = CompanyResearchResult(
-        company_name=company_name,
-        answers=answers,
+    result = _RESULT_ADAPTER.validate_python(
+        {"company_name": company_name, "answers": completed_answers}
     )
     json_payload = result.to_json()
 
@@ -379,186 +406,132 @@ async def finalize_report(
     }
 
 
-# Wrapper to format subgraph output for the main state
-def format_subgraph_output(state: QuestionResearchState) -> dict:
-    """Take the final state of the subgraph and format it for the main graph reducer."""
-    # We need to reconstruct the SubQuestionAnswer from the subgraph state
-    # But wait, `summarize_research` created it but didn't return it in a way we can easily grab?
-    # Let's modify `summarize_research` to put the dictionary in a specific key.
-    
-    # Actually, better pattern: `summarize_research` returns a dict that *looks* like a partial update for the main state?
-    # No, the subgraph state is isolated.
-    # We need to bridge the gap.
-    
-    # Let's parse the `research_summary` or `messages` to rebuild the answer object?
-    # Or just have `summarize_research` return a special key "answer_dict" in the subgraph state.
-    pass # Implemented below in graph construction
-
-
-async def research_summarizer_wrapper(state: QuestionResearchState, config: RunnableConfig | None = None):
-    """Last node of subgraph: generates summary AND formats it for parent state."""
-    # Run the summarization logic
-    res = await summarize_research(state, config)
-    
-    # Re-extract the structured answer from the logic (duplicated for now, or refactor)
-    # To avoid duplication, let's look at `summarize_research` again.
-    # It builds `result_obj`. We should store `result_obj.model_dump()` in the state.
-    
-    # Hack: Let's make `summarize_research` return `{"completed_answers": [result_obj.model_dump()]}`?
-    # If the subgraph state has `completed_answers` (local), it works.
-    # But `QuestionResearchState` doesn't have it.
-    # Let's add it to `QuestionResearchState`? No, it's specific to the parent.
-    
-    # We will modify `summarize_research` to return the dict directly, 
-    # and we will use a "Write" node at the end of subgraph to output to parent?
-    # LangGraph `Send` outputs are merged to parent state if the node definition matches?
-    # No, `Send` invokes a node/graph. The return value of that invocation is merged.
-    # If the invocation is a Graph, the return value is the final state of that Graph.
-    # So `QuestionResearchState` needs to contain the data we want to bubble up.
-    # But `QuestionResearchState` fields (question, section, etc) might clash or not match `CompanyResearchState`.
-    
-    # Solution: The output of the subgraph is `QuestionResearchState`.
-    # The parent `CompanyResearchState` has `completed_answers`.
-    # We need a way to map `QuestionResearchState` -> `CompanyResearchState` update.
-    # This is usually done by ensuring the subgraph state has the same key, OR by using a wrapper node in the main graph that calls the subgraph.
-    # But `Send` goes directly to the node/graph.
-    
-    # Best way: Add `completed_answers` to `QuestionResearchState`.
-    # The subgraph writes to it. 
-    # When subgraph finishes, it returns `QuestionResearchState`.
-    # The parent merges this. Since `completed_answers` matches, it gets appended.
-    # `question` and `section` in `QuestionResearchState` might overwrite parent? 
-    # `CompanyResearchState` doesn't have `question` (scalar), it has `subquestions` (list). So no clash.
-    pass
-
 # =============================================================================
-# Graph Construction
+# Single Question Research Loop
 # =============================================================================
 
 def should_continue_with_tools(state: QuestionResearchState, config: RunnableConfig | None = None) -> Literal["tools", "summarize"]:
     """Conditional function that enforces iteration limit before allowing tool calls."""
-    cfg = Configuration.from_runnable_config(config) if config else Configuration()
-    iterations = state.get("iterations", 0)
-    max_iterations = cfg.max_research_iterations
-    
     # Get the last message to check if agent wants to call tools
-    messages = state.get("messages", [])
+    messages = state.get("messages")
     if not messages:
         return "summarize"
     
     last_message = messages[-1]
     
+    # Default to summarize if we can't determine
+    if not isinstance(last_message, AIMessage):
+        return "summarize"
+    
     # If agent called finish_research or no tool calls, go to summarize
-    if isinstance(last_message, AIMessage):
-        if not last_message.tool_calls:
-            return "summarize"
-        # Check if all tool calls are finish_research
-        if all(tc.get("name") == "finish_research" for tc in last_message.tool_calls):
-            return "summarize"
-        # If we've exceeded max iterations, force summarize
-        if iterations >= max_iterations:
+    tool_calls = last_message.tool_calls
+    if not tool_calls:
+        return "summarize"
+    if len(tool_calls) == 1:
+        # The usual case: a single web_search or finish_research call
+        if tool_calls[0].get("name") == "finish_research":
             return "summarize"
-        # Otherwise allow tools
-        return "tools"
+    elif all(tc.get("name") == "finish_research" for tc in tool_calls):
+        return "summarize"
     
-    # Default to summarize if we can't determine
-    return "summarize"
+    # If we've exceeded max iterations, force summarize
+    cfg = Configuration.from_runnable_config(config) if config else Configuration()
+    if state.get("iterations", 0) >= cfg.max_research_iterations:
+        return "summarize"
+    # Otherwise allow tools
+    return "tools"
+
+
+_RESEARCH_TOOLS = {t.name: t for t in get_research_tools()}
+
+
+async def _run_tool_call(tool_call: dict, config: RunnableConfig | None) -> ToolMessage:
+    """Invoke one tool call, turning failures into an error ToolMessage like ToolNode does."""
+    tool = _RESEARCH_TOOLS.get(tool_call["name"])
+    try:
+        if tool is None:
+            raise ValueError(f"Unknown tool: {tool_call['name']}")
+        return await tool.ainvoke({**tool_call, "type": "tool_call"}, config)
+    except Exception as e:
+        return ToolMessage(
+            content=f"Error: {e!r}\n Please fix your mistakes.",
+            name=tool_call["name"],
+            tool_call_id=tool_call["id"],
+            status="error",
+        )
 
 
 async def tools_with_iteration_counter(
     state: QuestionResearchState, config: RunnableConfig | None = None
 ) -> dict:
-    """Wrapper around ToolNode that increments iteration counter."""
-    tools = get_research_tools()
-    tool_node = ToolNode(tools)
-    
-    # Execute tools
-    result = await tool_node.ainvoke(state, config)
-    
-    # Increment iteration counter
-    current_iterations = state.get("iterations", 0)
-    
+    """Run the agent's tool calls concurrently and increment the iteration counter.
+
+    Messages come back in tool-call order to keep the next prompt deterministic.
+    """
+    tool_calls = state["messages"][-1].tool_calls
+    results = await asyncio.gather(*(_run_tool_call(tc, config) for tc in tool_calls))
+
     return {
-        **result,
-        "iterations": current_iterations + 1
+        "messages": list(results),
+        "iterations": state.get("iterations", 0) + 1,
     }
 
 
-# 1. Build Subgraph
-sub_builder = StateGraph(QuestionResearchState)
-sub_builder.add_node("agent", research_agent)
-sub_builder.add_node("tools", tools_with_iteration_counter)
-
-# We need a specialized summarizer that outputs `completed_answers`
-async def summarize_and_format(state: QuestionResearchState, config: RunnableConfig | None = None) -> dict:
-    # Run summarization (reuse logic from above, but we need the actual object)
-    # Copy-paste logic for safety and modification
-    messages = state.get("messages", [])
-    trace_parts = []
+def _build_trace(messages: list, max_chars: int | None = None) -> str:
+    """Join the research messages into the trace the summarizer reads."""
+    if max_chars is None:
+        max_chars = MAX_TRACE_CHARS
+    # Only the first max_chars of the trace reach the summarizer prompt, so write
+    # the "\n\n"-separated parts into one buffer and stop once the budget is used up.
+    trace = io.StringIO()
+    trace_len = 0
     final_summary_tool_arg = ""
     for msg in messages:
-        if isinstance(msg, (AIMessage, ToolMessage)):
-            trace_parts.append(str(msg.content))
-            if isinstance(msg, AIMessage) and msg.tool_calls:
+        # Dispatch on the message type tag rather than isinstance checks.
+        msg_type = getattr(msg, "type", None)
+        if msg_type in _TRACE_MESSAGE_TYPES:
+            if trace_len < max_chars:
+                if trace_len:
+                    trace.write("\n\n")
+                    trace_len += 2
+                part = str(msg.content)[: max(0, max_chars - trace_len)]
+                trace.write(part)
+                trace_len += len(part)
+            if msg_type == "ai" and msg.tool_calls:
                  for tc in msg.tool_calls:
                      if tc["name"] == "finish_research":
                          final_summary_tool_arg = tc["args"].get("summary", "")
-        elif isinstance(msg, HumanMessage):
-             trace_parts.append(str(msg.content))
 
-    raw_output = "\n\n".join(trace_parts)
     if final_summary_tool_arg:
-        raw_output += f"\n\nFINAL AGENT SUMMARY: {final_summary_tool_arg}"
+        trace.write(f"\n\nFINAL AGENT SUMMARY: {final_summary_tool_arg}")
+    return trace.getvalue()
 
-    cfg = Configuration.from_runnable_config(config) if config else Configuration()
-    # ... (Model setup same as above) ...
+
+def _get_summarization_model(
+    state: QuestionResearchState, cfg: Configuration, config: RunnableConfig | None, max_tokens: int
+) -> ChatOpenAI:
+    """Return the summarization model, using the credentials resolved by research_all."""
     model_name = cfg.summarization_model.replace("openai:", "") if cfg.summarization_model.startswith("openai:") else cfg.summarization_model
-    api_key = get_api_key_for_model(cfg.summarization_model, config)
-    base_url = None
-    if config:
-        api_keys = config.get("configurable", {}).get("apiKeys", {})
-        base_url = api_keys.get("OPENAI_BASE_URL") or os.getenv("OPENAI_BASE_URL")
+    if "summarization_api_key" in state:
+        api_key, base_url = state["summarization_api_key"], state["base_url"]
     else:
-        base_url = os.getenv("OPENAI_BASE_URL")
-    
-    model = ChatOpenAI(model=model_name, api_key=api_key, base_url=base_url, max_tokens=500)
-    
-    prompt = load_prompt(
-        "summarize.jinja",
-        company_name=state["company_name"],
-        top_domain=state.get("top_domain"),
-        summary_long=state.get("summary_long"),
-        question=state["question"],
-        raw_output=raw_output[:400000],
-    )
-    
-    try:
-        response = await model.ainvoke([HumanMessage(content=prompt)])
-        response_text = str(response.content)
-    except Exception as e:
-        response_text = f"Error: {e}"
+        api_key = get_api_key_for_model(cfg.summarization_model, config)
+        base_url = _get_base_url(config)
+    return _get_chat_model(model_name, api_key, base_url, max_tokens)
 
-    # Parse (simplified)
-    answer = "Unable to determine"
-    source = "Unknown"
-    confidence = "Low"
+
+def _format_answer(state: QuestionResearchState, fields: dict[str, str], raw_output: str) -> dict:
+    """Normalize the parsed summarizer fields into a SubQuestionAnswer dict."""
+    answer = fields.get("ANSWER", "Unable to determine")
+    source = fields.get("SOURCE", "Unknown")
+    confidence = fields.get("CONFIDENCE", "Low")
     information_found: bool | None = None
-    for line in response_text.split('\n'):
-        line_clean = line.strip()
-        upper = line_clean.upper()
-        if upper.startswith("INFORMATION_FOUND:"):
-            raw_val = line_clean.split(":", 1)[1].strip() if ":" in line_clean else ""
-            norm = re.sub(r"[\s_\-]+", "", raw_val.lower())
-            if norm in {"yes", "y", "true", "1", "found"}:
-                information_found = True
-            elif norm in {"no", "n", "false", "0", "notfound"}:
-                information_found = False
-        elif upper.startswith("ANSWER:"):
-            answer = line_clean.split(":", 1)[1].strip() if ":" in line_clean else answer
-        elif upper.startswith("SOURCE:"):
-            source = line_clean.split(":", 1)[1].strip() if ":" in line_clean else source
-        elif upper.startswith("CONFIDENCE:"):
-            confidence = line_clean.split(":", 1)[1].strip() if ":" in line_clean else confidence
+    if "INFORMATION_FOUND" in fields:
+        norm = re.sub(r"[\s_\-]+", "", fields["INFORMATION_FOUND"].lower())
+        if norm in {"yes", "y", "true", "1", "found"}:
+            information_found = True
+        elif norm in {"no", "n", "false", "0", "notfound"}:
+            information_found = False
 
     # Backward compatible fallback if the new field isn't present.
     if information_found is None:
@@ -574,37 +547,143 @@ async def summarize_and_format(state: QuestionResearchState, config: RunnableCon
     if information_found is True and (not source or source.strip().lower() in {"unknown", "n/a", "na", "none"}):
         source = _infer_source_domain(raw_output, state.get("top_domain"))
 
-    result = SubQuestionAnswer(
-        section=state["section"],
+    # Same keys and order as SubQuestionAnswer.model_dump(); finalize_report
+    # validates the collected answers.
+    return {
+        "section": state["section"],
+        "question": state["question"],
+        "answer": answer,
+        "information_found": information_found,
+        "source": source,
+        "confidence": confidence,
+        "raw_research": raw_output[:RAW_RESEARCH_MAX_CHARS] if RAW_RESEARCH_MAX_CHARS else raw_output,
+    }
+
+
+async def summarize_and_format(state: QuestionResearchState, config: RunnableConfig | None = None) -> dict:
+    """Summarize the research trace into a SubQuestionAnswer dict."""
+    raw_output = _build_trace(state.get("messages", []))
+
+    cfg = Configuration.from_runnable_config(config) if config else Configuration()
+    model = _get_summarization_model(state, cfg, config, 500)
+    
+    # Static instructions first (an identical prefix for provider prompt caching),
+    # then the per-question context with the volatile research output last.
+    system_prompt = load_prompt("summarize_system.jinja")
+    prompt = load_prompt(
+        "summarize.jinja",
+        company_name=state["company_name"],
+        top_domain=state.get("top_domain"),
+        summary_long=state.get("summary_long"),
         question=state["question"],
-        answer=answer,
-        information_found=information_found,
-        source=source,
-        confidence=confidence,
-        raw_research=raw_output,
+        raw_output=raw_output,
     )
     
-    # Return formatted for parent merge
-    return {
-        "research_summary": response_text,
-        "completed_answers": [result.model_dump()]  # This key must exist in parent state
-    }
+    # Read the stream to the end: stopping early would close the model's run as
+    # an error in callbacks/tracing and drop its usage metadata, for a few tokens.
+    response_text = ""
+    try:
+        async with _get_llm_semaphore(cfg.max_parallel_llm_calls):
+            async for chunk in model.astream(
+                [SystemMessage(content=system_prompt), HumanMessage(content=prompt)]
+            ):
+                response_text += str(chunk.content)
+    except Exception as e:
+        logger.warning("Summarizing %r failed: %s", state["question"], e)
+        # Only lines that completed before the failure can be trusted.
+        response_text = response_text[: response_text.rfind("\n") + 1]
+    fields = _parse_summary_fields(response_text)
 
-sub_builder.add_node("summarize", summarize_and_format)
+    return _format_answer(state, fields, raw_output)
 
-sub_builder.add_edge(START, "agent")
-sub_builder.add_conditional_edges(
-    "agent", 
-    should_continue_with_tools, 
-    {"tools": "tools", "summarize": "summarize"}
-)
-sub_builder.add_edge("tools", "agent")
-sub_builder.add_edge("summarize", END)
 
-research_subgraph = sub_builder.compile()
+async def summarize_batch(
+    states: list[QuestionResearchState], config: RunnableConfig | None = None
+) -> list[dict]:
+    """Summarize every sub-question's research trace in a single LLM call.
+
+    Used when BATCH_SUMMARIES is set. The traces share one MAX_TRACE_CHARS budget,
+    and the model returns a JSON object with one answer per task, in task order.
+    Tasks the model leaves out fall back to the same defaults as a failed call.
+    """
+    if not states:
+        return []
+    raw_outputs = [
+        _build_trace(s.get("messages", []), MAX_TRACE_CHARS // len(states)) for s in states
+    ]
+
+    cfg = Configuration.from_runnable_config(config) if config else Configuration()
+    model = _get_summarization_model(states[0], cfg, config, 200 * len(states))
+    first = states[0]
+    prompt = load_prompt(
+        "summarize_batch.jinja",
+        company_name=first["company_name"],
+        top_domain=first.get("top_domain"),
+        summary_long=first.get("summary_long"),
+        tasks=[{"question": s["question"], "raw_output": raw} for s, raw in zip(states, raw_outputs)],
+    )
+
+    try:
+        async with _get_llm_semaphore(cfg.max_parallel_llm_calls):
+            response = await model.ainvoke(
+                [HumanMessage(content=prompt)],
+                response_format={"type": "json_object"},
+            )
+        payload = orjson.loads(str(response.content))
+    except Exception:
+        # Failed call or invalid JSON.
+        payload = None
+
+    # Anything other than {"answers": [...]} counts as no answers; a short list
+    # leaves the remaining tasks with the defaults.
+    items = payload.get("answers") if isinstance(payload, dict) else None
+    if not isinstance(items, list):
+        items = []
+
+    answers = []
+    for i, (state, raw_output) in enumerate(zip(states, raw_outputs)):
+        item = items[i] if i < len(items) and isinstance(items[i], dict) else {}
+        fields = {
+            key.upper(): str(value)
+            for key, value in item.items()
+            if key.upper() in _SUMMARY_FIELDS and value is not None
+        }
+        answers.append(_format_answer(state, fields, raw_output))
+    return answers
 
 
-# 2. Build Main Graph
+async def _run_research_loop(
+    state: QuestionResearchState, config: RunnableConfig | None = None
+) -> QuestionResearchState:
+    """Run the agent/tools loop for one sub-question and return its final state."""
+    state = dict(state)
+    while True:
+        update = await research_agent(state, config)
+        state["messages"] = [*state["messages"], *update["messages"]]
+        if should_continue_with_tools(state, config) == "summarize":
+            break
+        update = await tools_with_iteration_counter(state, config)
+        state["messages"] = [*state["messages"], *update["messages"]]
+        state["iterations"] = update["iterations"]
+    return state
+
+
+async def research_question(
+    state: QuestionResearchState, config: RunnableConfig | None = None
+) -> dict:
+    """Research a single sub-question: agent/tools loop, then summarize.
+
+    A plain coroutine rather than a compiled subgraph, so the 17 parallel runs
+    skip per-step state validation and channel merging. Tool and model calls
+    still receive `config`, so their events stream as before.
+    """
+    return await summarize_and_format(await _run_research_loop(state, config), config)
+
+
+# =============================================================================
+# Graph Construction
+# =============================================================================
+
 _builder = StateGraph(
     CompanyResearchState,
     input=CompanyResearchInputState,
@@ -612,21 +691,12 @@ _builder = StateGraph(
 )
 
 _builder.add_node("prepare_research", prepare_research)
-# Add the compiled subgraph as a node
-_builder.add_node("research_question", research_subgraph)
+_builder.add_node("research_all", research_all)
 _builder.add_node("finalize_report", finalize_report)
 
 _builder.add_edge(START, "prepare_research")
-# Use Send to fan out
-_builder.add_conditional_edges("prepare_research", dispatch_research, ["research_question"])
-# Fan in: After research_question completes (all branches), go to finalize
-# Note: In current LangGraph, parallel branches join at the next step automatically if configured?
-# Actually, Send creates a map-reduce. We need a way to collect.
-# The `finalize_report` should be the destination.
-# However, `dispatch_research` returns `Send`. The destination is `research_question`.
-# Where does `research_question` go?
-# We need to wire `research_question` to `finalize_report`.
-_builder.add_edge("research_question", "finalize_report")
+_builder.add_edge("prepare_research", "research_all")
+_builder.add_edge("research_all", "finalize_report")
 _builder.add_edge("finalize_report", END)
 
 # Export
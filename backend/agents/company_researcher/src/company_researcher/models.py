@@ -3,7 +3,8 @@
 from datetime import datetime
 from typing import List
 
-from pydantic import BaseModel, Field
+import orjson
+from pydantic import BaseModel, ConfigDict, Field
 
 
 class SubQuestion(BaseModel):
@@ -50,6 +51,9 @@ Be concise and factual."""
 class SubQuestionAnswer(BaseModel):
     """Answer to a single sub-question."""
 
+    # Answers are immutable once summarized; freezing also skips assignment validation.
+    model_config = ConfigDict(frozen=True, extra="ignore")
+
     section: str
     question: str
     answer: str
@@ -68,6 +72,10 @@ class CompanyResearchResult(BaseModel):
     generated_at: datetime = Field(default_factory=datetime.utcnow)
     answers: List[SubQuestionAnswer]
 
-    def to_json(self, *, indent: int = 2) -> str:
-        return self.model_dump_json(indent=indent)
+    def to_json(self, *, indent: int | None = 2) -> str:
+        # orjson can only do compact or 2-space output; pydantic handles any other indent.
+        if indent not in (None, 2):
+            return self.model_dump_json(indent=indent)
+        option = orjson.OPT_INDENT_2 if indent == 2 else 0
+        return orjson.dumps(self.model_dump(), option=option).decode()
 
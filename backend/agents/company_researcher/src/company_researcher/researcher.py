@@ -4,6 +4,7 @@ from __future__ import annotations
 
 import asyncio
 import os
+from functools import lru_cache
 from pathlib import Path
 from typing import List
 
@@ -30,17 +31,19 @@ from tools import tavily_search_tool
 
 PROMPTS_DIR = Path(__file__).resolve().parent / "prompts"
 
+# Prompts ship with the package: no mtime checks, and never evict compiled templates.
 _jinja_env = Environment(
     loader=FileSystemLoader(str(PROMPTS_DIR)),
     trim_blocks=True,
     lstrip_blocks=True,
+    auto_reload=False,
+    cache_size=-1,
 )
 
 
 def load_prompt(template_name: str, **kwargs) -> str:
     """Load and render a Jinja2 prompt template."""
-    template = _jinja_env.get_template(template_name)
-    return template.render(**kwargs)
+    return _jinja_env.get_template(template_name).render(**kwargs)
 
 
 # =============================================================================
@@ -68,8 +71,18 @@ async def web_search(queries: List[str], config: RunnableConfig) -> str:
     if max_queries <= 0:
         max_queries = 1
     
-    # Truncate queries to the limit - only process first max_queries queries
-    limited_queries = queries[:max_queries]
+    # Take the first max_queries distinct queries; case and whitespace variants
+    # of one query would otherwise each cost a Tavily request.
+    limited_queries: List[str] = []
+    seen: set[str] = set()
+    for query in queries:
+        key = " ".join(query.lower().split())
+        if not key or key in seen:
+            continue
+        seen.add(key)
+        limited_queries.append(query)
+        if len(limited_queries) >= max_queries:
+            break
     
     return await tavily_search_tool(
         queries=limited_queries,
@@ -91,5 +104,7 @@ def finish_research(summary: str) -> str:
     return f"Research complete: {summary}"
 
 
-def get_research_tools():
-    return [web_search, finish_research]
+@lru_cache(maxsize=1)
+def get_research_tools() -> tuple:
+    """Return the research tools (a shared, immutable tuple)."""
+    return (web_search, finish_research)
@@ -8,7 +8,10 @@ from pydantic import BaseModel, Field
 
 def override_reducer(current_value, new_value):
     """Reducer that allows overriding values via {"type": "override", "value": ...}."""
-    if isinstance(new_value, dict) and new_value.get("type") == "override":
+    # Fast path: a plain list appended to the list the channel already holds.
+    if type(new_value) is list and current_value is not None:
+        return current_value + new_value
+    if type(new_value) is dict and new_value.get("type") == "override":
         return new_value.get("value", new_value)
     if current_value is None:
         current_value = []
@@ -38,7 +41,7 @@ class CompanyResearchState(MessagesState):
 
 
 class QuestionResearchState(MessagesState):
-    """State for a single question research subgraph."""
+    """State for researching a single sub-question."""
     
     question: str
     section: str
@@ -47,6 +50,9 @@ class QuestionResearchState(MessagesState):
     summary_long: Optional[str] = None
     # Each sub-question agent loads a dedicated prompt template
     prompt_template: str
-    research_summary: Optional[str] = None
-    completed_answers: List[dict] = []
     iterations: int = 0  # Track number of tool-calling iterations to enforce limits
+    # Resolved once by research_all; kept out of the graph-level state so keys
+    # never reach checkpoints or streamed node outputs.
+    research_api_key: Optional[str] = None
+    summarization_api_key: Optional[str] = None
+    base_url: Optional[str] = None
@@ -6,6 +6,7 @@ ReAct agent with web search and DSA knowledge base retrieval.
 from __future__ import annotations
 
 import os
+from functools import lru_cache
 from pathlib import Path
 from typing import Literal
 
@@ -27,17 +28,19 @@ from main_agent.tools import get_all_tools
 
 PROMPTS_DIR = Path(__file__).resolve().parent / "prompts"
 
+# Prompts ship with the package: no mtime checks, and never evict compiled templates.
 _jinja_env = Environment(
     loader=FileSystemLoader(str(PROMPTS_DIR)),
     trim_blocks=True,
     lstrip_blocks=True,
+    auto_reload=False,
+    cache_size=-1,
 )
 
 
 def load_prompt(template_name: str, **kwargs) -> str:
     """Load and render a Jinja2 prompt template."""
-    template = _jinja_env.get_template(template_name)
-    return template.render(**kwargs)
+    return _jinja_env.get_template(template_name).render(**kwargs)
 
 
 # =============================================================================
@@ -57,29 +60,32 @@ def _get_api_credentials(config: RunnableConfig | None):
     return api_key, base_url
 
 
-# =============================================================================
-# Graph Nodes
-# =============================================================================
+@lru_cache(maxsize=16)
+def _get_bound_model(api_key: str | None, base_url: str | None, max_tokens: int):
+    """Return the tool-bound chat model, reused across turns with the same settings.
 
-async def agent(state: MainAgentState, config: RunnableConfig | None = None) -> dict:
-    """Main ReAct agent node."""
-    cfg = Configuration.from_runnable_config(config) if config else Configuration()
-    api_key, base_url = _get_api_credentials(config)
-    
-    # Build model params, only including non-None values
+    Keeps the HTTP connection pool warm between turns and binds the tool schemas once.
+    """
     model_params = {
         "model": "deepseek-chat",
-        "max_tokens": cfg.max_tokens,
+        "max_tokens": max_tokens,
     }
     if api_key:
         model_params["api_key"] = api_key
     if base_url:
         model_params["base_url"] = base_url
-    
-    model = ChatOpenAI(**model_params)
-    
-    tools = get_all_tools()
-    model_with_tools = model.bind_tools(tools)
+    return ChatOpenAI(**model_params).bind_tools(get_all_tools())
+
+
+# =============================================================================
+# Graph Nodes
+# =============================================================================
+
+async def agent(state: MainAgentState, config: RunnableConfig | None = None) -> dict:
+    """Main ReAct agent node."""
+    cfg = Configuration.from_runnable_config(config) if config else Configuration()
+    api_key, base_url = _get_api_credentials(config)
+    model_with_tools = _get_bound_model(api_key, base_url, cfg.max_tokens)
     
     # Build context from frontend state
     context = ""
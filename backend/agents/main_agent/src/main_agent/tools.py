@@ -18,10 +18,14 @@ sys.path.insert(0, str(backend_path))
 
 from tools import tavily_search_tool
 
+# Anything longer isn't a question about the DSA; refuse it before it costs an
+# embedding call or takes up a retrieval cache entry.
+MAX_DSA_QUERY_CHARS = 2048
+
 
 def get_dsa_retriever(config: Optional[RunnableConfig] = None):
-    """Initialize and return the DSA retriever."""
-    from knowledge_base.retriever import DSARetriever
+    """Return the shared DSA retriever for the configured credentials."""
+    from knowledge_base.retriever import get_retriever
     
     qdrant_url = os.getenv("QDRANT_URL")
     qdrant_api_key = os.getenv("QDRANT_API_KEY")
@@ -35,7 +39,7 @@ def get_dsa_retriever(config: Optional[RunnableConfig] = None):
         openai_api_key = api_keys.get("OPENAI_EMBEDDING_API_KEY") or openai_api_key
     
     try:
-        return DSARetriever(
+        return get_retriever(
             qdrant_url=qdrant_url,
             qdrant_api_key=qdrant_api_key,
             openai_api_key=openai_api_key,
@@ -43,7 +47,7 @@ def get_dsa_retriever(config: Optional[RunnableConfig] = None):
     except TypeError as e:
         if "proxies" in str(e):
             # Fallback: try without explicit api_key if proxies is causing issues
-            return DSARetriever(
+            return get_retriever(
                 qdrant_url=qdrant_url,
                 qdrant_api_key=qdrant_api_key,
             )
@@ -64,11 +68,26 @@ async def web_search(queries: List[str], config: RunnableConfig = None) -> str:
     )
 
 
+def _format_dsa_results(query: str, results: list[dict]) -> str:
+    """Format retriever hits for one query as tool output."""
+    if not results:
+        return f"No DSA content found for: '{query}'"
+    
+    formatted = f"DSA Results for: '{query}'\n{'=' * 50}\n\n"
+    for i, r in enumerate(results, 1):
+        formatted += f"**{i}. {r.get('title', 'Untitled')}**\n"
+        if r.get("category"):
+            formatted += f"   Applies to: {r['category']}\n"
+        formatted += f"\n{r.get('content', '')}\n\n---\n\n"
+    return formatted
+
+
 @tool
-def retrieve_dsa_knowledge(
+async def retrieve_dsa_knowledge(
     query: str,
     category: Optional[str] = None,
     limit: int = 5,
+    related_queries: Optional[List[str]] = None,
     config: RunnableConfig = None,
 ) -> str:
     """Retrieve relevant information from the DSA legal knowledge base.
@@ -76,31 +95,29 @@ def retrieve_dsa_knowledge(
     Args:
         query: Natural language query about DSA content
         category: Optional filter: "Intermediary Service", "Hosting Service", "Online Platform", "VLOP/VLOSE"
-        limit: Maximum results (default 5)
+        limit: Maximum results per query (default 5)
+        related_queries: Optional further queries (max 2) to look up in the same call
     """
+    queries = [query, *(related_queries or [])[:2]]
+    if any(not q.strip() or len(q) > MAX_DSA_QUERY_CHARS for q in queries):
+        return f"Error: DSA queries must be between 1 and {MAX_DSA_QUERY_CHARS} characters."
+    
     try:
         retriever = get_dsa_retriever(config)
         
-        if not retriever.is_ready():
+        if not await retriever.ais_ready():
             return "Error: DSA knowledge base not initialized."
         
-        results = retriever.get_dsa_context(
-            query=query,
-            limit=min(limit, 10),
-            category=category if category and category != "all" else None,
-        )
-        
-        if not results:
-            return f"No DSA content found for: '{query}'"
+        limit = max(1, min(limit, 10))
+        category = category if category and category != "all" else None
         
-        formatted = f"DSA Results for: '{query}'\n{'=' * 50}\n\n"
-        for i, r in enumerate(results, 1):
-            formatted += f"**{i}. {r.get('title', 'Untitled')}**\n"
-            if r.get("category"):
-                formatted += f"   Applies to: {r['category']}\n"
-            formatted += f"\n{r.get('content', '')}\n\n---\n\n"
+        if len(queries) == 1:
+            results = await retriever.aget_dsa_context(query=query, limit=limit, category=category)
+            return _format_dsa_results(query, results)
         
-        return formatted
+        # Several lookups share one embedding call and one Qdrant round-trip.
+        batches = await retriever.aget_dsa_context_batch(queries, limit=limit, category=category)
+        return "\n".join(_format_dsa_results(q, results) for q, results in zip(queries, batches))
         
     except Exception as e:
         return f"Error retrieving DSA knowledge: {str(e)[:200]}"
@@ -5,8 +5,10 @@ from __future__ import annotations
 import asyncio
 import json
 import os
+from functools import lru_cache
 from pathlib import Path
 
+import orjson
 from jinja2 import Environment, FileSystemLoader
 from langchain_core.messages import AIMessage, HumanMessage
 from langchain_core.runnables import RunnableConfig
@@ -25,17 +27,19 @@ from service_categorizer.state import ServiceCategorizerInputState, ServiceCateg
 
 PROMPTS_DIR = Path(__file__).resolve().parent / "prompts"
 
+# Prompts ship with the package: no mtime checks, and never evict compiled templates.
 _jinja_env = Environment(
     loader=FileSystemLoader(str(PROMPTS_DIR)),
     trim_blocks=True,
     lstrip_blocks=True,
+    auto_reload=False,
+    cache_size=-1,
 )
 
 
 def load_prompt(template_name: str, **kwargs) -> str:
     """Load and render a Jinja2 prompt template."""
-    template = _jinja_env.get_template(template_name)
-    return template.render(**kwargs)
+    return _jinja_env.get_template(template_name).render(**kwargs)
 
 
 def _get_model(config: RunnableConfig | None = None) -> ChatOpenAI:
@@ -50,6 +54,12 @@ def _get_model(config: RunnableConfig | None = None) -> ChatOpenAI:
         api_key = os.getenv("OPENAI_API_KEY")
         base_url = os.getenv("OPENAI_BASE_URL")
     
+    return _build_model(api_key, base_url)
+
+
+@lru_cache(maxsize=8)
+def _build_model(api_key: str | None, base_url: str | None) -> ChatOpenAI:
+    """Build the LLM once per credentials so obligation fan-out shares one client."""
     return ChatOpenAI(
         model="deepseek-chat",
         api_key=api_key,
@@ -87,6 +97,13 @@ async def extract_profile(
     state: ServiceCategorizerState, config: RunnableConfig | None = None
 ) -> dict:
     """Extract company profile from input message."""
+    profile = state.get("company_profile")
+    if isinstance(profile, dict):
+        return {
+            "company_profile": profile,
+            "messages": [AIMessage(content=f"Analyzing company profile...")]
+        }
+    
     messages = state.get("messages", [])
     
     # Get the last human message as company profile
@@ -168,12 +185,14 @@ async def analyze_obligations(
     model = _get_model(config)
     company_name = profile.get("company_name", "Unknown Company")
     classification_summary = classification.get("summary", "")
+    # Same profile in every obligation prompt: serialize it once, not per obligation.
+    profile_json = json.dumps(profile, indent=2)
     
     async def analyze_one(obl: dict) -> dict:
         # Obligations now come with context and key_requirements from YAML
         prompt = load_prompt(
             "obligation.jinja",
-            company_profile=json.dumps(profile, indent=2),
+            company_profile=profile_json,
             company_name=company_name,
             obligation=obl,
             classification_summary=classification_summary,
@@ -234,7 +253,7 @@ async def generate_report(
         "summary": summary,
     }
     
-    final_json = json.dumps(report, indent=2)
+    final_json = orjson.dumps(report, option=orjson.OPT_INDENT_2).decode()
     
     return {
         "final_report": final_json,
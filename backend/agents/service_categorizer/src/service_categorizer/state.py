@@ -2,12 +2,14 @@
 from typing import Annotated, Any
 from langchain_core.messages import AnyMessage
 from langgraph.graph.message import add_messages
-from typing_extensions import TypedDict
+from typing_extensions import NotRequired, TypedDict
 
 
 class ServiceCategorizerInputState(TypedDict):
-    """Input state - just messages with company profile."""
+    """Input state - messages with company profile."""
     messages: Annotated[list[AnyMessage], add_messages]
+    # Already-parsed profile; when set, the message JSON isn't parsed again.
+    company_profile: NotRequired[dict[str, Any]]
 
 
 class ServiceCategorizerState(TypedDict):
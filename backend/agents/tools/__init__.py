@@ -1,6 +1,6 @@
 """Shared tools for agents."""
 
-from .tavily_tools import get_tavily_api_key, tavily_search_tool
+from .tavily_tools import close_clients, get_tavily_api_key, tavily_search_tool
 
-__all__ = ["get_tavily_api_key", "tavily_search_tool"]
+__all__ = ["close_clients", "get_tavily_api_key", "tavily_search_tool"]
 
@@ -1,16 +1,49 @@
-"""Redis cache for Tavily search results."""
+"""Redis cache for Tavily search results, fronted by a small in-process cache."""
 
+import asyncio
 import hashlib
-import json
 import os
+import time
+from collections import OrderedDict
 from typing import Optional
 
+import orjson
 import redis
 
 # TTL in seconds (6 hours)
 CACHE_TTL = 6 * 60 * 60
 
+# In-process layer: catches the overlapping queries issued by parallel research
+# branches without a Redis round-trip, and is the only cache when REDIS_URL is unset.
+LOCAL_CACHE_TTL = 10 * 60
+LOCAL_CACHE_MAX_ENTRIES = 2048
+
 _client: Optional[redis.Redis] = None
+_local: "OrderedDict[str, tuple[float, dict]]" = OrderedDict()
+
+
+def _local_get(key: str) -> Optional[dict]:
+    entry = _local.get(key)
+    if entry is None:
+        return None
+    expires_at, response = entry
+    if expires_at < time.monotonic():
+        del _local[key]
+        return None
+    _local.move_to_end(key)
+    return response
+
+
+def _local_set(key: str, response: dict) -> None:
+    _local[key] = (time.monotonic() + LOCAL_CACHE_TTL, response)
+    _local.move_to_end(key)
+    while len(_local) > LOCAL_CACHE_MAX_ENTRIES:
+        _local.popitem(last=False)
+
+
+def clear_local_cache() -> None:
+    """Drop every entry from the in-process cache."""
+    _local.clear()
 
 
 def get_redis_client() -> Optional[redis.Redis]:
@@ -39,16 +72,16 @@ def make_cache_key(query: str, max_results: int) -> str:
     return f"tavily:{h}"
 
 
-def get_cached(query: str, max_results: int) -> Optional[dict]:
-    """Get cached Tavily response if available."""
+def _redis_get(key: str) -> Optional[dict]:
+    """Read `key` from Redis; None when Redis is off, unreachable or the entry is missing."""
     client = get_redis_client()
     if not client:
         return None
 
     try:
-        data = client.get(make_cache_key(query, max_results))
+        data = client.get(key)
         if data:
-            return json.loads(data)
+            return orjson.loads(data)
     except Exception:
         # Redis can be restarted while the app is running; drop the client so we reconnect next call.
         global _client
@@ -56,15 +89,63 @@ def get_cached(query: str, max_results: int) -> Optional[dict]:
     return None
 
 
-def set_cached(query: str, max_results: int, response: dict) -> None:
-    """Cache a Tavily response."""
+def _redis_set(key: str, response: dict) -> None:
+    """Write `key` to Redis with the shared TTL, ignoring Redis errors."""
     client = get_redis_client()
     if not client:
         return
 
     try:
-        key = make_cache_key(query, max_results)
-        client.setex(key, CACHE_TTL, json.dumps(response))
+        client.setex(key, CACHE_TTL, orjson.dumps(response))
     except Exception:
         global _client
         _client = None
+
+
+def _redis_configured() -> bool:
+    return _client is not None or bool(os.getenv("REDIS_URL"))
+
+
+def get_cached(query: str, max_results: int) -> Optional[dict]:
+    """Get cached Tavily response if available."""
+    key = make_cache_key(query, max_results)
+    response = _local_get(key)
+    if response is not None:
+        return response
+
+    response = _redis_get(key)
+    if response is not None:
+        _local_set(key, response)
+    return response
+
+
+def set_cached(query: str, max_results: int, response: dict) -> None:
+    """Cache a Tavily response."""
+    key = make_cache_key(query, max_results)
+    _local_set(key, response)
+    _redis_set(key, response)
+
+
+# The redis client is blocking (connect + ping + round-trip), so from async code
+# its calls run in a worker thread. The in-process layer stays on the loop thread:
+# it is a dict lookup, and keeping it single-threaded avoids locking the LRU.
+
+async def aget_cached(query: str, max_results: int) -> Optional[dict]:
+    """Async version of get_cached; doesn't block the event loop on Redis."""
+    key = make_cache_key(query, max_results)
+    response = _local_get(key)
+    if response is not None or not _redis_configured():
+        return response
+
+    response = await asyncio.to_thread(_redis_get, key)
+    if response is not None:
+        _local_set(key, response)
+    return response
+
+
+async def aset_cached(query: str, max_results: int, response: dict) -> None:
+    """Async version of set_cached; doesn't block the event loop on Redis."""
+    key = make_cache_key(query, max_results)
+    _local_set(key, response)
+    if _redis_configured():
+        await asyncio.to_thread(_redis_set, key, response)
@@ -1,12 +1,56 @@
 """Tavily search tools for agents."""
 
+import asyncio
 import os
+import weakref
 from typing import List, Optional
 
 from langchain_core.runnables import RunnableConfig
 from tavily import AsyncTavilyClient
 
-from tools.cache import get_cached, set_cached
+from tools.cache import aget_cached, aset_cached, make_cache_key
+
+# Searches currently in flight per event loop, keyed like the cache, so parallel
+# research branches issuing the same query share one Tavily request instead of
+# racing to fill the cache. A task can only be awaited on its own loop.
+_inflight: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+# One Tavily client per event loop and API key, so searches reuse its pooled
+# keep-alive connections instead of opening a new HTTP client per call. httpx
+# connections belong to the loop that opened them, hence the per-loop split.
+_clients: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+
+def _get_client(api_key: str) -> AsyncTavilyClient:
+    """Return the shared Tavily client for this API key on the running loop."""
+    loop = asyncio.get_running_loop()
+    clients = _clients.get(loop)
+    if clients is None:
+        clients = _clients[loop] = {}
+    client = clients.get(api_key)
+    if client is None:
+        client = clients[api_key] = AsyncTavilyClient(api_key=api_key)
+    return client
+
+
+async def close_clients() -> None:
+    """Close the shared Tavily clients of the running loop (call at shutdown)."""
+    clients = _clients.pop(asyncio.get_running_loop(), {})
+    for client in clients.values():
+        close = getattr(client, "close", None)
+        if close is not None:
+            await close()
+
+
+def _finish_search(inflight: dict, task: asyncio.Future, key: str) -> None:
+    """Forget a finished search and mark its exception retrieved.
+
+    The task is only awaited through asyncio.shield, so if every caller was
+    cancelled a failure would otherwise be logged as never retrieved.
+    """
+    inflight.pop(key, None)
+    if not task.cancelled():
+        task.exception()
 
 
 def get_tavily_api_key(config: Optional[RunnableConfig] = None) -> Optional[str]:
@@ -25,45 +69,78 @@ async def tavily_search_tool(
     queries: List[str],
     max_results: int = 3,
     config: Optional[RunnableConfig] = None,
+    semaphore: Optional[asyncio.Semaphore] = None,
 ) -> str:
     """Execute Tavily search queries and return formatted results.
     
-    This is the main search function used by agents.
+    This is the main search function used by agents. Queries run concurrently;
+    pass a `semaphore` to cap how many are in flight at once. Results are
+    merged in query order.
     """
     api_key = get_tavily_api_key(config)
     if not api_key:
         return "Error: TAVILY_API_KEY not configured."
     
-    client = AsyncTavilyClient(api_key=api_key)
-    
-    all_results = []
-    seen_urls = set()
-    
-    for query in queries:
-        try:
-            # Check cache first
-            response = get_cached(query, max_results)
-            if response is None:
+    client = _get_client(api_key)
+    loop = asyncio.get_running_loop()
+    inflight = _inflight.get(loop)
+    if inflight is None:
+        inflight = _inflight[loop] = {}
+
+    async def fetch(query: str) -> dict:
+        if semaphore is not None:
+            async with semaphore:
                 response = await client.search(
                     query,
                     max_results=max_results,
                     include_raw_content=False,
                 )
-                set_cached(query, max_results, response)
-
-            for result in response.get("results", []):
-                url = result.get("url", "")
-                # Deduplicate by URL
-                if url and url not in seen_urls:
-                    seen_urls.add(url)
-                    all_results.append({
-                        "title": result.get("title", ""),
-                        "url": url,
-                        # Allow richer snippets while still capping size
-                        "content": result.get("content", "")[:3000],
-                    })
-        except Exception as e:
-            all_results.append({"error": f"Search failed for '{query}': {str(e)[:80]}"})
+        else:
+            response = await client.search(
+                query,
+                max_results=max_results,
+                include_raw_content=False,
+            )
+        await aset_cached(query, max_results, response)
+        return response
+
+    async def search_one(query: str) -> dict:
+        # Check cache first
+        response = await aget_cached(query, max_results)
+        if response is not None:
+            return response
+        # Join an identical search that is already running, or start one.
+        key = make_cache_key(query, max_results)
+        task = inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fetch(query))
+            inflight[key] = task
+            task.add_done_callback(lambda task, key=key: _finish_search(inflight, task, key))
+        # Shield so one caller being cancelled doesn't cancel the search for the others.
+        return await asyncio.shield(task)
+
+    responses = await asyncio.gather(
+        *(search_one(query) for query in queries), return_exceptions=True
+    )
+    
+    all_results = []
+    seen_urls = set()
+    
+    for query, response in zip(queries, responses):
+        if isinstance(response, Exception):
+            all_results.append({"error": f"Search failed for '{query}': {str(response)[:80]}"})
+            continue
+        for result in response.get("results", []):
+            url = result.get("url", "")
+            # Deduplicate by URL
+            if url and url not in seen_urls:
+                seen_urls.add(url)
+                all_results.append({
+                    "title": result.get("title", ""),
+                    "url": url,
+                    # Allow richer snippets while still capping size
+                    "content": result.get("content", "")[:3000],
+                })
     
     if not all_results:
         return "No search results found. Try different search queries."
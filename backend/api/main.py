@@ -1,16 +1,20 @@
 """Unified FastAPI app for all DSA Copilot agents with streaming support."""
 
 import asyncio
-import json
+import hashlib
 import os
+import re
 import sys
 from contextlib import asynccontextmanager
 from pathlib import Path
 from typing import Any, AsyncGenerator, Callable, Dict, Optional
 
-from fastapi import FastAPI, HTTPException
+import httpx
+import openai
+import orjson
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse
+from fastapi.responses import Response, StreamingResponse
 from pydantic import BaseModel
 from dotenv import load_dotenv
 
@@ -20,7 +24,6 @@ load_dotenv()
 # Add agents to path
 backend_path = Path(__file__).resolve().parent.parent
 agents_path = backend_path / "agents"
-sys.path.insert(0, str(backend_path))
 
 # Add each agent's src directory to path for imports
 agent_src_paths = [
@@ -30,9 +33,14 @@ agent_src_paths = [
     agents_path / "main_agent" / "src",
 ]
 
-for path in agent_src_paths:
-    if path.exists():
-        sys.path.insert(0, str(path))
+# Skip entries that are already present (e.g. when a reloader re-imports this
+# module), so sys.path doesn't grow duplicates that slow every import lookup.
+_sys_path_entries = set(sys.path)
+for path in [backend_path, *agent_src_paths]:
+    entry = str(path)
+    if entry not in _sys_path_entries and path.exists():
+        sys.path.insert(0, entry)
+        _sys_path_entries.add(entry)
 
 # Import agents
 from langchain_core.messages import HumanMessage, AIMessage
@@ -67,10 +75,97 @@ except ImportError as e:
 try:
     from main_agent.graph import main_agent
     from main_agent.state import MainAgentInputState
+    from main_agent.tools import get_dsa_retriever
 except ImportError as e:
     print(f"Warning: Could not import main_agent: {e}")
     main_agent = None
     MainAgentInputState = None
+    get_dsa_retriever = None
+
+try:
+    from knowledge_base.dsa_parser import warm_cache as warm_dsa_cache
+    from knowledge_base.retriever import close_retrievers
+    # Qdrant's client ships grpcio; both only matter when the knowledge base is available.
+    import grpc
+    from qdrant_client.http.exceptions import ApiException as QdrantApiException
+    _KNOWLEDGE_BASE_ERRORS = (QdrantApiException, grpc.RpcError)
+except ImportError as e:
+    print(f"Warning: Could not import knowledge_base: {e}")
+    warm_dsa_cache = None
+    close_retrievers = None
+    _KNOWLEDGE_BASE_ERRORS = ()
+
+
+# =============================================================================
+# Streaming Helpers
+# =============================================================================
+
+# web_search results are formatted as "**Title**\n   URL"; fall back to bare URLs.
+_TITLE_RE = re.compile(r'\*\*([^*]+)\*\*\n\s+(https?://[^\s\n]+)')
+_URL_RE = re.compile(r'https?://[^\s\n]+')
+
+
+def _sse(data: Dict[str, Any]) -> bytes:
+    """Encode one server-sent event; orjson writes UTF-8 bytes directly."""
+    return b"data: " + orjson.dumps(data) + b"\n\n"
+
+
+def _clean_source_url(u: str) -> str:
+    u = (u or "").strip()
+    # Sometimes tool outputs are stringified with escaped newlines.
+    u = u.replace("\\n", "").replace("\\t", "")
+    # Strip common trailing punctuation/quotes.
+    return u.rstrip(").,;]}>\"'")
+
+
+def _extract_sources(text: str) -> list[dict]:
+    """Return up to 8 {title?, url} sources found in a web_search tool output."""
+    title_matches = _TITLE_RE.findall(text)
+    if title_matches:
+        return [{"title": t.strip(), "url": _clean_source_url(u)} for t, u in title_matches[:8]]
+    if "http" not in text:
+        return []
+    return [{"url": _clean_source_url(u)} for u in _URL_RE.findall(text)[:8]]
+
+
+# X-Accel-Buffering stops nginx-style proxies from holding frames back, so
+# tokens reach the client as soon as they are yielded.
+_SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "Connection": "keep-alive",
+    "X-Accel-Buffering": "no",
+}
+
+
+def _sse_response(stream: AsyncGenerator[bytes, None]) -> StreamingResponse:
+    """Wrap a generator of pre-encoded SSE frames in a streaming response."""
+    return StreamingResponse(stream, media_type="text/event-stream", headers=_SSE_HEADERS)
+
+
+def _loads_or_none(text: Optional[str]) -> Optional[Any]:
+    """Parse a JSON object/array produced by an agent, or None if it isn't one."""
+    # Cheap prefix check first: most misses are prose or empty strings, and
+    # raising/catching JSONDecodeError for those costs more than the parse.
+    text = text.lstrip() if text else ""
+    if not text or text[0] not in "{[":
+        return None
+    try:
+        return orjson.loads(text)
+    except orjson.JSONDecodeError:
+        return None
+
+
+def _json_response(data: Any) -> Response:
+    """Return `data` as a JSON response encoded by orjson."""
+    return Response(content=orjson.dumps(data), media_type="application/json")
+
+
+def _raw_json_response(payload: str) -> Response:
+    """Send a JSON string produced by an agent as-is, without decoding and re-encoding it."""
+    # Parsing is far cheaper than re-encoding and still catches truncated or
+    # malformed output; orjson.JSONDecodeError is a ValueError, so it maps to a 500.
+    orjson.loads(payload)
+    return Response(content=payload, media_type="application/json")
 
 
 # =============================================================================
@@ -106,6 +201,103 @@ class MainAgentRequest(BaseModel):
 # Streaming Helper
 # =============================================================================
 
+def _event_node(event: Dict[str, Any], metadata: Dict[str, Any]) -> str:
+    # LangGraph exposes node info in metadata, not as a top-level "node" key.
+    return metadata.get("langgraph_node") or event.get("node") or "unknown"
+
+
+def _on_chat_model_stream(event: Dict[str, Any], metadata: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Stream LLM tokens - capture all chat model streaming events."""
+    chunk = event.get("data", {}).get("chunk", {})
+    if not chunk:
+        return None
+    # Handle different chunk formats
+    content = None
+    if hasattr(chunk, "content"):
+        content = chunk.content
+    elif isinstance(chunk, dict):
+        content = chunk.get("content", "")
+    if not content:
+        return None
+    return {
+        'type': 'token',
+        'content': content,
+        'node': _event_node(event, metadata),
+        'agent': event.get("name") or 'unknown',
+    }
+
+
+def _on_chat_model_start(event: Dict[str, Any], metadata: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Stream LLM start events."""
+    return {
+        'type': 'llm_start',
+        'node': _event_node(event, metadata),
+        'agent': event.get("name") or 'unknown',
+    }
+
+
+def _on_tool_start(event: Dict[str, Any], metadata: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Stream tool calls."""
+    tool_input = event.get("data", {}).get("input", {})
+    return {
+        'type': 'tool_start',
+        'name': event.get("name") or 'unknown',
+        'node': _event_node(event, metadata),
+        'input': str(tool_input)[:200] if tool_input else "",
+    }
+
+
+def _on_tool_end(event: Dict[str, Any], metadata: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Stream tool results, with the sources found by web_search."""
+    event_name = event.get("name")
+    output = event.get("data", {}).get("output", "")
+    output_str = str(output)
+
+    # Extract URLs from search results for web_search tool
+    sources = []
+    if event_name == "web_search" and output_str:
+        # Scan the ToolMessage text itself; its str() escapes the newlines
+        # the title pattern relies on.
+        content = getattr(output, "content", None)
+        sources = _extract_sources(content if isinstance(content, str) else output_str)
+
+    return {
+        'type': 'tool_end',
+        'name': event_name or 'unknown',
+        'node': _event_node(event, metadata),
+        'output_length': len(output_str),
+        'sources': sources,
+    }
+
+
+def _node_transition(kind: str):
+    """Build the handler for node transitions (when entering/exiting graph nodes)."""
+    def handler(event: Dict[str, Any], metadata: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        chain_name = event.get("name", "") or ""
+        # Emit node transitions for actual LangGraph nodes (identified via metadata).
+        # Fall back to emitting the top-level graph start for visibility.
+        if not (metadata.get("langgraph_node") or chain_name == "LangGraph"):
+            return None
+        return {
+            'type': kind,
+            'node': _event_node(event, metadata),
+            'chain': chain_name,
+        }
+    return handler
+
+
+# One dict lookup per event instead of walking an if/elif chain; token events
+# dominate the stream. Event types without a handler are not forwarded.
+_EVENT_HANDLERS: Dict[str, Callable[[Dict[str, Any], Dict[str, Any]], Optional[Dict[str, Any]]]] = {
+    "on_chat_model_stream": _on_chat_model_stream,
+    "on_chat_model_start": _on_chat_model_start,
+    "on_tool_start": _on_tool_start,
+    "on_tool_end": _on_tool_end,
+    "on_chain_start": _node_transition("node_start"),
+    "on_chain_end": _node_transition("node_end"),
+}
+
+
 async def stream_agent_events(
     graph: Runnable,
     input_state: Dict[str, Any],
@@ -113,7 +305,7 @@ async def stream_agent_events(
     *,
     include_done: bool = True,
     on_event: Optional[Callable[[Dict[str, Any]], None]] = None,
-) -> AsyncGenerator[str, None]:
+) -> AsyncGenerator[bytes, None]:
     """
     Stream all events from a LangGraph agent, including subagents.
     
@@ -135,117 +327,16 @@ async def stream_agent_events(
                     # Never let event observers break streaming
                     pass
             # Filter for relevant events
-            event_type = event.get("event")
-            event_name = event.get("name")
-            metadata = event.get("metadata") or {}
-            # LangGraph exposes node info in metadata, not as a top-level "node" key.
-            node = (
-                metadata.get("langgraph_node")
-                or event.get("node")
-                or "unknown"
-            )
-            
-            # Stream LLM tokens - capture all chat model streaming events
-            if event_type == "on_chat_model_stream":
-                chunk = event.get("data", {}).get("chunk", {})
-                if chunk:
-                    # Handle different chunk formats
-                    content = None
-                    if hasattr(chunk, "content"):
-                        content = chunk.content
-                    elif isinstance(chunk, dict):
-                        content = chunk.get("content", "")
-                    
-                    if content:
-                        token_data = {
-                            'type': 'token',
-                            'content': content,
-                            'node': node,
-                            'agent': event_name or 'unknown',
-                        }
-                        yield f"data: {json.dumps(token_data, ensure_ascii=False)}\n\n"
-            
-            # Stream LLM start events
-            elif event_type == "on_chat_model_start":
-                llm_start_data = {
-                    'type': 'llm_start',
-                    'node': node,
-                    'agent': event_name or 'unknown',
-                }
-                yield f"data: {json.dumps(llm_start_data)}\n\n"
-            
-            # Stream tool calls
-            elif event_type == "on_tool_start":
-                tool_input = event.get("data", {}).get("input", {})
-                input_str = str(tool_input)[:200] if tool_input else ""
-                tool_start_data = {
-                    'type': 'tool_start',
-                    'name': event_name or 'unknown',
-                    'node': node,
-                    'input': input_str,
-                }
-                yield f"data: {json.dumps(tool_start_data)}\n\n"
-            
-            elif event_type == "on_tool_end":
-                output = event.get("data", {}).get("output", "")
-                output_str = str(output)
-                
-                # Extract URLs from search results for web_search tool
-                sources = []
-                if event_name == "web_search" and output_str:
-                    import re
-                    def clean_url(u: str) -> str:
-                        u = (u or "").strip()
-                        # Sometimes tool outputs are stringified with escaped newlines.
-                        u = u.replace("\\n", "").replace("\\t", "")
-                        # Strip common trailing punctuation/quotes.
-                        return u.rstrip(").,;]}>\"'")
-                    # Find URLs in the output
-                    url_pattern = r'https?://[^\s\n]+'
-                    urls = re.findall(url_pattern, output_str)
-                    # Also try to extract titles (format: "**Title**\n   URL")
-                    title_pattern = r'\*\*([^*]+)\*\*\n\s+(https?://[^\s\n]+)'
-                    title_matches = re.findall(title_pattern, output_str)
-                    if title_matches:
-                        sources = [{"title": t.strip(), "url": clean_url(u)} for t, u in title_matches[:8]]
-                    elif urls:
-                        sources = [{"url": clean_url(u)} for u in urls[:8]]
-                
-                tool_end_data = {
-                    'type': 'tool_end',
-                    'name': event_name or 'unknown',
-                    'node': node,
-                    'output_length': len(output_str),
-                    'sources': sources,
-                }
-                yield f"data: {json.dumps(tool_end_data)}\n\n"
-            
-            # Stream node transitions (when entering/exiting graph nodes)
-            elif event_type == "on_chain_start":
-                chain_name = event.get("name", "") or ""
-                # Emit node transitions for actual LangGraph nodes (identified via metadata).
-                # Fall back to emitting the top-level graph start for visibility.
-                if metadata.get("langgraph_node") or chain_name == "LangGraph":
-                    node_start_data = {
-                        'type': 'node_start',
-                        'node': node,
-                        'chain': chain_name,
-                    }
-                    yield f"data: {json.dumps(node_start_data)}\n\n"
-            
-            elif event_type == "on_chain_end":
-                chain_name = event.get("name", "") or ""
-                if metadata.get("langgraph_node") or chain_name == "LangGraph":
-                    node_end_data = {
-                        'type': 'node_end',
-                        'node': node,
-                        'chain': chain_name,
-                    }
-                    yield f"data: {json.dumps(node_end_data)}\n\n"
+            handler = _EVENT_HANDLERS.get(event.get("event"))
+            if handler is None:
+                continue
+            data = handler(event, event.get("metadata") or {})
+            if data is not None:
+                yield _sse(data)
         
         # Send completion signal (optional; stream_with_final_result controls ordering)
         if include_done:
-            yield f"data: {json.dumps(done_data)}\n\n"
+            yield _sse(done_data)
         
     except Exception as e:
         error_msg = str(e)[:500]
@@ -253,9 +344,9 @@ async def stream_agent_events(
             'type': 'error',
             'message': error_msg,
         }
-        yield f"data: {json.dumps(error_data)}\n\n"
+        yield _sse(error_data)
         if include_done:
-            yield f"data: {json.dumps(done_data)}\n\n"
+            yield _sse(done_data)
 
 
 async def stream_with_final_result(
@@ -263,7 +354,7 @@ async def stream_with_final_result(
     input_state: Dict[str, Any],
     config: Optional[Dict[str, Any]] = None,
     extract_result: Optional[Callable[[Dict[str, Any]], Optional[Dict[str, Any]]]] = None,
-) -> AsyncGenerator[str, None]:
+) -> AsyncGenerator[bytes, None]:
     """
     Stream agent events and include final result.
     
@@ -307,31 +398,82 @@ async def stream_with_final_result(
                     'type': 'result',
                     'data': extracted,
                 }
-                yield f"data: {json.dumps(result_data)}\n\n"
+                yield _sse(result_data)
         except Exception as e:
             exception_data = {
                 'type': 'error',
                 'message': str(e)[:500],
             }
-            yield f"data: {json.dumps(exception_data)}\n\n"
+            yield _sse(exception_data)
 
     # Always finish with a completion signal
-    yield f"data: {json.dumps({'type': 'done'})}\n\n"
+    yield _sse({'type': 'done'})
 
 
 # =============================================================================
 # FastAPI App
 # =============================================================================
 
+# Qdrant may still be starting alongside the API, so it is probed in the background
+# instead of holding up startup, with delays doubling up to KNOWLEDGE_BASE_MAX_DELAY
+# (1s, 2s, 4s, 8s, 8s, ...). The probe never stops: after KNOWLEDGE_BASE_ATTEMPTS
+# failures it only prints a warning, so a Qdrant that comes up late is still picked up.
+KNOWLEDGE_BASE_ATTEMPTS = 8
+KNOWLEDGE_BASE_MAX_DELAY = 8.0
+
+
+async def _wait_for_knowledge_base(app: FastAPI) -> None:
+    """Mark the DSA knowledge base ready once Qdrant has indexed data."""
+    delay = 1.0
+    attempt = 0
+    last_error = None
+    while True:
+        attempt += 1
+        try:
+            # Warms the same pooled retriever the main agent's tool uses.
+            if await get_dsa_retriever().ais_ready():
+                app.state.knowledge_base_ready = True
+                print("✓ DSA knowledge base ready")
+                return
+        except Exception as e:
+            # e.g. bad Qdrant settings; report each distinct error once, not every probe.
+            if str(e) != last_error:
+                last_error = str(e)
+                print(f"Warning: DSA knowledge base probe failed: {e}")
+        if attempt == KNOWLEDGE_BASE_ATTEMPTS:
+            print("Warning: DSA knowledge base not ready yet; DSA retrieval will report it as unavailable until it is")
+        await asyncio.sleep(delay)
+        delay = min(delay * 2, KNOWLEDGE_BASE_MAX_DELAY)
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Startup and shutdown events."""
+    app.state.knowledge_base_ready = False
+    knowledge_base_task = None
+    if get_dsa_retriever:
+        knowledge_base_task = asyncio.create_task(_wait_for_knowledge_base(app))
+    if warm_dsa_cache:
+        # Parse (or load the cached parse of) the DSA text before the first request.
+        try:
+            await asyncio.to_thread(warm_dsa_cache)
+        except Exception as e:
+            print(f"Warning: Could not load DSA text: {e}")
     print("✓ DSA Copilot API ready")
     print(f"  - Company Matcher: {'✓' if company_matcher else '✗'}")
     print(f"  - Company Researcher: {'✓' if company_researcher else '✗'}")
     print(f"  - Service Categorizer: {'✓' if service_categorizer else '✗'}")
     print(f"  - Main Agent: {'✓' if main_agent else '✗'}")
     yield
+    if knowledge_base_task:
+        knowledge_base_task.cancel()
+    try:
+        from tools import close_clients
+        await close_clients()
+    except ImportError:
+        pass
+    if close_retrievers:
+        await close_retrievers()
 
 
 app = FastAPI(
@@ -352,21 +494,162 @@ app.add_middleware(
 
 
 # =============================================================================
-# Health Check
+# Input States
 # =============================================================================
 
-@app.get("/health")
-def health():
-    """Health check endpoint."""
+def _required(value: str, detail: str) -> str:
+    """Return `value` stripped, or reject the request when it is blank."""
+    value = value.strip()
+    if not value:
+        raise HTTPException(status_code=400, detail=detail)
+    return value
+
+
+def _company_matcher_input(request: CompanyMatcherRequest) -> Dict[str, Any]:
+    """Validate a company matcher request and build the agent's input state."""
+    company_name = _required(request.company_name, "Company name is required")
+    country = _required(request.country_of_establishment, "Country of establishment is required")
+    return {
+        "messages": [HumanMessage(content=company_name)],
+        "country_of_establishment": country,
+    }
+
+
+def _company_researcher_input(request: CompanyResearcherRequest) -> Dict[str, Any]:
+    """Validate a company researcher request and build the agent's input state."""
+    company_name = _required(request.company_name, "Company name is required")
+    return {
+        "messages": [HumanMessage(content=company_name)],
+        "company_name": company_name,
+        "top_domain": (request.top_domain or "").strip() or None,
+        "summary_long": (request.summary_long or "").strip() or None,
+    }
+
+
+def _service_categorizer_input(request: ServiceCategorizerRequest) -> Dict[str, Any]:
+    """Build the service categorizer's input state from the company profile."""
+    # Pass the parsed profile through as well, so the agent doesn't decode the message again.
+    return {
+        "messages": [HumanMessage(content=orjson.dumps(request.company_profile).decode())],
+        "company_profile": request.company_profile,
+    }
+
+
+def _main_agent_input(request: MainAgentRequest) -> Dict[str, Any]:
+    """Validate a main agent request and build the agent's input state."""
+    message = _required(request.message, "Message is required")
     return {
+        "messages": [HumanMessage(content=message)],
+        "frontend_context": request.frontend_context,
+        "context_mode": request.context_mode,
+    }
+
+
+# =============================================================================
+# Final Results
+# =============================================================================
+
+def _extract_match(result: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Decode the company matcher's JSON match result."""
+    return _loads_or_none(result.get("match_result", ""))
+
+
+def _extract_report(result: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Decode the JSON final report of the researcher or categorizer."""
+    return _loads_or_none(result.get("final_report", ""))
+
+
+def _extract_messages(result: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Wrap the main agent's last message as {"response": content}."""
+    messages = result.get("messages", [])
+    if messages:
+        last_message = messages[-1]
+        content = last_message.content if hasattr(last_message, "content") else str(last_message)
+        return {"response": content}
+    return None
+
+
+# =============================================================================
+# Shared Runs
+# =============================================================================
+
+# Non-streaming runs currently in flight, keyed by agent and request body, so
+# identical concurrent requests (retries, double submits) share one agent run.
+_inflight_runs: dict[tuple[str, str], asyncio.Future] = {}
+
+
+async def _invoke_shared(name: str, graph: Runnable, request: BaseModel, input_state: Dict[str, Any]) -> Dict[str, Any]:
+    """Invoke `graph`, joining an identical run that is already in progress."""
+    key = (name, request.model_dump_json())
+    task = _inflight_runs.get(key)
+    if task is None:
+        task = asyncio.ensure_future(graph.ainvoke(input_state))
+        _inflight_runs[key] = task
+        task.add_done_callback(lambda task, key=key: _finish_shared_run(task, key))
+    # Shield so one client disconnecting doesn't cancel the run for the others.
+    return await asyncio.shield(task)
+
+
+def _finish_shared_run(task: asyncio.Future, key: tuple[str, str]) -> None:
+    """Forget a finished run and mark its exception retrieved.
+
+    If every waiter has disconnected, nobody awaits the task; without this a
+    failure would be logged as "Task exception was never retrieved".
+    """
+    _inflight_runs.pop(key, None)
+    if not task.cancelled():
+        task.exception()
+
+
+# =============================================================================
+# Error Mapping
+# =============================================================================
+
+# Failures of the services the agents call (LLM and embedding APIs, Tavily, Qdrant)
+# are reported as 504/502 so clients can tell them apart from bugs here (500).
+_UPSTREAM_TIMEOUTS = (TimeoutError, httpx.TimeoutException, openai.APITimeoutError)
+_UPSTREAM_ERRORS = (httpx.HTTPError, openai.APIError, *_KNOWLEDGE_BASE_ERRORS)
+
+
+def _agent_error(e: Exception) -> HTTPException:
+    """Map an exception raised during an agent run to the HTTP error sent back."""
+    if isinstance(e, HTTPException):
+        return e
+    if isinstance(e, _UPSTREAM_TIMEOUTS):
+        return HTTPException(status_code=504, detail=str(e))
+    if isinstance(e, _UPSTREAM_ERRORS):
+        return HTTPException(status_code=502, detail=str(e))
+    return HTTPException(status_code=500, detail=str(e))
+
+
+# =============================================================================
+# Health Check
+# =============================================================================
+
+# Agent availability is fixed once the imports above have run, so both possible
+# bodies (knowledge base ready or not) are encoded once and health probes skip
+# serialization entirely. The status stays 200 while Qdrant is unavailable: the
+# API itself is up, and a failing container health check would only restart it.
+_HEALTH_BODIES = {
+    ready: orjson.dumps({
         "status": "healthy",
         "agents": {
             "company_matcher": company_matcher is not None,
             "company_researcher": company_researcher is not None,
             "service_categorizer": service_categorizer is not None,
             "main_agent": main_agent is not None,
-        }
-    }
+        },
+        "knowledge_base": ready,
+    })
+    for ready in (False, True)
+}
+
+
+@app.get("/health")
+async def health(request: Request):
+    """Health check endpoint."""
+    ready = getattr(request.app.state, "knowledge_base_ready", False)
+    return Response(content=_HEALTH_BODIES[ready], media_type="application/json")
 
 
 # =============================================================================
@@ -379,38 +662,11 @@ async def company_matcher_stream(request: CompanyMatcherRequest):
     if not company_matcher:
         raise HTTPException(status_code=503, detail="Company matcher not available")
     
-    if not request.company_name.strip():
-        raise HTTPException(status_code=400, detail="Company name is required")
-
-    if not request.country_of_establishment.strip():
-        raise HTTPException(
-            status_code=400, detail="Country of establishment is required"
-        )
+    input_state: CompanyMatcherInputState = _company_matcher_input(request)
     
-    input_state: CompanyMatcherInputState = {
-        "messages": [HumanMessage(content=request.company_name.strip())],
-        "country_of_establishment": request.country_of_establishment.strip(),
-    }
+    stream = stream_with_final_result(company_matcher, input_state, extract_result=_extract_match)
     
-    def extract_result(result: Dict[str, Any]) -> Optional[Dict[str, Any]]:
-        match_result = result.get("match_result", "")
-        if match_result:
-            try:
-                return json.loads(match_result)
-            except json.JSONDecodeError:
-                return None
-        return None
-    
-    stream = stream_with_final_result(company_matcher, input_state, extract_result=extract_result)
-    
-    return StreamingResponse(
-        stream,
-        media_type="text/event-stream",
-        headers={
-            "Cache-Control": "no-cache",
-            "Connection": "keep-alive",
-        }
-    )
+    return _sse_response(stream)
 
 
 @app.post("/agents/company_matcher")
@@ -419,28 +675,18 @@ async def company_matcher_invoke(request: CompanyMatcherRequest):
     if not company_matcher:
         raise HTTPException(status_code=503, detail="Company matcher not available")
     
-    if not request.company_name.strip():
-        raise HTTPException(status_code=400, detail="Company name is required")
-
-    if not request.country_of_establishment.strip():
-        raise HTTPException(
-            status_code=400, detail="Country of establishment is required"
-        )
+    input_state: CompanyMatcherInputState = _company_matcher_input(request)
     
     try:
-        input_state: CompanyMatcherInputState = {
-            "messages": [HumanMessage(content=request.company_name.strip())],
-            "country_of_establishment": request.country_of_establishment.strip(),
-        }
-        result = await company_matcher.ainvoke(input_state)
+        result = await _invoke_shared("company_matcher", company_matcher, request, input_state)
         match_result = result.get("match_result", "")
         
         if match_result:
-            return json.loads(match_result)
+            return _raw_json_response(match_result)
         else:
             raise HTTPException(status_code=500, detail="No match result generated")
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise _agent_error(e) from e
 
 
 # =============================================================================
@@ -453,35 +699,11 @@ async def company_researcher_stream(request: CompanyResearcherRequest):
     if not company_researcher:
         raise HTTPException(status_code=503, detail="Company researcher not available")
     
-    if not request.company_name.strip():
-        raise HTTPException(status_code=400, detail="Company name is required")
+    input_state: CompanyResearchInputState = _company_researcher_input(request)
     
-    input_state: CompanyResearchInputState = {
-        "messages": [HumanMessage(content=request.company_name.strip())],
-        "company_name": request.company_name.strip(),
-        "top_domain": (request.top_domain or "").strip() or None,
-        "summary_long": (request.summary_long or "").strip() or None,
-    }
+    stream = stream_with_final_result(company_researcher, input_state, extract_result=_extract_report)
     
-    def extract_result(result: Dict[str, Any]) -> Optional[Dict[str, Any]]:
-        final_report = result.get("final_report", "")
-        if final_report:
-            try:
-                return json.loads(final_report)
-            except json.JSONDecodeError:
-                return None
-        return None
-    
-    stream = stream_with_final_result(company_researcher, input_state, extract_result=extract_result)
-    
-    return StreamingResponse(
-        stream,
-        media_type="text/event-stream",
-        headers={
-            "Cache-Control": "no-cache",
-            "Connection": "keep-alive",
-        }
-    )
+    return _sse_response(stream)
 
 
 @app.post("/agents/company_researcher")
@@ -490,25 +712,18 @@ async def company_researcher_invoke(request: CompanyResearcherRequest):
     if not company_researcher:
         raise HTTPException(status_code=503, detail="Company researcher not available")
     
-    if not request.company_name.strip():
-        raise HTTPException(status_code=400, detail="Company name is required")
+    input_state: CompanyResearchInputState = _company_researcher_input(request)
     
     try:
-        input_state: CompanyResearchInputState = {
-            "messages": [HumanMessage(content=request.company_name.strip())],
-            "company_name": request.company_name.strip(),
-            "top_domain": (request.top_domain or "").strip() or None,
-            "summary_long": (request.summary_long or "").strip() or None,
-        }
-        result = await company_researcher.ainvoke(input_state)
+        result = await _invoke_shared("company_researcher", company_researcher, request, input_state)
         final_report = result.get("final_report", "")
         
         if final_report:
-            return json.loads(final_report)
+            return _raw_json_response(final_report)
         else:
             raise HTTPException(status_code=500, detail="No report generated")
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise _agent_error(e) from e
 
 
 # =============================================================================
@@ -521,29 +736,11 @@ async def service_categorizer_stream(request: ServiceCategorizerRequest):
     if not service_categorizer:
         raise HTTPException(status_code=503, detail="Service categorizer not available")
     
-    input_state: ServiceCategorizerInputState = {
-        "messages": [HumanMessage(content=json.dumps(request.company_profile))]
-    }
+    input_state: ServiceCategorizerInputState = _service_categorizer_input(request)
     
-    def extract_result(result: Dict[str, Any]) -> Optional[Dict[str, Any]]:
-        final_report = result.get("final_report", "")
-        if final_report:
-            try:
-                return json.loads(final_report)
-            except json.JSONDecodeError:
-                return None
-        return None
+    stream = stream_with_final_result(service_categorizer, input_state, extract_result=_extract_report)
     
-    stream = stream_with_final_result(service_categorizer, input_state, extract_result=extract_result)
-    
-    return StreamingResponse(
-        stream,
-        media_type="text/event-stream",
-        headers={
-            "Cache-Control": "no-cache",
-            "Connection": "keep-alive",
-        }
-    )
+    return _sse_response(stream)
 
 
 @app.post("/agents/service_categorizer")
@@ -552,19 +749,18 @@ async def service_categorizer_invoke(request: ServiceCategorizerRequest):
     if not service_categorizer:
         raise HTTPException(status_code=503, detail="Service categorizer not available")
     
+    input_state: ServiceCategorizerInputState = _service_categorizer_input(request)
+    
     try:
-        input_state: ServiceCategorizerInputState = {
-            "messages": [HumanMessage(content=json.dumps(request.company_profile))]
-        }
-        result = await service_categorizer.ainvoke(input_state)
+        result = await _invoke_shared("service_categorizer", service_categorizer, request, input_state)
         final_report = result.get("final_report", "")
         
         if final_report:
-            return json.loads(final_report)
+            return _raw_json_response(final_report)
         else:
             raise HTTPException(status_code=500, detail="No report generated")
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise _agent_error(e) from e
 
 
 # =============================================================================
@@ -577,33 +773,11 @@ async def main_agent_stream(request: MainAgentRequest):
     if not main_agent:
         raise HTTPException(status_code=503, detail="Main agent not available")
     
-    if not request.message.strip():
-        raise HTTPException(status_code=400, detail="Message is required")
+    input_state: MainAgentInputState = _main_agent_input(request)
     
-    input_state: MainAgentInputState = {
-        "messages": [HumanMessage(content=request.message.strip())],
-        "frontend_context": request.frontend_context,
-        "context_mode": request.context_mode,
-    }
-    
-    def extract_result(result: Dict[str, Any]) -> Optional[Dict[str, Any]]:
-        messages = result.get("messages", [])
-        if messages:
-            last_message = messages[-1]
-            content = last_message.content if hasattr(last_message, "content") else str(last_message)
-            return {"response": content}
-        return None
-    
-    stream = stream_with_final_result(main_agent, input_state, extract_result=extract_result)
+    stream = stream_with_final_result(main_agent, input_state, extract_result=_extract_messages)
     
-    return StreamingResponse(
-        stream,
-        media_type="text/event-stream",
-        headers={
-            "Cache-Control": "no-cache",
-            "Connection": "keep-alive",
-        }
-    )
+    return _sse_response(stream)
 
 
 @app.post("/agents/main_agent")
@@ -612,63 +786,89 @@ async def main_agent_invoke(request: MainAgentRequest):
     if not main_agent:
         raise HTTPException(status_code=503, detail="Main agent not available")
     
-    if not request.message.strip():
-        raise HTTPException(status_code=400, detail="Message is required")
+    input_state: MainAgentInputState = _main_agent_input(request)
     
     try:
-        input_state: MainAgentInputState = {
-            "messages": [HumanMessage(content=request.message.strip())],
-            "frontend_context": request.frontend_context,
-            "context_mode": request.context_mode,
-        }
         result = await main_agent.ainvoke(input_state)
-        messages = result.get("messages", [])
+        response = _extract_messages(result)
         
-        if messages:
-            last_message = messages[-1]
-            content = last_message.content if hasattr(last_message, "content") else str(last_message)
-            return {"response": content}
+        if response:
+            return _json_response(response)
         else:
             raise HTTPException(status_code=500, detail="No response generated")
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise _agent_error(e) from e
 
 
 # =============================================================================
 # Root
 # =============================================================================
 
+_ROOT_BODY = orjson.dumps({
+    "name": "DSA Copilot API",
+    "version": "1.0.0",
+    "endpoints": {
+        "health": "/health",
+        "company_matcher": {
+            "stream": "/agents/company_matcher/stream",
+            "invoke": "/agents/company_matcher",
+        },
+        "company_researcher": {
+            "stream": "/agents/company_researcher/stream",
+            "invoke": "/agents/company_researcher",
+        },
+        "service_categorizer": {
+            "stream": "/agents/service_categorizer/stream",
+            "invoke": "/agents/service_categorizer",
+        },
+        "main_agent": {
+            "stream": "/agents/main_agent/stream",
+            "invoke": "/agents/main_agent",
+        },
+    }
+})
+
+
+# The body never changes while the process runs, so clients can revalidate
+# with If-None-Match and get an empty 304 instead of the document.
+_ROOT_HEADERS = {
+    "ETag": f'"{hashlib.sha256(_ROOT_BODY).hexdigest()[:16]}"',
+    "Cache-Control": "public, max-age=300",
+}
+
+
+# An entity-tag in an If-None-Match list, capturing the quoted part without W/.
+_ETAG_RE = re.compile(r'(?:W/)?("[^"]*")')
+
+
+def _etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """RFC 9110 If-None-Match: "*" or any listed tag, compared weakly (W/ ignored)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return etag in _ETAG_RE.findall(if_none_match)
+
+
 @app.get("/")
-def root():
+async def root(request: Request):
     """API root endpoint."""
-    return {
-        "name": "DSA Copilot API",
-        "version": "1.0.0",
-        "endpoints": {
-            "health": "/health",
-            "company_matcher": {
-                "stream": "/agents/company_matcher/stream",
-                "invoke": "/agents/company_matcher",
-            },
-            "company_researcher": {
-                "stream": "/agents/company_researcher/stream",
-                "invoke": "/agents/company_researcher",
-            },
-            "service_categorizer": {
-                "stream": "/agents/service_categorizer/stream",
-                "invoke": "/agents/service_categorizer",
-            },
-            "main_agent": {
-                "stream": "/agents/main_agent/stream",
-                "invoke": "/agents/main_agent",
-            },
-        }
-    }
+    if _etag_matches(request.headers.get("if-none-match"), _ROOT_HEADERS["ETag"]):
+        return Response(status_code=304, headers=_ROOT_HEADERS)
+    return Response(content=_ROOT_BODY, media_type="application/json", headers=_ROOT_HEADERS)
 
 
 if __name__ == "__main__":
     import uvicorn
     import os
     port = int(os.getenv("PORT", 8001))
-    uvicorn.run(app, host="0.0.0.0", port=port)
+    # uvloop and httptools come with uvicorn[standard]; uvloop has no Windows build.
+    uvicorn.run(
+        app,
+        host="0.0.0.0",
+        port=port,
+        loop="uvloop" if sys.platform != "win32" else "auto",
+        http="httptools",
+        timeout_keep_alive=30,
+    )
 
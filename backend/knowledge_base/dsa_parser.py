@@ -1,17 +1,16 @@
 """Parser for the Digital Services Act HTML document."""
+import hashlib
+import json
 import os
 from pathlib import Path
 import re
-import warnings
+import threading
 
 import httpx
-from bs4 import BeautifulSoup, XMLParsedAsHTMLWarning
+from lxml import etree
 
 from .models import ArticleChunk
 
-# Suppress XML warning for HTML content
-warnings.filterwarnings("ignore", category=XMLParsedAsHTMLWarning)
-
 
 # Optional local cached HTML file (can be checked into the repo)
 LOCAL_DSA_HTML_PATH = os.getenv(
@@ -20,6 +19,11 @@ LOCAL_DSA_HTML_PATH = os.getenv(
 
 DSA_URL = "https://eur-lex.europa.eu/legal-content/EN/TXT/HTML/?uri=CELEX:32022R2065"
 
+# Parsed chunks are cached as JSON next to the HTML, keyed by the HTML's SHA256.
+# Bump the version whenever the parsing logic changes to invalidate old caches.
+PARSED_CACHE_DIR = os.getenv("DSA_PARSED_CACHE_DIR", str(Path(LOCAL_DSA_HTML_PATH).parent))
+PARSED_CACHE_VERSION = 1
+
 # Mapping of article ranges to sections and categories
 ARTICLE_METADATA = {
     # Section I: General Provisions
@@ -39,12 +43,22 @@ ARTICLE_METADATA = {
 }
 
 
+_DEFAULT_ARTICLE_METADATA = ("Other", "All Services")
+
+# ARTICLE_METADATA flattened into a list indexed by article number.
+_ARTICLE_META: list[tuple[str, str]] = [_DEFAULT_ARTICLE_METADATA] * (
+    max(end for _, end in ARTICLE_METADATA) + 1
+)
+for (_start, _end), _meta in ARTICLE_METADATA.items():
+    _ARTICLE_META[_start:_end + 1] = [_meta] * (_end - _start + 1)
+del _start, _end, _meta
+
+
 def get_article_metadata(article_num: int) -> tuple[str, str]:
     """Get section and category for an article number."""
-    for (start, end), (section, category) in ARTICLE_METADATA.items():
-        if start <= article_num <= end:
-            return section, category
-    return "Other", "All Services"
+    if 0 <= article_num < len(_ARTICLE_META):
+        return _ARTICLE_META[article_num]
+    return _DEFAULT_ARTICLE_METADATA
 
 
 def download_dsa_html() -> str:
@@ -74,32 +88,62 @@ def download_dsa_html() -> str:
     return response.text
 
 
+# Precompiled XPath queries; class tests match one token of a multi-class attribute.
+_SUBDIVISIONS = etree.XPath(
+    "//div[contains(concat(' ', normalize-space(@class), ' '), ' eli-subdivision ')]"
+)
+_CHILD_SUBDIVISIONS = etree.XPath(
+    ".//div[contains(concat(' ', normalize-space(@class), ' '), ' eli-subdivision ')]"
+)
+_ARTICLE_TITLE = etree.XPath(
+    ".//*[contains(concat(' ', normalize-space(@class), ' '), ' sti-art ')]"
+)
+_TEXT_NODES = etree.XPath(".//text()")
+_ARTICLE_3 = etree.XPath("//div[@id='art_3']")
+
+# Defined terms are quoted with typographic (‘term’) or straight ('term') quotes.
+_DEF_TERM_RE = re.compile(r"[‘']([^‘’']+)[’']")
+
+
+def _get_text(element: etree._Element, separator: str = "") -> str:
+    """Join the element's stripped, non-empty text nodes (like bs4's get_text(strip=True))."""
+    return separator.join(t for t in (s.strip() for s in _TEXT_NODES(element)) if t)
+
+
+def _parse_html(html: str) -> etree._Element:
+    """Parse the (XHTML) DSA document with lxml's HTML parser."""
+    return etree.fromstring(html.encode("utf-8"), etree.HTMLParser(encoding="utf-8"))
+
+
 def parse_dsa_document(html: str) -> list[ArticleChunk]:
     """Parse DSA HTML into article chunks."""
-    soup = BeautifulSoup(html, "lxml")
+    tree = _parse_html(html)
     chunks: list[ArticleChunk] = []
 
+    # Recitals and articles are both eli-subdivision divs; walk the DOM for them once.
+    subdivisions = _SUBDIVISIONS(tree)
+
     # Parse recitals
-    chunks.extend(_parse_recitals(soup))
+    chunks.extend(_parse_recitals(subdivisions))
 
     # Parse articles
-    chunks.extend(_parse_articles(soup))
+    chunks.extend(_parse_articles(subdivisions))
 
     return chunks
 
 
-def _parse_recitals(soup: BeautifulSoup) -> list[ArticleChunk]:
-    """Parse recitals from DSA document."""
+def _parse_recitals(subdivisions: list[etree._Element]) -> list[ArticleChunk]:
+    """Parse recitals from the document's eli-subdivision elements."""
     chunks = []
     
     # Find all recital elements
-    for element in soup.find_all("div", class_="eli-subdivision"):
+    for element in subdivisions:
         recital_id = element.get("id", "")
         if not recital_id.startswith("rct_"):
             continue
             
         recital_num = recital_id.replace("rct_", "")
-        text = element.get_text(separator=" ", strip=True)
+        text = _get_text(element, " ")
         
         if text:
             chunks.append(ArticleChunk(
@@ -115,12 +159,12 @@ def _parse_recitals(soup: BeautifulSoup) -> list[ArticleChunk]:
     return chunks
 
 
-def _parse_articles(soup: BeautifulSoup) -> list[ArticleChunk]:
-    """Parse articles from DSA document."""
+def _parse_articles(subdivisions: list[etree._Element]) -> list[ArticleChunk]:
+    """Parse articles from the document's eli-subdivision elements."""
     chunks = []
     
     # Find article elements
-    for element in soup.find_all("div", class_="eli-subdivision"):
+    for element in subdivisions:
         article_id = element.get("id", "")
         if not article_id.startswith("art_"):
             continue
@@ -128,11 +172,11 @@ def _parse_articles(soup: BeautifulSoup) -> list[ArticleChunk]:
         article_num_str = article_id.replace("art_", "")
         
         # Extract article title
-        title_elem = element.find(class_="sti-art")
-        title = title_elem.get_text(strip=True) if title_elem else f"Article {article_num_str}"
+        title_elems = _ARTICLE_TITLE(element)
+        title = _get_text(title_elems[0]) if title_elems else f"Article {article_num_str}"
         
         # Extract article content
-        content = element.get_text(separator="\n", strip=True)
+        content = _get_text(element, "\n")
         
         # Get metadata
         try:
@@ -155,25 +199,25 @@ def _parse_articles(soup: BeautifulSoup) -> list[ArticleChunk]:
     return chunks
 
 
-def _parse_definitions(soup: BeautifulSoup) -> list[ArticleChunk]:
+def _parse_definitions(tree: etree._Element) -> list[ArticleChunk]:
     """Parse definitions from Article 3."""
     chunks = []
     
     # Article 3 contains definitions - we parse it specially
-    art3 = soup.find("div", id="art_3")
+    art3 = _ARTICLE_3(tree)
     if not art3:
         return chunks
     
     # Find definition points
-    for point in art3.find_all("div", class_="eli-subdivision"):
+    for point in _CHILD_SUBDIVISIONS(art3[0]):
         point_id = point.get("id", "")
         if "_pnt_" not in point_id:
             continue
             
-        text = point.get_text(separator=" ", strip=True)
+        text = _get_text(point, " ")
         
         # Extract definition term (usually in quotes)
-        match = re.search(r"['']([^'']+)['']", text)
+        match = _DEF_TERM_RE.search(text)
         term = match.group(1) if match else point_id
         
         if text:
@@ -195,41 +239,88 @@ def _parse_definitions(soup: BeautifulSoup) -> list[ArticleChunk]:
 # =============================================================================
 
 _CACHED_CHUNKS: list[ArticleChunk] | None = None
+# Chunks keyed by id ("article_16", "recital_7"), built alongside _CACHED_CHUNKS.
+_CHUNKS_BY_ID: dict[str, ArticleChunk] = {}
+# Serialises the first load, so the startup warm-up and an early request don't both parse.
+_CHUNKS_LOCK = threading.Lock()
+
+
+def _parsed_cache_path(html: str) -> Path:
+    """Path of the parsed-chunks cache file for this HTML."""
+    digest = hashlib.sha256(html.encode("utf-8")).hexdigest()[:16]
+    return Path(PARSED_CACHE_DIR) / f"dsa_parsed_v{PARSED_CACHE_VERSION}_{digest}.json"
+
+
+def load_parsed_chunks(html: str) -> list[ArticleChunk]:
+    """Parse the DSA HTML, reusing the on-disk cache from a previous run if present."""
+    path = _parsed_cache_path(html)
+    try:
+        with path.open("r", encoding="utf-8") as f:
+            return [ArticleChunk(**item) for item in json.load(f)]
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        print(f"Ignoring unreadable DSA parse cache {path}: {e}")
+
+    chunks = parse_dsa_document(html)
+    # Best effort: write to a temp file and rename, so readers never see a partial file.
+    try:
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        with tmp_path.open("w", encoding="utf-8") as f:
+            json.dump([c.model_dump() for c in chunks], f)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        print(f"Could not write DSA parse cache {path}: {e}")
+    return chunks
 
 
 def _get_all_chunks() -> list[ArticleChunk]:
     """Load and cache all parsed chunks."""
-    global _CACHED_CHUNKS
-    if _CACHED_CHUNKS is None:
-        html = download_dsa_html()
-        _CACHED_CHUNKS = parse_dsa_document(html)
+    global _CACHED_CHUNKS, _CHUNKS_BY_ID
+    if _CACHED_CHUNKS is not None:
+        return _CACHED_CHUNKS
+    with _CHUNKS_LOCK:
+        if _CACHED_CHUNKS is None:
+            html = download_dsa_html()
+            chunks = load_parsed_chunks(html)
+            # First chunk wins on duplicate ids, as with the old linear scan.
+            by_id: dict[str, ArticleChunk] = {}
+            for chunk in chunks:
+                by_id.setdefault(chunk.id, chunk)
+            _CHUNKS_BY_ID = by_id
+            _CACHED_CHUNKS = chunks
     return _CACHED_CHUNKS
 
 
+def _get_chunk_index() -> dict[str, ArticleChunk]:
+    """Return the chunks keyed by id, loading them on first use."""
+    _get_all_chunks()
+    return _CHUNKS_BY_ID
+
+
+def warm_cache() -> None:
+    """Load the parsed DSA chunks now, so the first lookup doesn't pay for it."""
+    _get_all_chunks()
+
+
 def get_article(article_num: int | str) -> ArticleChunk | None:
     """Get an article by its number (e.g., 11, 15, 33)."""
-    target_id = f"article_{article_num}"
-    for chunk in _get_all_chunks():
-        if chunk.id == target_id:
-            return chunk
-    return None
+    return _get_chunk_index().get(f"article_{article_num}")
 
 
 def get_recital(recital_num: int | str) -> ArticleChunk | None:
     """Get a recital by its number (e.g., 1, 7, 13)."""
-    target_id = f"recital_{recital_num}"
-    for chunk in _get_all_chunks():
-        if chunk.id == target_id:
-            return chunk
-    return None
+    return _get_chunk_index().get(f"recital_{recital_num}")
 
 
 def get_articles(article_nums: list[int | str]) -> list[ArticleChunk]:
     """Get multiple articles by their numbers."""
-    return [a for num in article_nums if (a := get_article(num))]
+    by_id = _get_chunk_index()
+    return [a for num in article_nums if (a := by_id.get(f"article_{num}"))]
 
 
 def get_recitals(recital_nums: list[int | str]) -> list[ArticleChunk]:
     """Get multiple recitals by their numbers."""
-    return [r for num in recital_nums if (r := get_recital(num))]
+    by_id = _get_chunk_index()
+    return [r for num in recital_nums if (r := by_id.get(f"recital_{num}"))]
 
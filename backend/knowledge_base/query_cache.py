@@ -0,0 +1,128 @@
+"""In-process caches of DSA retrieval results.
+
+Lookups go exact match first (no embedding call at all), then embedding
+similarity, then Qdrant.
+"""
+
+import os
+import time
+from collections import OrderedDict
+from typing import Optional
+
+import numpy as np
+
+# Exact (query, limit, category, chunk_type) repeats: agent retries, re-asked questions.
+EXACT_CACHE_TTL = 60 * 60
+EXACT_CACHE_MAX_ENTRIES = 4096
+
+
+def exact_key(query: str, limit: int, category: Optional[str], chunk_type: Optional[str]) -> tuple:
+    """Cache key for a query; case and whitespace differences don't matter."""
+    return (" ".join(query.lower().split()), limit, category, chunk_type)
+
+
+class ExactCache:
+    """Results for exact repeats of a query and filters, with a TTL and an LRU cap.
+
+    One per retriever: results are only valid for the Qdrant collection and
+    credentials they were fetched with.
+    """
+
+    def __init__(self) -> None:
+        self._entries: "OrderedDict[tuple, tuple[float, tuple[dict, ...]]]" = OrderedDict()
+
+    def get(self, key: tuple) -> Optional[list[dict]]:
+        """Return the cached results for exactly this query and filters."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, results = entry
+        if expires_at < time.monotonic():
+            self._entries.pop(key, None)
+            return None
+        self._entries.move_to_end(key)
+        return list(results)
+
+    def set(self, key: tuple, results: list[dict]) -> None:
+        """Remember `results` for exactly this query and filters."""
+        # Stored as a tuple so a caller appending to its list can't change the cache.
+        self._entries[key] = (time.monotonic() + EXACT_CACHE_TTL, tuple(results))
+        self._entries.move_to_end(key)
+        while len(self._entries) > EXACT_CACHE_MAX_ENTRIES:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+# Reuse a previous result when a new query's embedding has at least this cosine
+# similarity with a cached one. Off (0) unless DSA_SEMANTIC_CACHE_THRESHOLD is set:
+# near-identical legal queries ("Article 16" vs "Article 17") can embed very close.
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("DSA_SEMANTIC_CACHE_THRESHOLD", "0") or 0)
+SEMANTIC_CACHE_TTL = 60 * 60
+SEMANTIC_CACHE_MAX_ENTRIES = 512
+
+
+def _unit(embedding: list[float]) -> np.ndarray:
+    vector = np.asarray(embedding, dtype=np.float32)
+    norm = float(np.linalg.norm(vector))
+    return vector / norm if norm else vector
+
+
+class SemanticCache:
+    """Results for earlier queries whose embedding is close enough to a new one.
+
+    One per retriever, like ExactCache.
+    """
+
+    def __init__(self) -> None:
+        # Filter key (limit, category, chunk_type) -> (unit-norm embedding matrix, [(expires_at, results)]).
+        # Results are only ever compared within the same filters, so a hit can't leak
+        # chunks from another category or return fewer hits than asked for.
+        self._buckets: dict[tuple, tuple[np.ndarray, list[tuple[float, list[dict]]]]] = {}
+
+    def get(self, embedding: list[float], filter_key: tuple) -> Optional[list[dict]]:
+        """Return cached results for the most similar earlier query, if close enough."""
+        return self.get_many([embedding], filter_key)[0]
+
+    def get_many(self, embeddings: list[list[float]], filter_key: tuple) -> list[Optional[list[dict]]]:
+        """Batch version of get: scores all embeddings against the cache in one product."""
+        misses: list[Optional[list[dict]]] = [None] * len(embeddings)
+        if SEMANTIC_CACHE_THRESHOLD <= 0 or not embeddings:
+            return misses
+        bucket = self._buckets.get(filter_key)
+        if bucket is None:
+            return misses
+        matrix, entries = bucket
+        queries = np.asarray(embeddings, dtype=np.float32)
+        norms = np.linalg.norm(queries, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        scores = (queries / norms) @ matrix.T
+        best = scores.argmax(axis=1)
+        now = time.monotonic()
+        for row, index in enumerate(best):
+            if scores[row, index] >= SEMANTIC_CACHE_THRESHOLD:
+                expires_at, results = entries[index]
+                if expires_at >= now:
+                    misses[row] = results
+        return misses
+
+    def set(self, embedding: list[float], filter_key: tuple, results: list[dict]) -> None:
+        """Remember `results` for this query embedding and filters."""
+        if SEMANTIC_CACHE_THRESHOLD <= 0:
+            return
+        now = time.monotonic()
+        matrix, entries = self._buckets.get(filter_key, (None, []))
+        # Drop expired entries and, past the size cap, the oldest ones.
+        keep = [i for i, (expires_at, _) in enumerate(entries) if expires_at >= now]
+        keep = keep[-(SEMANTIC_CACHE_MAX_ENTRIES - 1):] if SEMANTIC_CACHE_MAX_ENTRIES > 1 else []
+        vector = _unit(embedding)[None, :]
+        if keep and matrix is not None:
+            matrix = np.vstack([matrix[keep], vector])
+        else:
+            matrix = vector
+        entries = [entries[i] for i in keep] + [(now + SEMANTIC_CACHE_TTL, results)]
+        self._buckets[filter_key] = (matrix, entries)
+
+    def clear(self) -> None:
+        self._buckets.clear()
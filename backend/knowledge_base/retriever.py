@@ -1,6 +1,13 @@
 """Qdrant-based retriever for DSA knowledge base."""
+import asyncio
+import hashlib
 import os
-from qdrant_client import QdrantClient
+import threading
+import weakref
+from collections import OrderedDict
+
+import numpy as np
+from qdrant_client import AsyncQdrantClient, QdrantClient
 from qdrant_client.models import (
     Distance,
     PointStruct,
@@ -8,9 +15,16 @@ from qdrant_client.models import (
     Filter,
     FieldCondition,
     MatchValue,
+    QuantizationSearchParams,
+    QueryRequest,
+    ScalarQuantization,
+    ScalarQuantizationConfig,
+    ScalarType,
+    SearchParams,
 )
-from openai import OpenAI
+from openai import AsyncOpenAI, OpenAI
 
+from . import query_cache
 from .models import ArticleChunk
 
 
@@ -19,6 +33,90 @@ COLLECTION_NAME = "dsa_articles"
 # available to your OpenAI account, e.g. "text-embedding-ada-002".
 EMBEDDING_MODEL = os.getenv("OPENAI_EMBEDDING_MODEL", "text-embedding-3-small")
 EMBEDDING_DIM = 1536
+# gRPC (port 6334) is cheaper per request than REST under concurrent load.
+QDRANT_PREFER_GRPC = os.getenv("QDRANT_PREFER_GRPC", "false").lower() == "true"
+QDRANT_POOL_SIZE = int(os.getenv("QDRANT_POOL_SIZE", "100"))
+QDRANT_TIMEOUT = int(os.getenv("QDRANT_TIMEOUT", "60"))
+
+# Query embeddings kept per retriever, keyed by SHA-256 of the query text. Stored
+# as float32 arrays (~6 KB each) rather than lists of Python floats (~49 KB each).
+EMBEDDING_CACHE_MAX_ENTRIES = 10_000
+
+# HNSW walks the int8-quantized vectors; the oversampled candidates are then
+# rescored with the original float vectors, so ranking precision is kept.
+SEARCH_PARAMS = SearchParams(
+    quantization=QuantizationSearchParams(rescore=True, oversampling=2.0),
+)
+
+# Async embedding calls arriving within this window of each other (up to
+# EMBED_BATCH_MAX_TEXTS texts) go to the API as one request; see _EmbedBatcher.
+EMBED_BATCH_WINDOW = 0.005
+EMBED_BATCH_MAX_TEXTS = 32
+
+# Payload fields read by _hit_to_dict; the indexing-only ones (id, article_number)
+# and the vectors are left on the server.
+SEARCH_PAYLOAD_FIELDS = ["title", "content", "section", "category", "chunk_type"]
+
+# Cap on concurrent async Qdrant searches per event loop. Bursts beyond this queue
+# here instead of piling connections onto Qdrant, which degrades everyone's latency.
+QDRANT_MAX_CONCURRENCY = int(os.getenv("QDRANT_MAX_CONCURRENCY", "32"))
+_qdrant_semaphores: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+# Shared retrievers per event loop (async clients are bound to the loop that
+# created them), keyed by (qdrant_url, qdrant_api_key, openai_api_key).
+_retrievers: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+
+class _EmbedBatcher:
+    """Coalesces concurrent embedding calls into one API request.
+
+    The first call opens a batch and waits EMBED_BATCH_WINDOW for others to join
+    (or until EMBED_BATCH_MAX_TEXTS texts are waiting); then all texts are sent
+    in one request and each caller gets its own slice of the result.
+    """
+
+    def __init__(self, embed):
+        self._embed = embed
+        self._pending: list[tuple[list[str], asyncio.Future]] = []
+        self._pending_texts = 0
+        self._flush_handle: asyncio.TimerHandle | None = None
+        # Keeps in-flight batch tasks referenced until they finish.
+        self._tasks: set[asyncio.Task] = set()
+
+    async def embed(self, texts: list[str]) -> list[list[float]]:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((texts, future))
+        self._pending_texts += len(texts)
+        if self._pending_texts >= EMBED_BATCH_MAX_TEXTS:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(EMBED_BATCH_WINDOW, self._flush)
+        return await future
+
+    def _flush(self) -> None:
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        pending, self._pending, self._pending_texts = self._pending, [], 0
+        task = asyncio.ensure_future(self._run(pending))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, pending: list[tuple[list[str], asyncio.Future]]) -> None:
+        try:
+            embeddings = await self._embed([text for texts, _ in pending for text in texts])
+        except Exception as e:
+            for _, future in pending:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        offset = 0
+        for texts, future in pending:
+            # A caller may have been cancelled while waiting.
+            if not future.done():
+                future.set_result(embeddings[offset : offset + len(texts)])
+            offset += len(texts)
 
 
 class DSARetriever:
@@ -30,10 +128,18 @@ class DSARetriever:
         qdrant_api_key: str | None = None,
         openai_api_key: str | None = None,
     ):
-        self.qdrant = QdrantClient(
-            url=qdrant_url or os.getenv("QDRANT_URL", "http://localhost:6333"),
-            api_key=qdrant_api_key or os.getenv("QDRANT_API_KEY") or None,
-        )
+        url = qdrant_url or os.getenv("QDRANT_URL", "http://localhost:6333")
+        qdrant_api_key = qdrant_api_key or os.getenv("QDRANT_API_KEY") or None
+        qdrant_params = {
+            "url": url,
+            "api_key": qdrant_api_key,
+            "prefer_grpc": QDRANT_PREFER_GRPC,
+            "timeout": QDRANT_TIMEOUT,
+        }
+        self.qdrant = QdrantClient(**qdrant_params)
+        # Async twins of both clients for callers on the event loop (agent tools),
+        # so searches don't tie up a worker thread while waiting on the network.
+        self.aqdrant = AsyncQdrantClient(**qdrant_params, pool_size=QDRANT_POOL_SIZE)
         # Initialize OpenAI client for embeddings.
         # Use a dedicated env var so we don't conflict with DeepSeek's OPENAI_API_KEY
         # or its custom OPENAI_BASE_URL.
@@ -45,11 +151,39 @@ class DSARetriever:
             api_key = os.getenv("OPENAI_API_KEY")
 
         self.openai = OpenAI(api_key=api_key, base_url=base_url)
+        self.aopenai = AsyncOpenAI(api_key=api_key, base_url=base_url)
+        # Set once ais_ready() has seen indexed data, so shared retrievers probe Qdrant only once.
+        self._ready = False
+        # The sync methods may run in worker threads, hence the lock.
+        self._embedding_cache: OrderedDict[bytes, np.ndarray] = OrderedDict()
+        self._embedding_lock = threading.Lock()
+        self._embed_batcher = _EmbedBatcher(self._aembed_now)
+        self._exact_cache = query_cache.ExactCache()
+        self._semantic_cache = query_cache.SemanticCache()
 
     def is_ready(self) -> bool:
         """Check if the knowledge base is ready for queries."""
         return self.collection_has_data()
 
+    async def ais_ready(self) -> bool:
+        """Async version of is_ready; remembers a positive answer."""
+        if self._ready:
+            return True
+        try:
+            # A missing collection raises, so one call answers both questions.
+            info = await self.aqdrant.get_collection(COLLECTION_NAME)
+        except Exception:
+            return False
+        self._ready = bool(info.points_count)
+        return self._ready
+
+    async def aclose(self) -> None:
+        """Close the clients."""
+        await self.aqdrant.close()
+        await self.aopenai.close()
+        self.qdrant.close()
+        self.openai.close()
+
     def collection_exists(self) -> bool:
         """Check if the collection exists."""
         try:
@@ -60,13 +194,11 @@ class DSARetriever:
 
     def collection_has_data(self) -> bool:
         """Check if the collection has indexed data."""
-        if not self.collection_exists():
-            return False
         try:
             info = self.qdrant.get_collection(COLLECTION_NAME)
-            return info.points_count > 0
         except Exception:
             return False
+        return bool(info.points_count)
 
     def create_collection(self, force: bool = False) -> None:
         """
@@ -78,13 +210,72 @@ class DSARetriever:
         if force or not self.collection_exists():
             self.qdrant.recreate_collection(
                 collection_name=COLLECTION_NAME,
-                vectors_config=VectorParams(size=EMBEDDING_DIM, distance=Distance.COSINE),
+                # Vectors are unit-normalized by _embed, so dot product == cosine
+                # without Qdrant normalizing anything itself.
+                vectors_config=VectorParams(size=EMBEDDING_DIM, distance=Distance.DOT),
+                # int8 copies are 4x smaller than float32, so search touches far less memory.
+                quantization_config=ScalarQuantization(
+                    scalar=ScalarQuantizationConfig(type=ScalarType.INT8, always_ram=True),
+                ),
             )
 
     def _embed(self, texts: list[str]) -> list[list[float]]:
         """Generate embeddings for texts."""
         response = self.openai.embeddings.create(model=EMBEDDING_MODEL, input=texts)
-        return [item.embedding for item in response.data]
+        return _normalize([item.embedding for item in response.data])
+
+    async def _aembed(self, texts: list[str]) -> list[list[float]]:
+        """Async version of _embed; concurrent calls share one API request."""
+        return await self._embed_batcher.embed(texts)
+
+    async def _aembed_now(self, texts: list[str]) -> list[list[float]]:
+        response = await self.aopenai.embeddings.create(model=EMBEDDING_MODEL, input=texts)
+        return _normalize([item.embedding for item in response.data])
+
+    def _cached_query_embeddings(self, queries: list[str]) -> tuple[list[bytes], list[list[float] | None]]:
+        """Look queries up in the embedding cache; misses come back as None."""
+        keys = [hashlib.sha256(query.encode("utf-8")).digest() for query in queries]
+        embeddings: list[list[float] | None] = []
+        with self._embedding_lock:
+            for key in keys:
+                cached = self._embedding_cache.get(key)
+                if cached is not None:
+                    self._embedding_cache.move_to_end(key)
+                    embeddings.append(cached.tolist())
+                else:
+                    embeddings.append(None)
+        return keys, embeddings
+
+    def _remember_query_embeddings(self, keys: list[bytes], embeddings: list[list[float]]) -> None:
+        """Add freshly computed query embeddings to the cache."""
+        with self._embedding_lock:
+            for key, embedding in zip(keys, embeddings):
+                self._embedding_cache[key] = np.asarray(embedding, dtype=np.float32)
+                self._embedding_cache.move_to_end(key)
+            while len(self._embedding_cache) > EMBEDDING_CACHE_MAX_ENTRIES:
+                self._embedding_cache.popitem(last=False)
+
+    def _embed_queries(self, queries: list[str]) -> list[list[float]]:
+        """_embed for search queries, skipping the API for queries seen before."""
+        keys, embeddings = self._cached_query_embeddings(queries)
+        missing = [i for i, embedding in enumerate(embeddings) if embedding is None]
+        if missing:
+            fresh = self._embed([queries[i] for i in missing])
+            self._remember_query_embeddings([keys[i] for i in missing], fresh)
+            for i, embedding in zip(missing, fresh):
+                embeddings[i] = embedding
+        return embeddings
+
+    async def _aembed_queries(self, queries: list[str]) -> list[list[float]]:
+        """Async version of _embed_queries."""
+        keys, embeddings = self._cached_query_embeddings(queries)
+        missing = [i for i, embedding in enumerate(embeddings) if embedding is None]
+        if missing:
+            fresh = await self._aembed([queries[i] for i in missing])
+            self._remember_query_embeddings([keys[i] for i in missing], fresh)
+            for i, embedding in zip(missing, fresh):
+                embeddings[i] = embedding
+        return embeddings
 
     def index_chunks(self, chunks: list[ArticleChunk], batch_size: int = 32) -> None:
         """Index article chunks into Qdrant."""
@@ -112,6 +303,9 @@ class DSARetriever:
 
             self.qdrant.upsert(collection_name=COLLECTION_NAME, points=points)
 
+        self._exact_cache.clear()
+        self._semantic_cache.clear()
+
     def get_dsa_context(
         self,
         query: str,
@@ -131,39 +325,204 @@ class DSARetriever:
         Returns:
             List of relevant chunks with scores
         """
-        query_embedding = self._embed([query])[0]
+        key = query_cache.exact_key(query, limit, category, chunk_type)
+        cached = self._exact_cache.get(key)
+        if cached is not None:
+            return cached
 
-        # Build filter if specified
-        filter_conditions = []
-        if category:
-            filter_conditions.append(
-                FieldCondition(key="category", match=MatchValue(value=category))
-            )
-        if chunk_type:
-            filter_conditions.append(
-                FieldCondition(key="chunk_type", match=MatchValue(value=chunk_type))
-            )
-
-        search_filter = Filter(must=filter_conditions) if filter_conditions else None
+        query_embedding = self._embed_queries([query])[0]
+        filter_key = (limit, category, chunk_type)
+        cached = self._semantic_cache.get(query_embedding, filter_key)
+        if cached is not None:
+            self._exact_cache.set(key, cached)
+            return cached
 
         # Use query_points for newer qdrant-client versions
         response = self.qdrant.query_points(
             collection_name=COLLECTION_NAME,
             query=query_embedding,
             limit=limit,
-            query_filter=search_filter,
+            query_filter=_build_filter(category, chunk_type),
+            search_params=SEARCH_PARAMS,
+            with_payload=SEARCH_PAYLOAD_FIELDS,
+            with_vectors=False,
+        )
+
+        results = [_hit_to_dict(hit) for hit in response.points]
+        self._exact_cache.set(key, results)
+        self._semantic_cache.set(query_embedding, filter_key, results)
+        return results
+
+    async def aget_dsa_context(
+        self,
+        query: str,
+        limit: int = 5,
+        category: str | None = None,
+        chunk_type: str | None = None,
+    ) -> list[dict]:
+        """Async version of get_dsa_context."""
+        key = query_cache.exact_key(query, limit, category, chunk_type)
+        cached = self._exact_cache.get(key)
+        if cached is not None:
+            return cached
+
+        query_embedding = (await self._aembed_queries([query]))[0]
+        filter_key = (limit, category, chunk_type)
+        cached = self._semantic_cache.get(query_embedding, filter_key)
+        if cached is not None:
+            self._exact_cache.set(key, cached)
+            return cached
+
+        async with _qdrant_slots():
+            response = await self.aqdrant.query_points(
+                collection_name=COLLECTION_NAME,
+                query=query_embedding,
+                limit=limit,
+                query_filter=_build_filter(category, chunk_type),
+                search_params=SEARCH_PARAMS,
+                with_payload=SEARCH_PAYLOAD_FIELDS,
+                with_vectors=False,
+            )
+
+        results = [_hit_to_dict(hit) for hit in response.points]
+        self._exact_cache.set(key, results)
+        self._semantic_cache.set(query_embedding, filter_key, results)
+        return results
+
+    async def aget_dsa_context_batch(
+        self,
+        queries: list[str],
+        limit: int = 5,
+        category: str | None = None,
+        chunk_type: str | None = None,
+    ) -> list[list[dict]]:
+        """
+        Retrieve DSA context for several queries at once.
+
+        Uncached queries share one embedding call and one Qdrant round-trip
+        (query_batch_points), instead of one of each per query.
+
+        Returns:
+            One result list per query, in the same order
+        """
+        keys = [query_cache.exact_key(query, limit, category, chunk_type) for query in queries]
+        results: list[list[dict] | None] = [self._exact_cache.get(key) for key in keys]
+        missing = [i for i, cached in enumerate(results) if cached is None]
+        if not missing:
+            return results
+
+        embeddings = await self._aembed_queries([queries[i] for i in missing])
+        filter_key = (limit, category, chunk_type)
+        to_search = []
+        semantic_hits = self._semantic_cache.get_many(embeddings, filter_key)
+        for i, embedding, cached in zip(missing, embeddings, semantic_hits):
+            if cached is not None:
+                self._exact_cache.set(keys[i], cached)
+                results[i] = cached
+            else:
+                to_search.append((i, embedding))
+
+        if to_search:
+            search_filter = _build_filter(category, chunk_type)
+            requests = [
+                QueryRequest(
+                    query=embedding,
+                    limit=limit,
+                    filter=search_filter,
+                    params=SEARCH_PARAMS,
+                    with_payload=SEARCH_PAYLOAD_FIELDS,
+                    with_vector=False,
+                )
+                for _, embedding in to_search
+            ]
+            async with _qdrant_slots():
+                responses = await self.aqdrant.query_batch_points(
+                    collection_name=COLLECTION_NAME,
+                    requests=requests,
+                )
+            for (i, embedding), response in zip(to_search, responses):
+                hits = [_hit_to_dict(hit) for hit in response.points]
+                self._exact_cache.set(keys[i], hits)
+                self._semantic_cache.set(embedding, filter_key, hits)
+                results[i] = hits
+
+        return results
+
+
+def _qdrant_slots() -> asyncio.Semaphore:
+    """Return the running loop's semaphore limiting concurrent Qdrant searches."""
+    loop = asyncio.get_running_loop()
+    semaphore = _qdrant_semaphores.get(loop)
+    if semaphore is None:
+        semaphore = _qdrant_semaphores[loop] = asyncio.Semaphore(QDRANT_MAX_CONCURRENCY)
+    return semaphore
+
+
+def get_retriever(
+    qdrant_url: str | None = None,
+    qdrant_api_key: str | None = None,
+    openai_api_key: str | None = None,
+) -> DSARetriever:
+    """Return the shared retriever for these credentials on the running loop.
+
+    Keeps the Qdrant and OpenAI connection pools alive across queries instead of
+    building (and tearing down) clients per call. Call close_retrievers() at shutdown.
+    """
+    loop = asyncio.get_running_loop()
+    retrievers = _retrievers.get(loop)
+    if retrievers is None:
+        retrievers = _retrievers[loop] = {}
+    key = (qdrant_url, qdrant_api_key, openai_api_key)
+    retriever = retrievers.get(key)
+    if retriever is None:
+        retriever = retrievers[key] = DSARetriever(
+            qdrant_url=qdrant_url,
+            qdrant_api_key=qdrant_api_key,
+            openai_api_key=openai_api_key,
         )
+    return retriever
+
+
+async def close_retrievers() -> None:
+    """Close the shared retrievers of the running loop (call at shutdown)."""
+    retrievers = _retrievers.pop(asyncio.get_running_loop(), {})
+    for retriever in retrievers.values():
+        await retriever.aclose()
+
+
+def _normalize(embeddings: list[list[float]]) -> list[list[float]]:
+    """Scale embeddings to unit length (OpenAI's already are; other endpoints may not be)."""
+    vectors = np.asarray(embeddings, dtype=np.float64)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (vectors / norms).tolist()
+
+
+def _build_filter(category: str | None, chunk_type: str | None) -> Filter | None:
+    """Build the Qdrant payload filter for the optional category/chunk_type."""
+    filter_conditions = []
+    if category:
+        filter_conditions.append(
+            FieldCondition(key="category", match=MatchValue(value=category))
+        )
+    if chunk_type:
+        filter_conditions.append(
+            FieldCondition(key="chunk_type", match=MatchValue(value=chunk_type))
+        )
+    return Filter(must=filter_conditions) if filter_conditions else None
+
 
-        return [
-            {
-                "id": str(hit.id),
-                "title": hit.payload.get("title", "") if isinstance(hit.payload, dict) else "",
-                "content": hit.payload.get("content", "") if isinstance(hit.payload, dict) else "",
-                "section": hit.payload.get("section", "") if isinstance(hit.payload, dict) else "",
-                "category": hit.payload.get("category", "") if isinstance(hit.payload, dict) else "",
-                "chunk_type": hit.payload.get("chunk_type", "") if isinstance(hit.payload, dict) else "",
-                "score": float(hit.score),
-            }
-            for hit in response.points
-        ]
+def _hit_to_dict(hit) -> dict:
+    """Flatten a scored Qdrant point into the dict returned by get_dsa_context."""
+    payload = hit.payload if isinstance(hit.payload, dict) else {}
+    get = payload.get
+    return {
+        "id": str(hit.id),
+        "title": get("title", ""),
+        "content": get("content", ""),
+        "section": get("section", ""),
+        "category": get("category", ""),
+        "chunk_type": get("chunk_type", ""),
+        "score": float(hit.score),
+    }
 
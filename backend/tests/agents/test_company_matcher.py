@@ -52,14 +52,45 @@ class TestCompanyMatcherNodes:
         
         assert result["country_of_establishment"] == ""
 
+    @pytest.mark.asyncio
+    async def test_prepare_prompt_matches_template_render(self, human_message):
+        """Test the pre-rendered prompt equals a full Jinja render."""
+        from company_matcher.graph import (
+            MAX_ITERATIONS,
+            MAX_QUERIES_PER_CALL,
+            MAX_SUGGESTIONS,
+            load_prompt,
+            prepare_prompt,
+        )
+        
+        state = {
+            "messages": [human_message],
+            "country_of_establishment": "Belgium",
+        }
+        
+        result = await prepare_prompt(state)
+        expected = load_prompt(
+            "prompt.jinja",
+            company_name="Acme Corporation",
+            country_of_establishment="Belgium",
+            max_iterations=MAX_ITERATIONS,
+            max_suggestions=MAX_SUGGESTIONS,
+            max_queries_per_call=MAX_QUERIES_PER_CALL,
+        )
+        
+        assert result["messages"][0].content == expected
+        assert "\x00" not in result["messages"][0].content
+
     @pytest.mark.asyncio
     async def test_run_agent_calls_llm(self, human_message, mock_chat_openai):
         """Test run_agent invokes LLM with tools."""
-        from company_matcher.graph import run_agent
+        from company_matcher.graph import _get_bound_model, run_agent
         
+        _get_bound_model.cache_clear()
         with patch("company_matcher.graph.ChatOpenAI", return_value=mock_chat_openai):
             state = {"messages": [human_message]}
             result = await run_agent(state)
+        _get_bound_model.cache_clear()
         
         assert "messages" in result
         assert len(result["messages"]) == 1
@@ -168,6 +199,57 @@ class TestCompanyMatcherNodes:
         assert not parsed.get("exact_match")
         assert parsed["suggestions"] == []
 
+    @pytest.mark.asyncio
+    async def test_finalize_result_drops_incomplete_matches(self):
+        """Test matches missing a required field are dropped and the rest validated."""
+        from company_matcher.graph import finalize_result
+        from langchain_core.messages import AIMessage
+        
+        json_content = json.dumps({
+            "exact_match": {"top_domain": "nameless.com", "confidence": "exact"},
+            "suggestions": [
+                {"name": "Other", "url": "https://other.com", "confidence": "low", "description": "Short.", "extra": "dropped"},
+                {"name": "No Domain", "confidence": "low"},
+            ],
+        })
+        state = {
+            "company_name": "Test Corp",
+            "messages": [AIMessage(content=json_content)],
+        }
+        
+        result = await finalize_result(state)
+        
+        parsed = json.loads(result["match_result"])
+        assert "exact_match" not in parsed
+        assert parsed["suggestions"] == [{
+            "name": "Other",
+            "top_domain": "other.com",
+            "confidence": "low",
+            "summary_short": "Short.",
+            "summary_long": "Short.",
+        }]
+
+    @pytest.mark.asyncio
+    async def test_finalize_result_strict_output_validates(self):
+        """Test finalize_result validates the payload when STRICT_OUTPUT is enabled."""
+        from company_matcher.graph import finalize_result
+        from langchain_core.messages import AIMessage
+        from pydantic import ValidationError
+        
+        json_content = json.dumps({
+            "exact_match": {"top_domain": "nameless.com", "confidence": "exact"},
+            "suggestions": [],
+        })
+        
+        state = {
+            "company_name": "Nameless",
+            "messages": [AIMessage(content=json_content)],
+        }
+        
+        with patch("company_matcher.graph.STRICT_OUTPUT", True):
+            with pytest.raises(ValidationError):
+                await finalize_result(state)
+
 
 class TestCompanyMatcherTools:
     """Tests for company_matcher tool definitions."""
@@ -5,6 +5,19 @@ import pytest
 from unittest.mock import AsyncMock, MagicMock, patch
 
 
+def _streaming_model(text: str, chunk_size: int = 7) -> MagicMock:
+    """Mock chat model whose astream yields `text` in small AIMessageChunks."""
+    from langchain_core.messages import AIMessageChunk
+    
+    async def astream(messages, config=None):
+        for i in range(0, len(text), chunk_size):
+            yield AIMessageChunk(content=text[i : i + chunk_size])
+    
+    model = MagicMock()
+    model.astream = MagicMock(side_effect=astream)
+    return model
+
+
 class TestCompanyResearcherNodes:
     """Tests for company_researcher graph nodes."""
 
@@ -61,9 +74,10 @@ class TestCompanyResearcherNodes:
         assert result["completed_answers"]["type"] == "override"
         assert result["completed_answers"]["value"] == []
 
-    def test_dispatch_research_creates_sends(self):
-        """Test dispatch_research creates Send objects for each question."""
-        from company_researcher.graph import dispatch_research
+    @pytest.mark.asyncio
+    async def test_research_all_collects_answers_in_order(self):
+        """Test research_all researches each question and keeps question order."""
+        from company_researcher import graph
         
         state = {
             "subquestions": [
@@ -75,12 +89,68 @@ class TestCompanyResearcherNodes:
             "summary_long": "Description",
         }
         
-        sends = dispatch_research(state)
+        async def fake_research(sub_state, config=None):
+            return {"question": sub_state["question"]}
+        
+        with patch.object(graph, "research_question", new=AsyncMock(side_effect=fake_research)) as mock_invoke:
+            result = await graph.research_all(state)
+        
+        assert mock_invoke.call_count == 2
+        assert result["completed_answers"]["type"] == "override"
+        assert [a["question"] for a in result["completed_answers"]["value"]] == ["Q1?", "Q2?"]
+
+    @pytest.mark.asyncio
+    async def test_research_all_cancels_other_questions_on_failure(self):
+        """Test a failing sub-question cancels the ones still running and re-raises."""
+        import asyncio
+        from company_researcher import graph
         
-        assert len(sends) == 2
-        # Each Send should target "research_question"
-        for send in sends:
-            assert send.node == "research_question"
+        state = {
+            "subquestions": [{"question": f"Q{i}?", "section": "SEC"} for i in range(3)],
+            "company_name": "TestCorp",
+        }
+        cancelled = []
+        
+        async def fake_research(sub_state, config=None):
+            if sub_state["question"] == "Q1?":
+                await asyncio.sleep(0)
+                raise RuntimeError("LLM unavailable")
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.append(sub_state["question"])
+                raise
+        
+        with patch.object(graph, "research_question", new=fake_research):
+            with pytest.raises(RuntimeError, match="LLM unavailable"):
+                await asyncio.wait_for(graph.research_all(state), 1)
+        
+        assert sorted(cancelled) == ["Q0?", "Q2?"]
+
+    @pytest.mark.asyncio
+    async def test_research_all_resolves_credentials_once(self):
+        """Test research_all hands the resolved credentials to every sub-question."""
+        from company_researcher import graph
+        
+        state = {
+            "subquestions": [
+                {"question": "Q1?", "section": "SEC1"},
+                {"question": "Q2?", "section": "SEC2"},
+            ],
+            "company_name": "TestCorp",
+        }
+        config = {"configurable": {"apiKeys": {"OPENAI_BASE_URL": "https://llm.example"}}}
+        
+        with patch.object(graph, "research_question", new=AsyncMock(return_value={})) as mock_invoke, \
+             patch.object(graph, "get_api_key_for_model", return_value="sk-test") as mock_key:
+            await graph.research_all(state, config)
+        
+        assert mock_key.call_count == 2
+        for call in mock_invoke.call_args_list:
+            sub_state = call.args[0]
+            assert sub_state["research_api_key"] == "sk-test"
+            assert sub_state["summarization_api_key"] == "sk-test"
+            assert sub_state["base_url"] == "https://llm.example"
 
     def test_should_continue_with_tools_no_tool_calls(self):
         """Test should_continue_with_tools returns summarize when no tool calls."""
@@ -149,6 +219,200 @@ class TestCompanyResearcherNodes:
         
         assert result == "tools"
 
+    def test_should_continue_with_tools_multiple_calls(self):
+        """Test should_continue_with_tools only summarizes when every call is finish_research."""
+        from company_researcher.graph import should_continue_with_tools
+        from langchain_core.messages import AIMessage
+        
+        search = {"name": "web_search", "id": "1", "args": {"queries": ["test"]}}
+        finish = {"name": "finish_research", "id": "2", "args": {"summary": "done"}}
+        
+        mixed = {"messages": [AIMessage(content="", tool_calls=[search, finish])], "iterations": 0}
+        finished = {"messages": [AIMessage(content="", tool_calls=[finish, {**finish, "id": "3"}])], "iterations": 0}
+        
+        assert should_continue_with_tools(mixed) == "tools"
+        assert should_continue_with_tools(finished) == "summarize"
+
+    @pytest.mark.asyncio
+    async def test_research_agent_bounds_parallel_llm_calls(self):
+        """Test research_agent calls share the max_parallel_llm_calls semaphore."""
+        import asyncio
+        from company_researcher import graph
+        from langchain_core.messages import AIMessage, HumanMessage
+        
+        in_flight = 0
+        peak = 0
+        
+        async def slow_invoke(messages, config=None):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            return AIMessage(content="done")
+        
+        mock_model = MagicMock()
+        mock_model.ainvoke = slow_invoke
+        config = {"configurable": {"max_parallel_llm_calls": 2}}
+        state = {"messages": [HumanMessage(content="prompt")]}
+        
+        with patch.object(graph, "_get_research_model", return_value=mock_model):
+            await asyncio.gather(*(graph.research_agent(state, config) for _ in range(6)))
+        
+        assert peak == 2
+
+    @pytest.mark.asyncio
+    async def test_summarize_and_format_parses_fields(self):
+        """Test summarize_and_format extracts the labelled fields from the summary."""
+        from company_researcher import graph
+        from company_researcher.models import SubQuestionAnswer
+        from langchain_core.messages import AIMessage
+        
+        summary = AIMessage(content=(
+            "information_found: yes\n"
+            "ANSWER: Headquartered in Belgium: Brussels\n"
+            "SOURCE: acme.com\n"
+            "CONFIDENCE: High"
+        ))
+        mock_model = _streaming_model(summary.content)
+        
+        state = {
+            "messages": [AIMessage(content="trace")],
+            "question": "Where is the HQ?",
+            "section": "GEOGRAPHICAL SCOPE",
+            "company_name": "Acme",
+        }
+        
+        with patch.object(graph, "_get_chat_model", return_value=mock_model):
+            result = await graph.summarize_and_format(state)
+        
+        answer = result
+        system, human = mock_model.astream.call_args.args[0]
+        assert system.type == "system" and "INFORMATION_FOUND" in system.content
+        assert human.content.rstrip().endswith("trace")
+        assert list(answer) == list(SubQuestionAnswer.model_fields)
+        assert answer["answer"] == "Headquartered in Belgium: Brussels"
+        assert answer["source"] == "acme.com"
+        assert answer["confidence"] == "High"
+        assert answer["information_found"] is True
+
+    @pytest.mark.asyncio
+    async def test_summarize_and_format_reads_whole_stream(self):
+        """Test the summarizer consumes the stream to the end instead of closing it early."""
+        from company_researcher import graph
+        from langchain_core.messages import AIMessage, AIMessageChunk
+        
+        consumed = []
+        closed = []
+        
+        async def astream(messages, config=None):
+            try:
+                for piece in ["INFORMATION_FOUND: Yes\nANSWER: Brussels\n", "SOURCE: acme.com\nCONFIDENCE: High", "\n", "trailing chatter"]:
+                    consumed.append(piece)
+                    yield AIMessageChunk(content=piece)
+            finally:
+                closed.append(True)
+        
+        mock_model = MagicMock()
+        mock_model.astream = MagicMock(side_effect=astream)
+        state = {
+            "messages": [AIMessage(content="trace")],
+            "question": "Where is the HQ?",
+            "section": "GEOGRAPHICAL SCOPE",
+            "company_name": "Acme",
+        }
+        
+        with patch.object(graph, "_get_chat_model", return_value=mock_model):
+            answer = await graph.summarize_and_format(state)
+        
+        assert consumed[-1] == "trailing chatter"
+        assert closed == [True]
+        assert answer["confidence"] == "High"
+        assert answer["answer"] == "Brussels"
+
+    @pytest.mark.asyncio
+    async def test_summarize_and_format_keeps_fields_when_stream_fails(self, caplog):
+        """Test lines completed before a mid-stream error are used, the cut-off one isn't, and the error is logged."""
+        from company_researcher import graph
+        from langchain_core.messages import AIMessage, AIMessageChunk
+        
+        async def astream(messages, config=None):
+            yield AIMessageChunk(content="INFORMATION_FOUND: Yes\nANSWER: Brussels\nCONFIDENCE: Hi")
+            raise ConnectionError("stream reset")
+        
+        mock_model = MagicMock()
+        mock_model.astream = MagicMock(side_effect=astream)
+        state = {
+            "messages": [AIMessage(content="trace")],
+            "question": "Where is the HQ?",
+            "section": "GEOGRAPHICAL SCOPE",
+            "company_name": "Acme",
+        }
+        
+        with patch.object(graph, "_get_chat_model", return_value=mock_model):
+            answer = await graph.summarize_and_format(state)
+        
+        assert answer["answer"] == "Brussels"
+        assert answer["information_found"] is True
+        assert answer["confidence"] != "Hi"
+        assert "stream reset" in caplog.text
+
+    @pytest.mark.asyncio
+    async def test_summarize_and_format_bounds_trace(self):
+        """Test the trace stops at MAX_TRACE_CHARS but still records the final summary."""
+        from company_researcher import graph
+        from langchain_core.messages import AIMessage, ToolMessage
+        
+        finish = AIMessage(content="cccc", tool_calls=[{"name": "finish_research", "id": "1", "args": {"summary": "done"}}])
+        state = {
+            "messages": [AIMessage(content="aaaa"), ToolMessage(content="bbbbbb", tool_call_id="0"), finish],
+            "question": "Q?",
+            "section": "S",
+            "company_name": "Acme",
+        }
+        mock_model = _streaming_model("INFORMATION_FOUND: Yes\nANSWER: A\nSOURCE: acme.com\nCONFIDENCE: High\n")
+        
+        with patch.object(graph, "_get_chat_model", return_value=mock_model), \
+             patch.object(graph, "MAX_TRACE_CHARS", 10):
+            answer = await graph.summarize_and_format(state)
+        
+        assert answer["raw_research"] == "aaaa\n\nbbbb\n\nFINAL AGENT SUMMARY: done"
+        
+        with patch.object(graph, "_get_chat_model", return_value=mock_model), \
+             patch.object(graph, "RAW_RESEARCH_MAX_CHARS", 4):
+            answer = await graph.summarize_and_format(state)
+        
+        assert answer["raw_research"] == "aaaa"
+
+    @pytest.mark.asyncio
+    async def test_summarize_and_format_field_edge_cases(self):
+        """Test indented/lowercase labels, trailing whitespace and missing fields."""
+        from company_researcher import graph
+        from langchain_core.messages import AIMessage
+        
+        summary = AIMessage(content=(
+            "Here you go:\r\n"
+            "   answer :  Registered in Ireland.   \r\n"
+            "Confidence:Medium\t\n"
+        ))
+        mock_model = _streaming_model(summary.content)
+        
+        state = {
+            "messages": [AIMessage(content="see https://www.acme.ie/about")],
+            "question": "Where is it registered?",
+            "section": "GEOGRAPHICAL SCOPE",
+            "company_name": "Acme",
+        }
+        
+        with patch.object(graph, "_get_chat_model", return_value=mock_model):
+            answer = await graph.summarize_and_format(state)
+        
+        assert answer["answer"] == "Registered in Ireland."
+        assert answer["confidence"] == "Medium"
+        assert answer["information_found"] is True
+        # No SOURCE line: fall back to a domain found in the trace.
+        assert answer["source"] == "acme.ie"
+
     @pytest.mark.asyncio
     async def test_finalize_report_creates_json(self, sample_subquestion_answer):
         """Test finalize_report creates valid JSON report."""
@@ -166,6 +430,22 @@ class TestCompanyResearcherNodes:
         assert parsed["company_name"] == "TestCorp"
         assert len(parsed["answers"]) == 1
 
+    @pytest.mark.asyncio
+    async def test_finalize_report_validates_answers(self, sample_subquestion_answer):
+        """Test an answer missing a required field fails the report."""
+        from company_researcher.graph import finalize_report
+        from pydantic import ValidationError
+        
+        answer = dict(sample_subquestion_answer)
+        del answer["question"]
+        state = {
+            "company_name": "TestCorp",
+            "completed_answers": [answer],
+        }
+        
+        with pytest.raises(ValidationError):
+            await finalize_report(state)
+
 
 class TestCompanyResearcherTools:
     """Tests for company_researcher tool definitions."""
@@ -189,6 +469,20 @@ class TestCompanyResearcherTools:
         
         assert "Research complete" in result
 
+    @pytest.mark.asyncio
+    async def test_web_search_dedupes_queries(self):
+        """Test web_search drops case/whitespace duplicates before searching."""
+        from company_researcher import researcher
+        
+        with patch.object(researcher, "tavily_search_tool", new=AsyncMock(return_value="ok")) as mock_search, \
+             patch.dict("os.environ", {"MAX_SEARCH_QUERIES": "2"}):
+            await researcher.web_search.ainvoke(
+                {"queries": ["Acme HQ", "  acme   hq ", "Acme revenue"]},
+                {"configurable": {}},
+            )
+        
+        assert mock_search.call_args.kwargs["queries"] == ["Acme HQ", "Acme revenue"]
+
 
 class TestCompanyResearcherGraph:
     """Tests for company_researcher graph structure."""
@@ -199,8 +493,89 @@ class TestCompanyResearcherGraph:
         
         assert company_researcher is not None
 
-    def test_subgraph_compiles(self):
-        """Test research_subgraph compiles successfully."""
-        from company_researcher.graph import research_subgraph
+    @pytest.mark.asyncio
+    async def test_tools_with_iteration_counter_keeps_call_order(self):
+        """Test tool results come back in call order, with errors as ToolMessages."""
+        from company_researcher.graph import tools_with_iteration_counter
+        from langchain_core.messages import AIMessage
+        
+        calls = AIMessage(content="", tool_calls=[
+            {"name": "finish_research", "id": "1", "args": {"summary": "done"}},
+            {"name": "missing_tool", "id": "2", "args": {}},
+        ])
+        
+        result = await tools_with_iteration_counter({"messages": [calls], "iterations": 1})
+        
+        assert [m.tool_call_id for m in result["messages"]] == ["1", "2"]
+        assert "Research complete: done" in result["messages"][0].content
+        assert result["messages"][1].status == "error"
+        assert result["iterations"] == 2
+
+    @pytest.mark.asyncio
+    async def test_research_question_runs_tools_then_summarizes(self):
+        """Test research_question loops agent -> tools until finish_research, then summarizes."""
+        from company_researcher import graph
+        from langchain_core.messages import AIMessage, ToolMessage
+        
+        search_call = AIMessage(content="", tool_calls=[{"name": "web_search", "id": "1", "args": {"queries": ["q"]}}])
+        finish_call = AIMessage(content="", tool_calls=[{"name": "finish_research", "id": "2", "args": {"summary": "done"}}])
+        
+        async def fake_tools(state, config=None):
+            return {"messages": [ToolMessage(content="results", tool_call_id="1")], "iterations": state["iterations"] + 1}
+        
+        summarize = AsyncMock(return_value={"answer": "A"})
+        with patch.object(graph, "research_agent", new=AsyncMock(side_effect=[{"messages": [search_call]}, {"messages": [finish_call]}])), \
+             patch.object(graph, "tools_with_iteration_counter", new=AsyncMock(side_effect=fake_tools)), \
+             patch.object(graph, "summarize_and_format", new=summarize):
+            result = await graph.research_question({"messages": [], "iterations": 0})
+        
+        assert result == {"answer": "A"}
+        final_state = summarize.call_args.args[0]
+        assert [type(m).__name__ for m in final_state["messages"]] == ["AIMessage", "ToolMessage", "AIMessage"]
+        assert final_state["iterations"] == 1
+
+    @pytest.mark.asyncio
+    async def test_summarize_batch_answers_each_task(self):
+        """Test summarize_batch makes one call and maps answers back in task order."""
+        from company_researcher import graph
+        from langchain_core.messages import AIMessage
+        
+        states = [
+            {"question": f"Q{i}?", "section": f"SEC{i}", "company_name": "TestCorp",
+             "messages": [AIMessage(content=f"research {i}")]}
+            for i in range(3)
+        ]
+        mock_model = MagicMock()
+        mock_model.ainvoke = AsyncMock(return_value=AIMessage(content=json.dumps({"answers": [
+            {"information_found": "Yes", "answer": "Brussels", "source": "acme.com", "confidence": "High"},
+            {"information_found": "No", "answer": "?", "source": "?", "confidence": "High"},
+        ]})))
+        
+        with patch.object(graph, "_get_chat_model", return_value=mock_model):
+            answers = await graph.summarize_batch(states)
+        
+        assert mock_model.ainvoke.call_count == 1
+        prompt = mock_model.ainvoke.call_args.args[0][0].content
+        assert "research 2" in prompt and "**QUESTION:** Q1?" in prompt
+        assert [a["section"] for a in answers] == ["SEC0", "SEC1", "SEC2"]
+        assert answers[0]["answer"] == "Brussels" and answers[0]["information_found"] is True
+        assert answers[1]["answer"] == "Information not publicly available"
+        assert answers[2]["answer"] == "Unable to determine"
+
+    @pytest.mark.asyncio
+    async def test_summarize_batch_malformed_payload(self):
+        """Test JSON without an answers list gives every task the default answer."""
+        from company_researcher import graph
+        from langchain_core.messages import AIMessage
         
-        assert research_subgraph is not None
+        states = [
+            {"question": "Q?", "section": "SEC", "company_name": "TestCorp", "messages": [AIMessage(content="r")]}
+        ]
+        for content in ('["not", "an", "object"]', '{"answers": {"0": {}}}', "not json"):
+            mock_model = MagicMock()
+            mock_model.ainvoke = AsyncMock(return_value=AIMessage(content=content))
+            
+            with patch.object(graph, "_get_chat_model", return_value=mock_model):
+                answers = await graph.summarize_batch(states)
+            
+            assert [a["answer"] for a in answers] == ["Unable to determine"]
@@ -10,12 +10,14 @@ class TestMainAgentNodes:
     @pytest.mark.asyncio
     async def test_agent_calls_llm(self, human_message, mock_chat_openai):
         """Test agent node invokes LLM."""
-        from main_agent.graph import agent
+        from main_agent.graph import _get_bound_model, agent
         
+        _get_bound_model.cache_clear()
         with patch("main_agent.graph.ChatOpenAI", return_value=mock_chat_openai):
             with patch("main_agent.graph.get_all_tools", return_value=[]):
                 state = {"messages": [human_message], "frontend_context": None}
                 result = await agent(state)
+        _get_bound_model.cache_clear()
         
         assert "messages" in result
         assert len(result["messages"]) == 1
@@ -23,8 +25,9 @@ class TestMainAgentNodes:
     @pytest.mark.asyncio
     async def test_agent_includes_frontend_context(self, human_message, mock_chat_openai):
         """Test agent includes frontend_context in prompt."""
-        from main_agent.graph import agent
+        from main_agent.graph import _get_bound_model, agent
         
+        _get_bound_model.cache_clear()
         with patch("main_agent.graph.ChatOpenAI", return_value=mock_chat_openai):
             with patch("main_agent.graph.get_all_tools", return_value=[]):
                 state = {
@@ -32,6 +35,7 @@ class TestMainAgentNodes:
                     "frontend_context": "User is on step 2.",
                 }
                 result = await agent(state)
+        _get_bound_model.cache_clear()
         
         assert "messages" in result
 
@@ -77,6 +81,83 @@ class TestMainAgentTools:
         
         assert "retrieve_dsa_knowledge" in tool_names
 
+    @pytest.mark.asyncio
+    async def test_retrieve_dsa_knowledge_awaits_retriever(self):
+        """Test retrieve_dsa_knowledge uses the async retriever methods."""
+        from main_agent.tools import retrieve_dsa_knowledge
+        
+        retriever = MagicMock()
+        retriever.ais_ready = AsyncMock(return_value=True)
+        retriever.aget_dsa_context = AsyncMock(return_value=[
+            {"title": "Article 16", "category": "Hosting Service", "content": "Notice and action"},
+        ])
+        retriever.aclose = AsyncMock()
+        
+        with patch("main_agent.tools.get_dsa_retriever", return_value=retriever):
+            output = await retrieve_dsa_knowledge.ainvoke({"query": "notice", "category": "all", "limit": 20})
+        
+        assert "**1. Article 16**" in output
+        assert "Applies to: Hosting Service" in output
+        retriever.aget_dsa_context.assert_awaited_once_with(query="notice", limit=10, category=None)
+        retriever.get_dsa_context.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_retrieve_dsa_knowledge_batches_related_queries(self):
+        """Test related_queries are looked up in one batch call, capped at two extra."""
+        from main_agent.tools import retrieve_dsa_knowledge
+        
+        retriever = MagicMock()
+        retriever.ais_ready = AsyncMock(return_value=True)
+        retriever.aget_dsa_context_batch = AsyncMock(return_value=[
+            [{"title": "Article 16", "content": "Notice and action"}],
+            [],
+            [{"title": "Article 24", "content": "Transparency"}],
+        ])
+        
+        with patch("main_agent.tools.get_dsa_retriever", return_value=retriever):
+            output = await retrieve_dsa_knowledge.ainvoke({
+                "query": "notice",
+                "related_queries": ["statement of reasons", "transparency", "ignored"],
+            })
+        
+        retriever.aget_dsa_context_batch.assert_awaited_once_with(
+            ["notice", "statement of reasons", "transparency"], limit=5, category=None,
+        )
+        assert "DSA Results for: 'notice'" in output
+        assert "No DSA content found for: 'statement of reasons'" in output
+        assert "**1. Article 24**" in output
+
+
+    @pytest.mark.asyncio
+    async def test_retrieve_dsa_knowledge_rejects_bad_queries(self):
+        """Test empty or oversized queries are refused without touching the retriever."""
+        from main_agent.tools import MAX_DSA_QUERY_CHARS, retrieve_dsa_knowledge
+        
+        with patch("main_agent.tools.get_dsa_retriever") as get_retriever:
+            for args in (
+                {"query": "   "},
+                {"query": "x" * (MAX_DSA_QUERY_CHARS + 1)},
+                {"query": "notice", "related_queries": ["x" * (MAX_DSA_QUERY_CHARS + 1)]},
+            ):
+                output = await retrieve_dsa_knowledge.ainvoke(args)
+                assert output.startswith("Error: DSA queries must be between 1 and")
+        
+        get_retriever.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_retrieve_dsa_knowledge_clamps_limit(self):
+        """Test a non-positive limit is raised to one result."""
+        from main_agent.tools import retrieve_dsa_knowledge
+        
+        retriever = MagicMock()
+        retriever.ais_ready = AsyncMock(return_value=True)
+        retriever.aget_dsa_context = AsyncMock(return_value=[])
+        
+        with patch("main_agent.tools.get_dsa_retriever", return_value=retriever):
+            await retrieve_dsa_knowledge.ainvoke({"query": "notice", "limit": 0})
+        
+        retriever.aget_dsa_context.assert_awaited_once_with(query="notice", limit=1, category=None)
+
 
 class TestMainAgentGraph:
     """Tests for main_agent graph structure."""
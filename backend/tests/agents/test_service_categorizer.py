@@ -38,6 +38,21 @@ class TestServiceCategorizerNodes:
         assert "company_profile" in result
         assert "raw_input" in result["company_profile"]
 
+    @pytest.mark.asyncio
+    async def test_extract_profile_prefers_structured_profile(self, sample_company_profile):
+        """Test extract_profile uses a company_profile passed in state without parsing the message."""
+        from service_categorizer.graph import extract_profile
+        from langchain_core.messages import HumanMessage
+        
+        state = {
+            "messages": [HumanMessage(content="Not valid JSON")],
+            "company_profile": sample_company_profile,
+        }
+        
+        result = await extract_profile(state)
+        
+        assert result["company_profile"] is sample_company_profile
+
     @pytest.mark.asyncio
     async def test_classify_service_calls_llm(self, sample_company_profile, sample_classification):
         """Test classify_service invokes LLM."""
@@ -125,6 +140,47 @@ class TestServiceCategorizerNodes:
         assert parsed["company_name"] == "TechPlatform Inc"
 
 
+    @pytest.mark.asyncio
+    async def test_generate_report_keeps_unicode_and_indent(self, sample_classification):
+        """Test the report is indented JSON with non-ASCII text kept as-is."""
+        from service_categorizer.graph import generate_report
+        
+        mock_model = MagicMock()
+        mock_model.ainvoke = AsyncMock(return_value=MagicMock(content="Résumé"))
+        
+        with patch("service_categorizer.graph._get_model", return_value=mock_model):
+            result = await generate_report({
+                "company_profile": {"company_name": "Zürich AG"},
+                "classification": sample_classification,
+                "obligation_analyses": [],
+            })
+        
+        assert result["final_report"].startswith('{\n  "company_name": "Zürich AG"')
+        assert json.loads(result["final_report"])["summary"] == "Résumé"
+
+    @pytest.mark.asyncio
+    async def test_analyze_obligations_serializes_profile_once(self, sample_company_profile):
+        """Test every obligation prompt gets the profile, serialized a single time."""
+        from service_categorizer import graph
+        
+        mock_model = MagicMock()
+        mock_model.ainvoke = AsyncMock(return_value=MagicMock(content='{"applies": true}'))
+        obligations = [{"article": str(n), "title": f"Obligation {n}"} for n in range(7)]
+        
+        with patch.object(graph, "_get_model", return_value=mock_model), \
+             patch.object(graph.json, "dumps", wraps=json.dumps) as dumps:
+            result = await graph.analyze_obligations({
+                "company_profile": sample_company_profile,
+                "classification": {},
+                "obligations": obligations,
+            })
+        
+        assert len(result["obligation_analyses"]) == 7
+        assert dumps.call_count == 1
+        prompts = [call.args[0][0].content for call in mock_model.ainvoke.call_args_list]
+        assert all('"company_name": "TechPlatform Inc"' in p for p in prompts)
+
+
 class TestServiceCategorizerUtils:
     """Tests for service_categorizer utility functions."""
 
@@ -38,6 +38,57 @@ class TestHealthEndpoint:
         assert "main_agent" in agents
 
 
+    def test_health_reports_knowledge_base_readiness(self):
+        """Test /health reflects the knowledge base flag without failing the probe."""
+        from fastapi.testclient import TestClient
+        from api.main import app
+        
+        client = TestClient(app)
+        with patch.object(app.state, "knowledge_base_ready", False, create=True):
+            response = client.get("/health")
+            assert response.status_code == 200
+            assert response.json()["knowledge_base"] is False
+        with patch.object(app.state, "knowledge_base_ready", True, create=True):
+            assert client.get("/health").json()["knowledge_base"] is True
+
+    @pytest.mark.asyncio
+    async def test_wait_for_knowledge_base_backs_off(self):
+        """Test the startup probe retries with capped exponential backoff."""
+        from types import SimpleNamespace
+        import api.main
+        
+        retriever = MagicMock()
+        retriever.ais_ready = AsyncMock(side_effect=[False] * 5 + [True])
+        app = SimpleNamespace(state=SimpleNamespace(knowledge_base_ready=False))
+        
+        with patch.object(api.main, "get_dsa_retriever", return_value=retriever), \
+             patch.object(api.main.asyncio, "sleep", new=AsyncMock()) as sleep:
+            await api.main._wait_for_knowledge_base(app)
+        
+        assert app.state.knowledge_base_ready is True
+        assert [c.args[0] for c in sleep.await_args_list] == [1.0, 2.0, 4.0, 8.0, 8.0]
+
+    @pytest.mark.asyncio
+    async def test_wait_for_knowledge_base_keeps_probing(self):
+        """Test the probe survives errors and keeps going past its warning threshold."""
+        from types import SimpleNamespace
+        import api.main
+        
+        attempts = api.main.KNOWLEDGE_BASE_ATTEMPTS
+        retriever = MagicMock()
+        retriever.ais_ready = AsyncMock(side_effect=[False] * attempts + [True])
+        app = SimpleNamespace(state=SimpleNamespace(knowledge_base_ready=False))
+        
+        with patch.object(api.main, "get_dsa_retriever", side_effect=[RuntimeError("bad QDRANT_URL"), *[retriever] * (attempts + 1)]), \
+             patch.object(api.main.asyncio, "sleep", new=AsyncMock()) as sleep:
+            await api.main._wait_for_knowledge_base(app)
+        
+        assert app.state.knowledge_base_ready is True
+        assert retriever.ais_ready.await_count == attempts + 1
+        assert sleep.await_count == attempts + 1
+        assert sleep.await_args.args[0] == api.main.KNOWLEDGE_BASE_MAX_DELAY
+
+
 class TestRootEndpoint:
     """Tests for root endpoint."""
 
@@ -56,6 +107,36 @@ class TestRootEndpoint:
         assert "endpoints" in data
 
 
+    def test_root_serves_prebuilt_body(self):
+        """Test / and /health send the bodies encoded at import time."""
+        from fastapi.testclient import TestClient
+        from api.main import _HEALTH_BODIES, _ROOT_BODY, app
+        
+        client = TestClient(app)
+        
+        assert client.get("/").content == _ROOT_BODY
+        assert client.get("/health").content in _HEALTH_BODIES.values()
+        assert client.get("/").headers["content-type"] == "application/json"
+
+    def test_root_revalidates_with_etag(self):
+        """Test / sends an ETag and answers a matching If-None-Match with 304."""
+        from fastapi.testclient import TestClient
+        from api.main import app
+        
+        client = TestClient(app)
+        etag = client.get("/").headers["etag"]
+        
+        response = client.get("/", headers={"If-None-Match": etag})
+        assert response.status_code == 304
+        assert response.content == b""
+        assert response.headers["etag"] == etag
+        
+        assert client.get("/", headers={"If-None-Match": '"stale"'}).status_code == 200
+        
+        for header in (f'W/{etag}', f'"stale", {etag}', f'"a,b",W/{etag}', " * "):
+            assert client.get("/", headers={"If-None-Match": header}).status_code == 304
+        assert client.get("/", headers={"If-None-Match": f'"x{etag[1:]}'}).status_code == 200
+
 class TestCompanyMatcherEndpoint:
     """Tests for company matcher endpoints."""
 
@@ -111,6 +192,31 @@ class TestCompanyMatcherEndpoint:
         assert data["input_name"] == "Acme Corp"
 
 
+    def test_company_matcher_invoke_passes_json_through(self):
+        """Test the agent's JSON string is sent unchanged, and non-JSON is a 500."""
+        from fastapi.testclient import TestClient
+        from api.main import app, company_matcher
+        
+        if company_matcher is None:
+            pytest.skip("company_matcher not available")
+        
+        payload = '{\n  "input_name": "Zürich AG",\n  "suggestions": []\n}'
+        client = TestClient(app)
+        request = {"company_name": "Zürich AG", "country_of_establishment": "Switzerland"}
+        
+        with patch.object(company_matcher, "ainvoke", new=AsyncMock(return_value={"match_result": payload})):
+            response = client.post("/agents/company_matcher", json=request)
+        with patch.object(company_matcher, "ainvoke", new=AsyncMock(return_value={"match_result": "oops"})):
+            failed = client.post("/agents/company_matcher", json=request)
+        with patch.object(company_matcher, "ainvoke", new=AsyncMock(return_value={"match_result": payload[:-2]})):
+            truncated = client.post("/agents/company_matcher", json=request)
+        
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/json"
+        assert response.content == payload.encode()
+        assert failed.status_code == 500
+        assert truncated.status_code == 500
+
 class TestCompanyResearcherEndpoint:
     """Tests for company researcher endpoints."""
 
@@ -178,7 +284,7 @@ class TestServiceCategorizerEndpoint:
             "final_report": json.dumps(report),
         }
         
-        with patch.object(service_categorizer, "ainvoke", new=AsyncMock(return_value=mock_result)):
+        with patch.object(service_categorizer, "ainvoke", new=AsyncMock(return_value=mock_result)) as ainvoke:
             client = TestClient(app)
             response = client.post("/agents/service_categorizer", json={
                 "company_profile": sample_company_profile,
@@ -187,6 +293,9 @@ class TestServiceCategorizerEndpoint:
         assert response.status_code == 200
         data = response.json()
         assert data["company_name"] == "TechPlatform Inc"
+        input_state = ainvoke.call_args.args[0]
+        assert input_state["company_profile"] == sample_company_profile
+        assert json.loads(input_state["messages"][0].content) == sample_company_profile
 
 
 class TestMainAgentEndpoint:
@@ -231,6 +340,33 @@ class TestMainAgentEndpoint:
         assert "response" in data
 
 
+    def test_main_agent_invoke_maps_failures_to_status(self):
+        """Test upstream timeouts/errors become 504/502 and other failures keep their 500 detail."""
+        import httpx
+        from fastapi.testclient import TestClient
+        from api.main import app, main_agent
+        
+        if main_agent is None:
+            pytest.skip("main_agent not available")
+        
+        client = TestClient(app)
+        cases = [
+            (httpx.ReadTimeout("read timed out"), 504),
+            (httpx.ConnectError("connection refused"), 502),
+            (RuntimeError("boom"), 500),
+        ]
+        for error, status in cases:
+            with patch.object(main_agent, "ainvoke", new=AsyncMock(side_effect=error)):
+                response = client.post("/agents/main_agent", json={"message": "What is DSA?"})
+            assert response.status_code == status
+            assert response.json()["detail"] == str(error)
+        
+        with patch.object(main_agent, "ainvoke", new=AsyncMock(return_value={"messages": []})):
+            response = client.post("/agents/main_agent", json={"message": "What is DSA?"})
+        assert response.status_code == 500
+        assert response.json()["detail"] == "No response generated"
+
+
 class TestStreamingEndpoints:
     """Tests for streaming endpoints."""
 
@@ -249,6 +385,26 @@ class TestStreamingEndpoints:
         # Should return 400 for validation, not 404
         assert response.status_code == 400
 
+    def test_stream_endpoint_sends_unbuffered_sse(self):
+        """Test stream endpoints send SSE frames with proxy buffering disabled."""
+        from fastapi.testclient import TestClient
+        from langchain_core.messages import AIMessage
+        from api import main
+        
+        async def fake_events(input_state, version, config):
+            yield {"event": "on_chain_end", "name": "LangGraph", "parent_ids": [], "metadata": {},
+                   "data": {"output": {"messages": [AIMessage(content="Hi")]}}}
+        
+        graph = MagicMock()
+        graph.astream_events = fake_events
+        
+        with patch.object(main, "main_agent", graph):
+            response = TestClient(main.app).post("/agents/main_agent/stream", json={"message": "Hello"})
+        
+        assert response.headers["content-type"].startswith("text/event-stream")
+        assert response.headers["x-accel-buffering"] == "no"
+        assert response.content.endswith(b'data: {"type":"result","data":{"response":"Hi"}}\n\ndata: {"type":"done"}\n\n')
+
     def test_company_researcher_stream_endpoint_exists(self):
         """Test /agents/company_researcher/stream endpoint exists."""
         from fastapi.testclient import TestClient
@@ -292,6 +448,29 @@ class TestStreamingEndpoints:
         assert response.status_code == 400
 
 
+    @pytest.mark.parametrize("path,body", [
+        ("/agents/company_matcher", {"company_name": "  ", "country_of_establishment": "Belgium"}),
+        ("/agents/company_matcher/stream", {"company_name": "Acme", "country_of_establishment": " \t"}),
+        ("/agents/company_researcher", {"company_name": "\n"}),
+        ("/agents/company_researcher/stream", {"company_name": "   "}),
+        ("/agents/main_agent", {"message": "  "}),
+        ("/agents/main_agent/stream", {"message": "\t"}),
+    ])
+    def test_whitespace_only_fields_rejected_before_agent_runs(self, path, body):
+        """Test blank-after-strip fields return 400 without invoking the agent."""
+        from fastapi.testclient import TestClient
+        from api import main
+        
+        graph = MagicMock()
+        graph.ainvoke = AsyncMock()
+        agents = ("company_matcher", "company_researcher", "main_agent")
+        
+        with patch.multiple(main, **{name: graph for name in agents}):
+            response = TestClient(main.app).post(path, json=body)
+        
+        assert response.status_code == 400
+        graph.ainvoke.assert_not_called()
+
 class TestRequestModels:
     """Tests for API request models."""
 
@@ -351,3 +530,218 @@ class TestRequestModels:
         
         assert request.message == "What is DSA?"
         assert request.frontend_context == "Step 1"
+
+
+class TestStreamingHelpers:
+    """Tests for stream event helpers."""
+
+    def test_extract_sources_with_titles(self):
+        """Test _extract_sources pairs titles with URLs from web_search output."""
+        from api.main import _extract_sources
+        
+        text = "Search Results:\n\n1. **Acme About**\n   https://acme.com/about).\n   Acme HQ\n\n"
+        
+        assert _extract_sources(text) == [{"title": "Acme About", "url": "https://acme.com/about"}]
+
+    def test_extract_sources_falls_back_to_urls(self):
+        """Test _extract_sources returns bare URLs when no titles are present."""
+        from api.main import _extract_sources
+        
+        text = "content='see https://acme.com/a\\n and https://acme.com/b'"
+        
+        assert _extract_sources(text) == [{"url": "https://acme.com/a"}, {"url": "https://acme.com/b"}]
+        assert _extract_sources("No search results found.") == []
+
+    def test_input_builders_strip_and_validate(self):
+        """Test the input-state builders strip fields and reject blank ones."""
+        from fastapi import HTTPException
+        from api.main import (
+            CompanyResearcherRequest,
+            MainAgentRequest,
+            _company_researcher_input,
+            _main_agent_input,
+        )
+        
+        state = _company_researcher_input(CompanyResearcherRequest(company_name="  Acme  ", top_domain=" "))
+        
+        assert state["company_name"] == "Acme"
+        assert state["messages"][0].content == "Acme"
+        assert state["top_domain"] is None
+        with pytest.raises(HTTPException) as exc_info:
+            _main_agent_input(MainAgentRequest(message="   "))
+        assert exc_info.value.status_code == 400
+
+    @pytest.mark.asyncio
+    async def test_invoke_shared_joins_identical_runs(self):
+        """Test concurrent identical requests share one agent run."""
+        import asyncio
+        from api.main import CompanyResearcherRequest, _inflight_runs, _invoke_shared
+        
+        release = asyncio.Event()
+        
+        async def slow_invoke(state):
+            await release.wait()
+            return {"final_report": state["company_name"]}
+        
+        graph = MagicMock()
+        graph.ainvoke = AsyncMock(side_effect=slow_invoke)
+        acme = CompanyResearcherRequest(company_name="Acme")
+        other = CompanyResearcherRequest(company_name="Other")
+        
+        runs = [
+            asyncio.ensure_future(_invoke_shared("researcher", graph, req, {"company_name": req.company_name}))
+            for req in (acme, acme, other)
+        ]
+        await asyncio.sleep(0)
+        release.set()
+        results = await asyncio.gather(*runs)
+        
+        assert graph.ainvoke.call_count == 2
+        assert [r["final_report"] for r in results] == ["Acme", "Acme", "Other"]
+        assert not _inflight_runs
+
+    @pytest.mark.asyncio
+    async def test_invoke_shared_abandoned_failure_is_retrieved(self):
+        """Test a run that fails after every waiter left doesn't log an unretrieved exception."""
+        import asyncio
+        import gc
+        from api.main import CompanyResearcherRequest, _inflight_runs, _invoke_shared
+        
+        loop = asyncio.get_running_loop()
+        unhandled = []
+        loop.set_exception_handler(lambda loop, context: unhandled.append(context))
+        release = asyncio.Event()
+        
+        async def failing_invoke(state):
+            await release.wait()
+            raise RuntimeError("boom")
+        
+        graph = MagicMock()
+        graph.ainvoke = AsyncMock(side_effect=failing_invoke)
+        request = CompanyResearcherRequest(company_name="Acme")
+        try:
+            waiter = asyncio.ensure_future(_invoke_shared("researcher", graph, request, {}))
+            # Let the run start waiting on `release` before its only waiter goes away.
+            for _ in range(2):
+                await asyncio.sleep(0)
+            waiter.cancel()
+            release.set()
+            while _inflight_runs:
+                await asyncio.sleep(0)
+            del waiter
+            gc.collect()
+        finally:
+            loop.set_exception_handler(None)
+        
+        assert unhandled == []
+
+    def test_loads_or_none(self):
+        """Test _loads_or_none parses agent JSON and rejects invalid payloads."""
+        from api.main import _loads_or_none
+        
+        assert _loads_or_none('{"company_name": "Zürich AG"}') == {"company_name": "Zürich AG"}
+        assert _loads_or_none("No valid JSON here.") is None
+        assert _loads_or_none('  \n[1, 2]') == [1, 2]
+        assert _loads_or_none('{"truncated": ') is None
+        assert _loads_or_none("") is None
+        assert _loads_or_none(None) is None
+
+    def test_extractors_read_final_state(self):
+        """Test the module-level extractors pull each agent's result from its final state."""
+        from api.main import _extract_match, _extract_messages, _extract_report
+        from langchain_core.messages import AIMessage
+        
+        assert _extract_match({"match_result": '{"company_name": "Acme"}'}) == {"company_name": "Acme"}
+        assert _extract_match({}) is None
+        assert _extract_report({"final_report": '{"service_category": "Hosting"}'}) == {"service_category": "Hosting"}
+        assert _extract_report({"final_report": ""}) is None
+        assert _extract_messages({"messages": [AIMessage(content="Hi"), AIMessage(content="Done")]}) == {"response": "Done"}
+        assert _extract_messages({"messages": []}) is None
+
+    @pytest.mark.asyncio
+    async def test_stream_agent_events_yields_sse_bytes(self):
+        """Test stream_agent_events encodes each event as a UTF-8 SSE frame."""
+        from api.main import stream_agent_events
+        from langchain_core.messages import AIMessageChunk
+        
+        async def fake_events(input_state, version, config):
+            yield {
+                "event": "on_chat_model_stream",
+                "name": "ChatOpenAI",
+                "metadata": {"langgraph_node": "agent"},
+                "data": {"chunk": AIMessageChunk(content="Zürich")},
+            }
+        
+        graph = MagicMock()
+        graph.astream_events = fake_events
+        
+        frames = [frame async for frame in stream_agent_events(graph, {})]
+        
+        assert all(isinstance(f, bytes) and f.startswith(b"data: ") and f.endswith(b"\n\n") for f in frames)
+        token = json.loads(frames[0][6:])
+        assert token == {"type": "token", "content": "Zürich", "node": "agent", "agent": "ChatOpenAI"}
+        assert json.loads(frames[-1][6:]) == {"type": "done"}
+
+    @pytest.mark.asyncio
+    async def test_stream_agent_events_skips_unhandled_events(self):
+        """Test events without a handler are observed but not forwarded."""
+        from api.main import stream_agent_events
+        
+        async def fake_events(input_state, version, config):
+            yield {"event": "on_parser_stream", "name": "parser", "data": {}}
+            yield {"event": "on_chain_stream", "name": "agent", "metadata": {"langgraph_node": "agent"}}
+            yield {"event": "on_chain_start", "name": "RunnableSequence", "metadata": {}}
+            yield {"event": "on_tool_start", "name": "web_search", "metadata": {"langgraph_node": "tools"}, "data": {"input": {"query": "acme"}}}
+        
+        graph = MagicMock()
+        graph.astream_events = fake_events
+        seen = []
+        
+        frames = [frame async for frame in stream_agent_events(graph, {}, on_event=seen.append)]
+        
+        assert len(seen) == 4
+        assert [json.loads(f[6:]) for f in frames] == [
+            {"type": "tool_start", "name": "web_search", "node": "tools", "input": "{'query': 'acme'}"},
+            {"type": "done"},
+        ]
+
+    @pytest.mark.asyncio
+    async def test_stream_with_final_result_runs_graph_once(self):
+        """Test the result comes from the event stream without a second graph run."""
+        from api.main import stream_with_final_result
+        
+        async def fake_events(input_state, version, config):
+            yield {"event": "on_chain_start", "name": "LangGraph", "parent_ids": [], "metadata": {}}
+            yield {"event": "on_chain_end", "name": "LangGraph", "parent_ids": [], "metadata": {}, "data": {"output": {"final_report": "done"}}}
+        
+        graph = MagicMock()
+        graph.astream_events = fake_events
+        graph.ainvoke = AsyncMock()
+        
+        frames = [
+            json.loads(f[6:])
+            async for f in stream_with_final_result(graph, {}, extract_result=lambda s: {"report": s["final_report"]})
+        ]
+        
+        graph.ainvoke.assert_not_called()
+        assert frames[-2:] == [{"type": "result", "data": {"report": "done"}}, {"type": "done"}]
+
+    @pytest.mark.asyncio
+    async def test_stream_with_final_result_ignores_nested_chain_end(self):
+        """Test only the root on_chain_end output is used as the final state."""
+        from api.main import stream_with_final_result
+        
+        async def fake_events(input_state, version, config):
+            yield {"event": "on_chain_end", "name": "LangGraph", "parent_ids": [], "metadata": {}, "data": {"output": {"final_report": "root"}}}
+            yield {"event": "on_chain_end", "name": "finalize_report", "parent_ids": ["root"], "metadata": {"langgraph_node": "finalize_report"}, "data": {"output": {"final_report": "node"}}}
+        
+        graph = MagicMock()
+        graph.astream_events = fake_events
+        
+        frames = [
+            json.loads(f[6:])
+            async for f in stream_with_final_result(graph, {}, extract_result=lambda s: s)
+        ]
+        
+        results = [f for f in frames if f["type"] == "result"]
+        assert results == [{"type": "result", "data": {"final_report": "root"}}]
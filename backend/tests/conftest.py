@@ -113,6 +113,16 @@ def sample_classification() -> Dict[str, Any]:
 # Mock Fixtures
 # =============================================================================
 
+@pytest.fixture(autouse=True)
+def clear_search_cache():
+    """Keep the in-process search cache from leaking results between tests."""
+    from tools.cache import clear_local_cache
+    
+    clear_local_cache()
+    yield
+    clear_local_cache()
+
+
 @pytest.fixture
 def mock_redis_client():
     """Mock Redis client for cache tests."""
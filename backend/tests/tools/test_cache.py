@@ -150,6 +150,57 @@ class TestRedisCache:
             # Client should be reset
             assert tools.cache._client is None
 
+    def test_local_cache_serves_without_redis(self):
+        """Test set_cached results are served from the in-process cache when Redis is off."""
+        import tools.cache
+        tools.cache._client = None
+        
+        with patch.dict("os.environ", {}, clear=True):
+            tools.cache.set_cached("Test Query", 10, {"results": []})
+            
+            assert tools.cache.get_cached("test query", 10) == {"results": []}
+            assert tools.cache.get_cached("test query", 5) is None
+
+    def test_local_cache_expires(self):
+        """Test in-process entries expire after LOCAL_CACHE_TTL."""
+        import tools.cache
+        tools.cache._client = None
+        
+        with patch.dict("os.environ", {}, clear=True):
+            with patch("tools.cache.time.monotonic", return_value=1000.0):
+                tools.cache.set_cached("test query", 10, {"results": []})
+            with patch("tools.cache.time.monotonic", return_value=1000.0 + tools.cache.LOCAL_CACHE_TTL + 1):
+                assert tools.cache.get_cached("test query", 10) is None
+
+    @pytest.mark.asyncio
+    async def test_aget_cached_reads_redis_in_thread(self, mock_redis_client):
+        """Test aget_cached runs the blocking Redis read through asyncio.to_thread."""
+        import tools.cache
+        tools.cache.clear_local_cache()
+        mock_redis_client.get.return_value = json.dumps({"results": [1]}).encode()
+        
+        with patch.dict("os.environ", {"REDIS_URL": "redis://localhost:6379"}):
+            with patch.object(tools.cache, "get_redis_client", return_value=mock_redis_client):
+                with patch("tools.cache.asyncio.to_thread", wraps=tools.cache.asyncio.to_thread) as to_thread:
+                    assert await tools.cache.aget_cached("test query", 10) == {"results": [1]}
+                    to_thread.assert_called_once()
+                    # Now in the in-process layer: no second trip to Redis.
+                    assert await tools.cache.aget_cached("test query", 10) == {"results": [1]}
+                    to_thread.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_aset_cached_without_redis_stays_on_loop(self):
+        """Test aset_cached/aget_cached skip the worker thread when Redis is not configured."""
+        import tools.cache
+        tools.cache._client = None
+        
+        with patch.dict("os.environ", {}, clear=True):
+            with patch("tools.cache.asyncio.to_thread") as to_thread:
+                await tools.cache.aset_cached("test query", 10, {"results": []})
+                assert await tools.cache.aget_cached("test query", 10) == {"results": []}
+                assert await tools.cache.aget_cached("other query", 10) is None
+                to_thread.assert_not_called()
+
     def test_cache_ttl_constant(self):
         """Test CACHE_TTL is 6 hours."""
         from tools.cache import CACHE_TTL
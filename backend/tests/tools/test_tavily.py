@@ -57,8 +57,8 @@ class TestTavilyTools:
         
         with patch.dict("os.environ", {"TAVILY_API_KEY": "test-key"}):
             with patch("tools.tavily_tools.AsyncTavilyClient", return_value=mock_client):
-                with patch("tools.tavily_tools.get_cached", return_value=None):
-                    with patch("tools.tavily_tools.set_cached"):
+                with patch("tools.tavily_tools.aget_cached", new=AsyncMock(return_value=None)):
+                    with patch("tools.tavily_tools.aset_cached", new=AsyncMock()):
                         result = await tavily_search_tool(["acme corporation"])
         
         assert "Search Results:" in result
@@ -83,8 +83,8 @@ class TestTavilyTools:
         
         with patch.dict("os.environ", {"TAVILY_API_KEY": "test-key"}):
             with patch("tools.tavily_tools.AsyncTavilyClient", return_value=mock_client):
-                with patch("tools.tavily_tools.get_cached", return_value=None):
-                    with patch("tools.tavily_tools.set_cached"):
+                with patch("tools.tavily_tools.aget_cached", new=AsyncMock(return_value=None)):
+                    with patch("tools.tavily_tools.aset_cached", new=AsyncMock()):
                         result = await tavily_search_tool(["test"])
         
         # Should only include unique URLs
@@ -101,13 +101,73 @@ class TestTavilyTools:
         
         with patch.dict("os.environ", {"TAVILY_API_KEY": "test-key"}):
             with patch("tools.tavily_tools.AsyncTavilyClient", return_value=mock_client):
-                with patch("tools.tavily_tools.get_cached", return_value=None):
-                    with patch("tools.tavily_tools.set_cached"):
+                with patch("tools.tavily_tools.aget_cached", new=AsyncMock(return_value=None)):
+                    with patch("tools.tavily_tools.aset_cached", new=AsyncMock()):
                         result = await tavily_search_tool(["query 1", "query 2"])
         
         # Should have called search for each query
         assert mock_client.search.call_count == 2
 
+    @pytest.mark.asyncio
+    async def test_tavily_search_tool_semaphore_caps_concurrency(self, mock_tavily_response):
+        """Test tavily_search_tool runs queries concurrently up to the semaphore limit."""
+        import asyncio
+        from tools.tavily_tools import tavily_search_tool
+        
+        in_flight = 0
+        peak = 0
+        
+        async def slow_search(query, **kwargs):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            return mock_tavily_response
+        
+        mock_client = AsyncMock()
+        mock_client.search = AsyncMock(side_effect=slow_search)
+        
+        with patch.dict("os.environ", {"TAVILY_API_KEY": "test-key"}):
+            with patch("tools.tavily_tools.AsyncTavilyClient", return_value=mock_client):
+                with patch("tools.tavily_tools.aget_cached", new=AsyncMock(return_value=None)):
+                    with patch("tools.tavily_tools.aset_cached", new=AsyncMock()):
+                        await tavily_search_tool(["q1", "q2", "q3", "q4"])
+                        assert peak == 4
+                        peak = 0
+                        await tavily_search_tool(
+                            ["q1", "q2", "q3", "q4"], semaphore=asyncio.Semaphore(2)
+                        )
+        
+        assert peak == 2
+        assert mock_client.search.call_count == 8
+
+    @pytest.mark.asyncio
+    async def test_tavily_search_tool_shares_inflight_searches(self, mock_tavily_response):
+        """Test identical concurrent queries share a single Tavily request."""
+        import asyncio
+        from tools.tavily_tools import _inflight, tavily_search_tool
+        
+        async def slow_search(query, **kwargs):
+            await asyncio.sleep(0.01)
+            return mock_tavily_response
+        
+        mock_client = AsyncMock()
+        mock_client.search = AsyncMock(side_effect=slow_search)
+        
+        with patch.dict("os.environ", {"TAVILY_API_KEY": "test-key"}):
+            with patch("tools.tavily_tools.AsyncTavilyClient", return_value=mock_client):
+                with patch("tools.tavily_tools.aget_cached", new=AsyncMock(return_value=None)):
+                    with patch("tools.tavily_tools.aset_cached", new=AsyncMock()):
+                        results = await asyncio.gather(
+                            tavily_search_tool(["Acme HQ", "acme hq "]),
+                            tavily_search_tool(["acme hq"]),
+                        )
+        
+        assert mock_client.search.call_count == 1
+        assert all("Acme Corporation" in r for r in results)
+        assert not _inflight.get(asyncio.get_running_loop())
+
     @pytest.mark.asyncio
     async def test_tavily_search_tool_cache_hit(self, mock_tavily_response):
         """Test tavily_search_tool uses cached results."""
@@ -118,7 +178,7 @@ class TestTavilyTools:
         
         with patch.dict("os.environ", {"TAVILY_API_KEY": "test-key"}):
             with patch("tools.tavily_tools.AsyncTavilyClient", return_value=mock_client):
-                with patch("tools.tavily_tools.get_cached", return_value=mock_tavily_response):
+                with patch("tools.tavily_tools.aget_cached", new=AsyncMock(return_value=mock_tavily_response)):
                     result = await tavily_search_tool(["cached query"])
         
         # Should not call API when cache hit
@@ -136,7 +196,7 @@ class TestTavilyTools:
         
         with patch.dict("os.environ", {"TAVILY_API_KEY": "test-key"}):
             with patch("tools.tavily_tools.AsyncTavilyClient", return_value=mock_client):
-                with patch("tools.tavily_tools.get_cached", return_value=None):
+                with patch("tools.tavily_tools.aget_cached", new=AsyncMock(return_value=None)):
                     result = await tavily_search_tool(["failing query"])
         
         # Should include error in results
@@ -154,8 +214,8 @@ class TestTavilyTools:
         
         with patch.dict("os.environ", {"TAVILY_API_KEY": "test-key"}):
             with patch("tools.tavily_tools.AsyncTavilyClient", return_value=mock_client):
-                with patch("tools.tavily_tools.get_cached", return_value=None):
-                    with patch("tools.tavily_tools.set_cached"):
+                with patch("tools.tavily_tools.aget_cached", new=AsyncMock(return_value=None)):
+                    with patch("tools.tavily_tools.aset_cached", new=AsyncMock()):
                         result = await tavily_search_tool(["no results query"])
         
         assert "No search results found" in result
@@ -177,8 +237,8 @@ class TestTavilyTools:
         
         with patch.dict("os.environ", {"TAVILY_API_KEY": "test-key"}):
             with patch("tools.tavily_tools.AsyncTavilyClient", return_value=mock_client):
-                with patch("tools.tavily_tools.get_cached", return_value=None):
-                    with patch("tools.tavily_tools.set_cached"):
+                with patch("tools.tavily_tools.aget_cached", new=AsyncMock(return_value=None)):
+                    with patch("tools.tavily_tools.aset_cached", new=AsyncMock()):
                         result = await tavily_search_tool(["test"])
         
         # Content should be truncated
@@ -201,9 +261,27 @@ class TestTavilyTools:
         
         with patch.dict("os.environ", {"TAVILY_API_KEY": "test-key"}):
             with patch("tools.tavily_tools.AsyncTavilyClient", return_value=mock_client):
-                with patch("tools.tavily_tools.get_cached", return_value=None):
-                    with patch("tools.tavily_tools.set_cached"):
+                with patch("tools.tavily_tools.aget_cached", new=AsyncMock(return_value=None)):
+                    with patch("tools.tavily_tools.aset_cached", new=AsyncMock()):
                         result = await tavily_search_tool(["test"])
         
         # Should only show first 10 results
         assert "test10.com" not in result or "test14.com" not in result
+
+    @pytest.mark.asyncio
+    async def test_tavily_search_tool_reuses_client(self, mock_tavily_response):
+        """Test searches on one loop share a client, which close_clients closes."""
+        from tools.tavily_tools import close_clients, tavily_search_tool
+        
+        mock_client = AsyncMock()
+        mock_client.search = AsyncMock(return_value=mock_tavily_response)
+        
+        with patch.dict("os.environ", {"TAVILY_API_KEY": "test-key"}):
+            with patch("tools.tavily_tools.AsyncTavilyClient", return_value=mock_client) as mock_cls:
+                await tavily_search_tool(["first query"])
+                await tavily_search_tool(["second query"])
+                await close_clients()
+        
+        assert mock_cls.call_count == 1
+        assert mock_client.search.await_count == 2
+        mock_client.close.assert_awaited_once()
@@ -54,6 +54,21 @@ class TestCompanyResearcherConfiguration:
             assert config.max_research_iterations == 5
             assert config.max_search_queries == 2
 
+    def test_configuration_reused_within_config(self):
+        """Test from_runnable_config reuses instances without touching the config."""
+        from company_researcher.configuration import Configuration
+        
+        runnable_config = {"configurable": {"max_search_results": 5}}
+        
+        first = Configuration.from_runnable_config(runnable_config)
+        second = Configuration.from_runnable_config(runnable_config)
+        other = Configuration.from_runnable_config({"configurable": {"max_search_results": 7}})
+        
+        assert first is second
+        assert other is not first
+        assert other.max_search_results == 7
+        assert runnable_config == {"configurable": {"max_search_results": 5}}
+
     def test_configuration_from_none_config(self):
         """Test Configuration.from_runnable_config with None."""
         from company_researcher.configuration import Configuration
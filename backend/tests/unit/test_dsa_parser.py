@@ -0,0 +1,125 @@
+"""Unit tests for the DSA knowledge base parser."""
+
+import pytest
+from unittest.mock import patch
+
+
+SAMPLE_DSA_HTML = """
+<html><body>
+<div class="eli-subdivision" id="rct_1"><p>(1) Information society services.</p></div>
+<div class="eli-subdivision" id="art_16">
+  <p class="sti-art">Notice and action mechanisms</p>
+  <p>Providers of hosting services shall put mechanisms in place.</p>
+</div>
+</body></html>
+"""
+
+
+class TestParsedChunkCache:
+    """Tests for the on-disk cache of parsed DSA chunks."""
+
+    def test_load_parsed_chunks_writes_and_reuses_cache(self, tmp_path):
+        """Test the second load reads the cache file instead of re-parsing."""
+        from knowledge_base import dsa_parser
+
+        with patch.object(dsa_parser, "PARSED_CACHE_DIR", str(tmp_path)):
+            first = dsa_parser.load_parsed_chunks(SAMPLE_DSA_HTML)
+            with patch.object(dsa_parser, "parse_dsa_document", side_effect=AssertionError("re-parsed")):
+                second = dsa_parser.load_parsed_chunks(SAMPLE_DSA_HTML)
+
+        assert [c.id for c in first] == ["recital_1", "article_16"]
+        assert second == first
+        assert len(list(tmp_path.glob("dsa_parsed_*.json"))) == 1
+        assert not list(tmp_path.glob("*.tmp"))
+
+    def test_load_parsed_chunks_keys_cache_on_html(self, tmp_path):
+        """Test changed HTML gets its own cache file."""
+        from knowledge_base import dsa_parser
+
+        with patch.object(dsa_parser, "PARSED_CACHE_DIR", str(tmp_path)):
+            dsa_parser.load_parsed_chunks(SAMPLE_DSA_HTML)
+            changed = dsa_parser.load_parsed_chunks(SAMPLE_DSA_HTML.replace("rct_1", "rct_2"))
+
+        assert changed[0].id == "recital_2"
+        assert len(list(tmp_path.glob("dsa_parsed_*.json"))) == 2
+
+    def test_load_parsed_chunks_ignores_corrupt_cache(self, tmp_path):
+        """Test an unreadable cache file falls back to parsing."""
+        from knowledge_base import dsa_parser
+
+        with patch.object(dsa_parser, "PARSED_CACHE_DIR", str(tmp_path)):
+            dsa_parser._parsed_cache_path(SAMPLE_DSA_HTML).write_text("{not json")
+            chunks = dsa_parser.load_parsed_chunks(SAMPLE_DSA_HTML)
+
+        assert len(chunks) == 2
+
+    def test_load_parsed_chunks_revalidates_cache_entries(self, tmp_path):
+        """Test a cache file with malformed entries is re-parsed rather than trusted."""
+        from knowledge_base import dsa_parser
+
+        with patch.object(dsa_parser, "PARSED_CACHE_DIR", str(tmp_path)):
+            dsa_parser._parsed_cache_path(SAMPLE_DSA_HTML).write_text('[{"id": "article_16", "title": null}]')
+            chunks = dsa_parser.load_parsed_chunks(SAMPLE_DSA_HTML)
+
+        assert [c.id for c in chunks] == ["recital_1", "article_16"]
+        assert chunks[1].title == "Notice and action mechanisms"
+
+
+class TestDirectRetrieval:
+    """Tests for article/recital lookup by number."""
+
+    @pytest.fixture
+    def sample_chunks(self, tmp_path):
+        """Load the sample document in place of the bundled DSA text."""
+        from knowledge_base import dsa_parser
+
+        with patch.object(dsa_parser, "PARSED_CACHE_DIR", str(tmp_path)), \
+             patch.object(dsa_parser, "download_dsa_html", return_value=SAMPLE_DSA_HTML), \
+             patch.object(dsa_parser, "_CACHED_CHUNKS", None), \
+             patch.object(dsa_parser, "_CHUNKS_BY_ID", {}):
+            yield dsa_parser
+
+    def test_get_article_and_recital(self, sample_chunks):
+        """Test single lookups accept ints and strings and miss cleanly."""
+        assert sample_chunks.get_article(16).title == "Notice and action mechanisms"
+        assert sample_chunks.get_article("16").id == "article_16"
+        assert sample_chunks.get_recital(1).chunk_type == "recital"
+        assert sample_chunks.get_article(1) is None
+        assert sample_chunks.get_recital(16) is None
+
+    def test_get_articles_and_recitals_keep_order(self, sample_chunks):
+        """Test batch lookups keep the requested order and skip unknown numbers."""
+        assert [a.id for a in sample_chunks.get_articles([99, 16, "16"])] == ["article_16", "article_16"]
+        assert [r.id for r in sample_chunks.get_recitals([1, 2])] == ["recital_1"]
+
+    def test_concurrent_first_loads_parse_once(self, sample_chunks):
+        """Test a warm-up racing a request only loads the document once."""
+        from concurrent.futures import ThreadPoolExecutor
+
+        with patch.object(sample_chunks, "load_parsed_chunks", wraps=sample_chunks.load_parsed_chunks) as load:
+            with ThreadPoolExecutor(max_workers=4) as pool:
+                results = list(pool.map(lambda _: sample_chunks._get_all_chunks(), range(8)))
+
+        assert load.call_count == 1
+        assert all(r is results[0] for r in results)
+
+
+class TestArticleMetadata:
+    """Tests for article number -> (section, category) mapping."""
+
+    def test_get_article_metadata_matches_ranges(self):
+        """Test the lookup table agrees with ARTICLE_METADATA's ranges."""
+        from knowledge_base.dsa_parser import ARTICLE_METADATA, get_article_metadata
+
+        for (start, end), meta in ARTICLE_METADATA.items():
+            assert get_article_metadata(start) == meta
+            assert get_article_metadata(end) == meta
+
+    def test_get_article_metadata_outside_ranges(self):
+        """Test gaps and out-of-range numbers fall back to Other."""
+        from knowledge_base.dsa_parser import get_article_metadata
+
+        assert get_article_metadata(10) == ("Other", "All Services")
+        assert get_article_metadata(0) == ("Other", "All Services")
+        assert get_article_metadata(94) == ("Other", "All Services")
+        assert get_article_metadata(-1) == ("Other", "All Services")
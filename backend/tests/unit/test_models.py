@@ -48,6 +48,16 @@ class TestCompanyMatcherModels:
         
         assert not hasattr(match, "extra_field")
 
+    def test_company_match_is_frozen(self, sample_company_match):
+        """Test that CompanyMatch instances are immutable."""
+        from company_matcher.models import CompanyMatch
+        from pydantic import ValidationError
+        
+        match = CompanyMatch(**sample_company_match)
+        
+        with pytest.raises(ValidationError):
+            match.name = "Other"
+
     def test_company_match_result_creation(self, sample_company_match):
         """Test CompanyMatchResult model creation."""
         from company_matcher.models import CompanyMatch, CompanyMatchResult
@@ -102,6 +112,35 @@ class TestCompanyMatcherModels:
         assert parsed["exact_match"]["name"] == "Acme Corporation"
         assert "suggestions" in parsed
 
+    def test_company_match_result_to_json_excludes_none(self):
+        """Test to_json output equals model_dump(exclude_none=True)."""
+        from company_matcher.models import CompanyMatch, CompanyMatchResult
+        
+        suggestion = CompanyMatch(
+            name="Similar Corp",
+            top_domain="similar.com",
+            confidence="medium",
+            summary_long="A similar company.",
+        )
+        result = CompanyMatchResult(input_name="Unknown Corp", suggestions=[suggestion])
+        
+        parsed = json.loads(result.to_json())
+        
+        assert parsed == result.model_dump(exclude_none=True)
+        assert "exact_match" not in parsed
+        assert "summary_short" not in parsed["suggestions"][0]
+
+    def test_company_match_result_to_json_indent(self):
+        """Test to_json honours indent: 2 by default, any other width, None for compact."""
+        from company_matcher.models import CompanyMatchResult
+        
+        result = CompanyMatchResult(input_name="Acme Corp")
+        
+        assert '\n  "input_name": "Acme Corp"' in result.to_json()
+        assert '\n    "input_name": "Acme Corp"' in result.to_json(indent=4)
+        assert "\n" not in result.to_json(indent=None)
+        assert json.loads(result.to_json(indent=4)) == json.loads(result.to_json(indent=None))
+
 
 class TestCompanyResearcherModels:
     """Tests for company_researcher models."""
@@ -0,0 +1,514 @@
+"""Unit tests for the DSA knowledge base retriever."""
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+
+@pytest.fixture
+def retriever():
+    """DSARetriever with mocked Qdrant and OpenAI clients and empty caches."""
+    import threading
+    from collections import OrderedDict
+    from knowledge_base import query_cache
+    from knowledge_base.retriever import DSARetriever, _EmbedBatcher
+
+    instance = DSARetriever.__new__(DSARetriever)
+    instance.qdrant = MagicMock()
+    instance.openai = MagicMock()
+    instance.openai.embeddings.create.return_value = MagicMock(data=[MagicMock(embedding=[0.1, 0.2])])
+    instance.aqdrant = AsyncMock()
+    instance._ready = False
+    instance._embedding_cache = OrderedDict()
+    instance._embedding_lock = threading.Lock()
+    instance._embed_batcher = _EmbedBatcher(instance._aembed_now)
+    instance.aopenai = MagicMock()
+    instance.aopenai.embeddings.create = AsyncMock(return_value=MagicMock(data=[MagicMock(embedding=[0.1, 0.2])]))
+    instance._exact_cache = query_cache.ExactCache()
+    instance._semantic_cache = query_cache.SemanticCache()
+    return instance
+
+
+class TestGetDsaContext:
+    """Tests for DSARetriever.get_dsa_context."""
+
+    def test_get_dsa_context_flattens_hits(self, retriever):
+        """Test hits are returned as flat dicts, tolerating missing payloads."""
+        hit = MagicMock(id=7, score=0.75, payload={
+            "title": "Article 16", "content": "Notice and action", "section": "Due Diligence - Hosting",
+            "category": "Hosting Service", "chunk_type": "article",
+        })
+        empty = MagicMock(id=8, score=0.5, payload=None)
+        retriever.qdrant.query_points.return_value = MagicMock(points=[hit, empty])
+
+        results = retriever.get_dsa_context("notice and action", limit=2)
+
+        assert results[0] == {
+            "id": "7", "title": "Article 16", "content": "Notice and action",
+            "section": "Due Diligence - Hosting", "category": "Hosting Service",
+            "chunk_type": "article", "score": 0.75,
+        }
+        assert results[1]["id"] == "8"
+        assert results[1]["title"] == "" and results[1]["chunk_type"] == ""
+
+    def test_get_dsa_context_builds_filter(self, retriever):
+        """Test category and chunk_type become Qdrant filter conditions."""
+        retriever.qdrant.query_points.return_value = MagicMock(points=[])
+
+        retriever.get_dsa_context("hosting", category="Hosting Service", chunk_type="article")
+        query_filter = retriever.qdrant.query_points.call_args.kwargs["query_filter"]
+
+        assert [c.key for c in query_filter.must] == ["category", "chunk_type"]
+
+
+class TestAsyncRetrieval:
+    """Tests for the awaitable retriever methods."""
+
+    @pytest.mark.asyncio
+    async def test_aget_dsa_context_uses_async_clients(self, retriever):
+        """Test aget_dsa_context awaits the async clients and leaves the sync ones alone."""
+        hit = MagicMock(id=1, score=0.9, payload={"title": "Article 24", "chunk_type": "article"})
+        retriever.aqdrant.query_points.return_value = MagicMock(points=[hit])
+
+        results = await retriever.aget_dsa_context("transparency", limit=3, chunk_type="article")
+
+        assert [r["title"] for r in results] == ["Article 24"]
+        kwargs = retriever.aqdrant.query_points.call_args.kwargs
+        assert kwargs["limit"] == 3
+        assert kwargs["query"] == pytest.approx([0.4472136, 0.8944272])
+        assert [c.key for c in kwargs["query_filter"].must] == ["chunk_type"]
+        assert kwargs["with_payload"] == ["title", "content", "section", "category", "chunk_type"]
+        assert kwargs["with_vectors"] is False
+        retriever.qdrant.query_points.assert_not_called()
+        retriever.openai.embeddings.create.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_ais_ready(self, retriever):
+        """Test ais_ready needs a non-empty collection and swallows errors."""
+        retriever.aqdrant.get_collection.side_effect = ConnectionError("down")
+        assert await retriever.ais_ready() is False
+
+        retriever.aqdrant.get_collection.side_effect = None
+        retriever.aqdrant.get_collection.return_value = MagicMock(points_count=0)
+        assert await retriever.ais_ready() is False
+
+        retriever.aqdrant.get_collection.return_value = MagicMock(points_count=12)
+        assert await retriever.ais_ready() is True
+        retriever.aqdrant.collection_exists.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_ais_ready_probes_once_when_ready(self, retriever):
+        """Test a ready retriever doesn't ask Qdrant again."""
+        retriever.aqdrant.get_collection.return_value = MagicMock(points_count=12)
+
+        assert await retriever.ais_ready() is True
+        assert await retriever.ais_ready() is True
+
+        assert retriever.aqdrant.get_collection.await_count == 1
+
+    def test_collection_has_data_single_call(self, retriever):
+        """Test the sync readiness check makes one get_collection call."""
+        retriever.qdrant.get_collection.return_value = MagicMock(points_count=3)
+        assert retriever.collection_has_data() is True
+        assert retriever.qdrant.get_collection.call_count == 1
+
+        retriever.qdrant.get_collection.side_effect = ValueError("Not found")
+        assert retriever.collection_has_data() is False
+
+
+class TestSemanticCache:
+    """Tests for the similarity-keyed query result cache."""
+
+    @pytest.fixture
+    def semantic_cache(self):
+        """Enable semantic caching and return an empty cache."""
+        from knowledge_base import query_cache
+
+        with patch.object(query_cache, "SEMANTIC_CACHE_THRESHOLD", 0.95):
+            yield query_cache.SemanticCache()
+
+    def test_similar_query_hits_and_filters_partition(self, semantic_cache):
+        """Test a near-identical embedding hits only under the same filters."""
+        results = [{"id": "1", "title": "Article 16"}]
+        semantic_cache.set([1.0, 0.0, 0.0], (5, None, None), results)
+
+        assert semantic_cache.get([0.99, 0.05, 0.0], (5, None, None)) is results
+        assert semantic_cache.get([0.0, 1.0, 0.0], (5, None, None)) is None
+        assert semantic_cache.get([1.0, 0.0, 0.0], (5, "Hosting Service", None)) is None
+        assert semantic_cache.get([1.0, 0.0, 0.0], (10, None, None)) is None
+
+    def test_semantic_get_many_matches_each_embedding(self, semantic_cache):
+        """Test the batch lookup answers each embedding like get would."""
+        semantic_cache.set([1.0, 0.0, 0.0], (5, None, None), ["x"])
+        semantic_cache.set([0.0, 2.0, 0.0], (5, None, None), ["y"])
+
+        hits = semantic_cache.get_many([[0.0, 0.5, 0.01], [0.0, 0.0, 1.0], [3.0, 0.0, 0.0], [0.0, 0.0, 0.0]], (5, None, None))
+
+        assert hits == [["y"], None, ["x"], None]
+        assert semantic_cache.get_many([[1.0, 0.0, 0.0]], (3, None, None)) == [None]
+
+    def test_expired_and_evicted_entries_miss(self, semantic_cache):
+        """Test entries expire after the TTL and the oldest go past the size cap."""
+        from knowledge_base import query_cache
+
+        with patch.object(query_cache, "SEMANTIC_CACHE_TTL", -1):
+            semantic_cache.set([1.0, 0.0], (5, None, None), [])
+        assert semantic_cache.get([1.0, 0.0], (5, None, None)) is None
+
+        with patch.object(query_cache, "SEMANTIC_CACHE_MAX_ENTRIES", 2):
+            semantic_cache.set([1.0, 0.0, 0.0], (5, None, None), ["x"])
+            semantic_cache.set([0.0, 1.0, 0.0], (5, None, None), ["y"])
+            semantic_cache.set([0.0, 0.0, 1.0], (5, None, None), ["z"])
+
+        assert semantic_cache.get([1.0, 0.0, 0.0], (5, None, None)) is None
+        assert semantic_cache.get([0.0, 1.0, 0.0], (5, None, None)) == ["y"]
+        assert semantic_cache.get([0.0, 0.0, 1.0], (5, None, None)) == ["z"]
+
+    def test_disabled_by_default_threshold(self):
+        """Test nothing is stored or served when the threshold is 0."""
+        from knowledge_base import query_cache
+
+        cache = query_cache.SemanticCache()
+        with patch.object(query_cache, "SEMANTIC_CACHE_THRESHOLD", 0):
+            cache.set([1.0], (5, None, None), [])
+            assert cache.get([1.0], (5, None, None)) is None
+            assert not cache._buckets
+
+    @pytest.mark.asyncio
+    async def test_retriever_skips_qdrant_on_hit(self, retriever, semantic_cache):
+        """Test a cached query is answered without a second Qdrant search."""
+        retriever._semantic_cache = semantic_cache
+        hit = MagicMock(id=1, score=0.9, payload={"title": "Article 24"})
+        retriever.aqdrant.query_points.return_value = MagicMock(points=[hit])
+
+        first = await retriever.aget_dsa_context("transparency reports")
+        second = await retriever.aget_dsa_context("transparency reporting")
+
+        assert second == first
+        assert retriever.aqdrant.query_points.await_count == 1
+
+    def test_index_chunks_clears_cache(self, retriever, semantic_cache):
+        """Test re-indexing drops cached results."""
+        retriever._semantic_cache = semantic_cache
+        retriever._exact_cache.set(("a",), [])
+        semantic_cache.set([1.0, 0.0], (5, None, None), [])
+
+        retriever.index_chunks([])
+
+        assert not semantic_cache._buckets
+        assert retriever._exact_cache.get(("a",)) is None
+
+    def test_retrievers_do_not_share_results(self, semantic_cache):
+        """Test a semantic hit in one cache is not served from another."""
+        from knowledge_base import query_cache
+
+        semantic_cache.set([1.0, 0.0], (5, None, None), ["x"])
+
+        assert query_cache.SemanticCache().get([1.0, 0.0], (5, None, None)) is None
+
+
+class TestExactCache:
+    """Tests for the exact query + filters result cache."""
+
+    @pytest.mark.asyncio
+    async def test_repeat_query_skips_embedding_and_search(self, retriever):
+        """Test an identical query (modulo case/whitespace) is served from the cache."""
+        hit = MagicMock(id=1, score=0.9, payload={"title": "Article 24"})
+        retriever.aqdrant.query_points.return_value = MagicMock(points=[hit])
+
+        first = await retriever.aget_dsa_context("Transparency  reports", limit=3)
+        second = await retriever.aget_dsa_context("transparency reports", limit=3)
+        other_filter = await retriever.aget_dsa_context("transparency reports", limit=3, category="VLOP/VLOSE")
+
+        assert second == first == other_filter
+        assert retriever.aopenai.embeddings.create.await_count == 2
+        assert retriever.aqdrant.query_points.await_count == 2
+
+    def test_cached_results_are_copies(self, retriever):
+        """Test mutating a returned list doesn't change what the cache serves."""
+        retriever.qdrant.query_points.return_value = MagicMock(points=[MagicMock(id=1, score=0.5, payload={})])
+
+        retriever.get_dsa_context("hosting").clear()
+
+        assert len(retriever.get_dsa_context("hosting")) == 1
+        assert retriever.qdrant.query_points.call_count == 1
+
+    def test_expired_and_evicted_entries_miss(self):
+        """Test TTL expiry and the LRU size cap."""
+        from knowledge_base import query_cache
+
+        cache = query_cache.ExactCache()
+        with patch.object(query_cache, "EXACT_CACHE_MAX_ENTRIES", 2):
+            cache.set(("a",), [1])
+            cache.set(("b",), [2])
+            cache.get(("a",))
+            cache.set(("c",), [3])
+            with patch.object(query_cache, "EXACT_CACHE_TTL", -1):
+                cache.set(("d",), [4])
+
+            assert cache.get(("a",)) is None
+            assert cache.get(("b",)) is None
+            assert cache.get(("c",)) == [3]
+            assert cache.get(("d",)) is None
+
+    def test_retrievers_do_not_share_results(self, retriever):
+        """Test a result cached by one retriever is not served by another."""
+        import copy
+        from knowledge_base import query_cache
+
+        other = copy.copy(retriever)
+        other.qdrant = MagicMock()
+        other._exact_cache = query_cache.ExactCache()
+        hit = MagicMock(id=7, score=0.75, payload={"title": "Article 16"})
+        retriever.qdrant.query_points.return_value = MagicMock(points=[hit])
+        other.qdrant.query_points.return_value = MagicMock(points=[])
+
+        assert len(retriever.get_dsa_context("hosting")) == 1
+        assert other.get_dsa_context("hosting") == []
+        assert other.qdrant.query_points.call_count == 1
+
+
+class TestSharedRetrievers:
+    """Tests for the per-loop retriever pool."""
+
+    @pytest.mark.asyncio
+    async def test_get_retriever_reuses_instance_per_credentials(self):
+        """Test one retriever per credential set, closed by close_retrievers."""
+        from knowledge_base import retriever as retriever_module
+
+        with patch.object(retriever_module, "DSARetriever", side_effect=lambda **_: MagicMock(aclose=AsyncMock())) as cls:
+            first = retriever_module.get_retriever("http://qdrant:6333", "key", "sk-1")
+            again = retriever_module.get_retriever("http://qdrant:6333", "key", "sk-1")
+            other = retriever_module.get_retriever("http://qdrant:6333", "key", "sk-2")
+
+            assert first is again
+            assert other is not first
+            assert cls.call_count == 2
+
+            await retriever_module.close_retrievers()
+
+            first.aclose.assert_awaited_once()
+            other.aclose.assert_awaited_once()
+            assert retriever_module.get_retriever("http://qdrant:6333", "key", "sk-1") is not first
+            await retriever_module.close_retrievers()
+
+
+class TestBatchRetrieval:
+    """Tests for DSARetriever.aget_dsa_context_batch."""
+
+    @pytest.mark.asyncio
+    async def test_batch_embeds_and_searches_once(self, retriever):
+        """Test uncached queries share one embedding call and one batch search."""
+        retriever.aopenai.embeddings.create = AsyncMock(return_value=MagicMock(
+            data=[MagicMock(embedding=[1.0, 0.0]), MagicMock(embedding=[0.0, 1.0])]
+        ))
+        retriever.aqdrant.query_batch_points.return_value = [
+            MagicMock(points=[MagicMock(id=1, score=0.9, payload={"title": "Article 16"})]),
+            MagicMock(points=[MagicMock(id=2, score=0.8, payload={"title": "Article 24"})]),
+        ]
+
+        results = await retriever.aget_dsa_context_batch(["notice", "transparency"], limit=2, category="Online Platform")
+
+        assert [[r["title"] for r in hits] for hits in results] == [["Article 16"], ["Article 24"]]
+        assert retriever.aopenai.embeddings.create.call_args.kwargs["input"] == ["notice", "transparency"]
+        requests = retriever.aqdrant.query_batch_points.call_args.kwargs["requests"]
+        assert [r.query for r in requests] == [[1.0, 0.0], [0.0, 1.0]]
+        assert all(r.limit == 2 and r.filter.must[0].key == "category" for r in requests)
+        assert all(r.with_payload == ["title", "content", "section", "category", "chunk_type"] for r in requests)
+        assert all(r.with_vector is False for r in requests)
+        retriever.aqdrant.query_points.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_batch_only_searches_uncached_queries(self, retriever):
+        """Test exact-cache hits are filled in without being embedded or searched."""
+        from knowledge_base import query_cache
+
+        retriever._exact_cache.set(query_cache.exact_key("notice", 5, None, None), [{"title": "cached"}])
+        retriever.aqdrant.query_batch_points.return_value = [
+            MagicMock(points=[MagicMock(id=2, score=0.8, payload={"title": "Article 24"})]),
+        ]
+
+        results = await retriever.aget_dsa_context_batch(["transparency", "notice"])
+
+        assert results[0][0]["title"] == "Article 24"
+        assert results[1] == [{"title": "cached"}]
+        assert retriever.aopenai.embeddings.create.call_args.kwargs["input"] == ["transparency"]
+        assert len(retriever.aqdrant.query_batch_points.call_args.kwargs["requests"]) == 1
+
+        await retriever.aget_dsa_context_batch(["notice", "transparency"])
+        assert retriever.aqdrant.query_batch_points.await_count == 1
+
+
+class TestEmbeddings:
+    """Tests for embedding normalization and the collection's distance metric."""
+
+    def test_embed_returns_unit_vectors(self, retriever):
+        """Test embeddings come back unit-length so dot product equals cosine."""
+        retriever.openai.embeddings.create.return_value = MagicMock(
+            data=[MagicMock(embedding=[3.0, 4.0]), MagicMock(embedding=[0.0, 0.0])]
+        )
+
+        assert retriever._embed(["a", "b"]) == [pytest.approx([0.6, 0.8]), [0.0, 0.0]]
+
+    def test_create_collection_uses_dot_product(self, retriever):
+        """Test new collections use dot-product distance."""
+        from qdrant_client.models import Distance
+
+        retriever.create_collection(force=True)
+
+        vectors_config = retriever.qdrant.recreate_collection.call_args.kwargs["vectors_config"]
+        assert vectors_config.distance == Distance.DOT
+
+
+    def test_create_collection_quantizes_to_int8(self, retriever):
+        """Test new collections keep int8 scalar-quantized vectors in RAM."""
+        from qdrant_client.models import ScalarType
+
+        retriever.create_collection(force=True)
+
+        quantization = retriever.qdrant.recreate_collection.call_args.kwargs["quantization_config"]
+        assert quantization.scalar.type == ScalarType.INT8
+        assert quantization.scalar.always_ram is True
+
+    @pytest.mark.asyncio
+    async def test_searches_rescore_quantized_candidates(self, retriever):
+        """Test single, async and batch searches all ask Qdrant to rescore with oversampling."""
+        from knowledge_base.retriever import SEARCH_PARAMS
+
+        retriever.qdrant.query_points.return_value = MagicMock(points=[])
+        retriever.aqdrant.query_points.return_value = MagicMock(points=[])
+        retriever.aqdrant.query_batch_points.return_value = [MagicMock(points=[])]
+
+        retriever.get_dsa_context("sync")
+        await retriever.aget_dsa_context("async")
+        await retriever.aget_dsa_context_batch(["batch"])
+
+        assert retriever.qdrant.query_points.call_args.kwargs["search_params"] is SEARCH_PARAMS
+        assert retriever.aqdrant.query_points.call_args.kwargs["search_params"] is SEARCH_PARAMS
+        assert retriever.aqdrant.query_batch_points.call_args.kwargs["requests"][0].params == SEARCH_PARAMS
+        assert SEARCH_PARAMS.quantization.rescore is True
+        assert SEARCH_PARAMS.quantization.oversampling == 2.0
+
+
+class TestEmbeddingCache:
+    """Tests for the per-retriever query embedding cache."""
+
+    @pytest.mark.asyncio
+    async def test_same_query_other_filters_reuses_embedding(self, retriever):
+        """Test a query re-run with different filters isn't embedded again."""
+        retriever.aqdrant.query_points.return_value = MagicMock(points=[])
+        retriever.aqdrant.query_batch_points.return_value = [MagicMock(points=[])]
+
+        await retriever.aget_dsa_context("notice and action")
+        await retriever.aget_dsa_context("notice and action", category="Hosting Service")
+        await retriever.aget_dsa_context_batch(["notice and action"], limit=3)
+
+        assert retriever.aopenai.embeddings.create.await_count == 1
+        assert retriever.aqdrant.query_points.await_count == 2
+        first, second = (c.kwargs["query"] for c in retriever.aqdrant.query_points.call_args_list)
+        assert second == pytest.approx(first, rel=1e-6)
+
+    def test_only_missing_queries_are_embedded(self, retriever):
+        """Test a mixed batch sends only uncached queries to the API."""
+        retriever.openai.embeddings.create.return_value = MagicMock(data=[MagicMock(embedding=[1.0, 0.0])])
+        retriever._embed_queries(["known"])
+        retriever.openai.embeddings.create.return_value = MagicMock(data=[MagicMock(embedding=[0.0, 1.0])])
+
+        embeddings = retriever._embed_queries(["known", "new"])
+
+        assert embeddings == [[1.0, 0.0], [0.0, 1.0]]
+        assert retriever.openai.embeddings.create.call_args.kwargs["input"] == ["new"]
+
+    def test_cache_is_bounded(self, retriever):
+        """Test the least recently used embedding is evicted past the cap."""
+        from knowledge_base import retriever as retriever_module
+
+        retriever.openai.embeddings.create.side_effect = lambda model, input: MagicMock(
+            data=[MagicMock(embedding=[1.0, 0.0]) for _ in input]
+        )
+        with patch.object(retriever_module, "EMBEDDING_CACHE_MAX_ENTRIES", 2):
+            retriever._embed_queries(["a", "b"])
+            retriever._embed_queries(["a"])
+            retriever._embed_queries(["c"])
+            retriever._embed_queries(["a", "b"])
+
+        assert [c.kwargs["input"] for c in retriever.openai.embeddings.create.call_args_list] == [["a", "b"], ["c"], ["b"]]
+
+
+class TestEmbeddingBatching:
+    """Tests for coalescing concurrent embedding calls."""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_calls_share_one_request(self, retriever):
+        """Test concurrent lookups are embedded in one API call and get their own vectors back."""
+        import asyncio
+
+        retriever.aopenai.embeddings.create = AsyncMock(side_effect=lambda model, input: MagicMock(
+            data=[MagicMock(embedding=[float(i + 1), 0.0, 1.0]) for i in range(len(input))]
+        ))
+
+        first, second = await asyncio.gather(
+            retriever._aembed_queries(["notice"]),
+            retriever._aembed_queries(["transparency", "appeals"]),
+        )
+
+        assert retriever.aopenai.embeddings.create.await_count == 1
+        assert retriever.aopenai.embeddings.create.call_args.kwargs["input"] == ["notice", "transparency", "appeals"]
+        assert first[0] == pytest.approx([0.7071, 0.0, 0.7071], abs=1e-4)
+        assert [e[0] for e in second] == pytest.approx([0.8944, 0.9487], abs=1e-4)
+
+    @pytest.mark.asyncio
+    async def test_full_batch_is_sent_without_waiting(self, retriever):
+        """Test a batch reaching EMBED_BATCH_MAX_TEXTS goes out before the window ends."""
+        import asyncio
+        from knowledge_base import retriever as retriever_module
+
+        retriever.aopenai.embeddings.create = AsyncMock(side_effect=lambda model, input: MagicMock(
+            data=[MagicMock(embedding=[1.0, 0.0]) for _ in input]
+        ))
+        with patch.object(retriever_module, "EMBED_BATCH_WINDOW", 60):
+            embeddings = await asyncio.wait_for(
+                retriever._aembed([str(i) for i in range(retriever_module.EMBED_BATCH_MAX_TEXTS)]), 1
+            )
+
+        assert len(embeddings) == retriever_module.EMBED_BATCH_MAX_TEXTS
+
+    @pytest.mark.asyncio
+    async def test_api_error_reaches_every_caller(self, retriever):
+        """Test a failed batch request raises in each waiting call."""
+        import asyncio
+
+        retriever.aopenai.embeddings.create = AsyncMock(side_effect=RuntimeError("rate limited"))
+
+        results = await asyncio.gather(
+            retriever._aembed(["a"]), retriever._aembed(["b"]), return_exceptions=True
+        )
+
+        assert [str(r) for r in results] == ["rate limited", "rate limited"]
+
+
+class TestQdrantConcurrency:
+    """Tests for the cap on in-flight Qdrant searches."""
+
+    @pytest.mark.asyncio
+    async def test_searches_queue_beyond_limit(self, retriever):
+        """Test no more than QDRANT_MAX_CONCURRENCY searches run at once."""
+        import asyncio
+        from knowledge_base import retriever as retriever_module
+
+        in_flight = peak = 0
+
+        async def slow_search(**_):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            return MagicMock(points=[])
+
+        retriever.aqdrant.query_points.side_effect = slow_search
+        with patch.object(retriever_module, "QDRANT_MAX_CONCURRENCY", 2), \
+             patch.object(retriever_module, "_qdrant_semaphores", retriever_module.weakref.WeakKeyDictionary()):
+            await asyncio.gather(*(retriever.aget_dsa_context(f"query {n}") for n in range(6)))
+
+        assert retriever.aqdrant.query_points.await_count == 6
+        assert peak == 2
@@ -132,8 +132,6 @@ class TestCompanyResearcherState:
             "prompt_template": "questions/q10.jinja",
             "top_domain": None,
             "summary_long": None,
-            "research_summary": None,
-            "completed_answers": [],
             "iterations": 0,
         }
         
@@ -153,15 +151,11 @@ class TestCompanyResearcherState:
             "prompt_template": "test.jinja",
             "top_domain": None,
             "summary_long": None,
-            "research_summary": None,
-            "completed_answers": [],
             "iterations": 0,
         }
         
         assert state["top_domain"] is None
         assert state["summary_long"] is None
-        assert state["research_summary"] is None
-        assert state["completed_answers"] == []
         assert state["iterations"] == 0
 
 
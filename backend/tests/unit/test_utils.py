@@ -100,6 +100,18 @@ class TestCompanyMatcherUtils:
         
         assert result == "{}"
 
+    def test_parse_result_from_messages_braces_in_strings(self):
+        """Test _parse_result_from_messages handles braces inside string values and trailing text."""
+        from company_matcher.graph import _parse_result_from_messages
+        from langchain_core.messages import ToolMessage
+        
+        payload = '{"exact_match": {"name": "Curly {Braces} Inc", "summary_long": "uses \\"}\\" a lot"}, "suggestions": []}'
+        content = f"Matching complete: {payload} (see {{notes}})"
+        messages = [ToolMessage(content=content, tool_call_id="1")]
+        
+        result = _parse_result_from_messages(messages)
+        assert result == payload
+
     def test_load_prompt(self):
         """Test load_prompt loads and renders template."""
         from company_matcher.graph import load_prompt
@@ -198,6 +210,23 @@ class TestCompanyResearcherUtils:
         key = get_api_key_for_model("unknown:model")
         assert key is None
 
+    def test_load_prompt_flat_fast_path_matches_jinja(self):
+        """Test the placeholder fast path renders exactly like Jinja."""
+        from company_researcher.graph import _get_flat_template, _jinja_env, load_prompt
+        
+        kwargs = {
+            "company_name": "Acme {{ question }}",
+            "top_domain": None,
+            "summary_long": "Long summary",
+            "question": "Where is the HQ?",
+            "raw_output": "trace with \\1 and {% raw %}",
+            "max_iterations": 3,
+        }
+        
+        for name in ("summarize.jinja", "questions/q00.jinja"):
+            assert _get_flat_template(name) is not None
+            assert load_prompt(name, **kwargs) == _jinja_env.get_template(name).render(**kwargs)
+
     def test_get_today_str_format(self):
         """Test get_today_str returns formatted date."""
         from company_researcher.utils import get_today_str